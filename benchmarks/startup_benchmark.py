@@ -0,0 +1,252 @@
+# benchmarks/startup_benchmark.py
+"""
+Benchmark du démarrage de GEND-TRACK.
+
+Lance MainGendarmeApp avec la plateforme Qt « offscreen » dans un processus
+neuf (démarrage à froid), mesure le temps jusqu'au premier affichage et le
+détail par phase :
+    - imports      : import de src.ui.main_window
+    - db_manager   : DatabaseManager.__init__
+    - stats_handler: StatsHandler.__init__
+    - widgets      : construction des widgets (init_ui hors thème)
+    - theme        : MainGendarmeApp.apply_theme
+    - first_paint  : du lancement au premier événement Paint
+
+Les données « -X importtime » sont collectées dans un processus séparé.
+Le résultat est écrit en JSON (par défaut benchmarks/startup_benchmark.json)
+et comparé au budget (startup_budget.json) :
+le script retourne un code 1 si le budget est dépassé.
+
+Usage :
+    python benchmarks/startup_benchmark.py --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUDGET = os.path.join(BENCHMARKS_DIR, "startup_budget.json")
+# Résultat non versionné (.gitignore), à côté du budget quel que soit le répertoire courant
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, "startup_benchmark.json")
+
+PHASES = ["imports", "db_manager", "stats_handler", "widgets", "theme", "first_paint"]
+
+
+def _child_env():
+    """Environnement des processus fils : Qt hors écran, projet dans le PYTHONPATH."""
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def run_child(result_path):
+    """Mesure un démarrage dans le processus courant et écrit les temps dans result_path."""
+    start = time.perf_counter()
+    timings = {}
+
+    def timed(cls, method_name, phase):
+        """Remplace une méthode par une version chronométrée (cumulée)."""
+        original = getattr(cls, method_name)
+
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                timings[phase] = timings.get(phase, 0.0) + (time.perf_counter() - t) * 1000
+
+        setattr(cls, method_name, wrapper)
+
+    from PyQt6.QtCore import QObject, QEvent
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    t = time.perf_counter()
+    from src.ui import main_window
+    timings["imports"] = (time.perf_counter() - t) * 1000
+
+    timed(main_window.DatabaseManager, "__init__", "db_manager")
+    timed(main_window.StatsHandler, "__init__", "stats_handler")
+    timed(main_window.MainGendarmeApp, "init_ui", "init_ui")
+    timed(main_window.MainGendarmeApp, "apply_theme", "theme")
+
+    class PaintWatcher(QObject):
+        """Enregistre l'instant du premier événement Paint de la fenêtre."""
+
+        def __init__(self):
+            super().__init__()
+            self.painted_at = None
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and self.painted_at is None:
+                self.painted_at = time.perf_counter()
+            return False
+
+    window = main_window.MainGendarmeApp()
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+
+    deadline = time.perf_counter() + 10
+    while watcher.painted_at is None and time.perf_counter() < deadline:
+        app.processEvents()
+    painted_at = watcher.painted_at or time.perf_counter()
+
+    timings["widgets"] = timings.pop("init_ui", 0.0) - timings.get("theme", 0.0)
+    timings["first_paint"] = (painted_at - start) * 1000
+
+    heavy = ["pandas", "matplotlib", "seaborn", "reportlab", "pptx", "openpyxl"]
+    result = {
+        "phases_ms": {phase: round(timings.get(phase, 0.0), 2) for phase in PHASES},
+        "painted": watcher.painted_at is not None,
+        "heavy_modules_loaded": [m for m in heavy if m in sys.modules],
+    }
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+    window.close()
+
+
+def measure_startup(runs):
+    """Lance `runs` démarrages à froid et retourne la liste des résultats."""
+    results = []
+    for i in range(runs):
+        fd, result_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", result_path],
+                cwd=PROJECT_ROOT, env=_child_env(),
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=120
+            )
+            if completed.returncode != 0:
+                raise RuntimeError(f"Échec du démarrage (run {i + 1}):\n{completed.stderr}")
+            with open(result_path, encoding="utf-8") as f:
+                results.append(json.load(f))
+        finally:
+            os.remove(result_path)
+    return results
+
+
+def collect_importtime(top=15):
+    """Exécute `-X importtime` sur src.ui.main_window et retourne les modules dominants."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.ui.main_window"],
+        cwd=PROJECT_ROOT, env=_child_env(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=120
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            parts = line[len("import time:"):].split("|")
+            self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        except (ValueError, IndexError):
+            continue
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": round(self_us / 1000, 2),
+            "cumulative_ms": round(cumulative_us / 1000, 2),
+        })
+
+    target = next((m for m in modules if m["module"] == "src.ui.main_window"), None)
+    return {
+        "total_ms": target["cumulative_ms"] if target else None,
+        "top_cumulative": sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "top_self": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top],
+    }
+
+
+def check_budget(report, budget, baseline=None):
+    """Compare le rapport au budget (et à une référence éventuelle), retourne les dépassements."""
+    regressions = []
+    for phase, limit in budget.get("phases_ms", {}).items():
+        value = report["phases_ms"].get(phase)
+        if value is not None and value > limit:
+            regressions.append(f"{phase}: {value:.1f} ms > budget {limit} ms")
+
+    forbidden = set(budget.get("forbidden_modules", []))
+    for run in report.get("runs_detail", []):
+        loaded = forbidden.intersection(run.get("heavy_modules_loaded", []))
+        if loaded:
+            regressions.append(f"modules chargés au démarrage: {', '.join(sorted(loaded))}")
+            break
+
+    if baseline:
+        tolerance = budget.get("max_regression_ratio", 0.25)
+        for phase, previous in baseline.get("phases_ms", {}).items():
+            value = report["phases_ms"].get(phase)
+            if value is not None and previous and value > previous * (1 + tolerance):
+                regressions.append(
+                    f"{phase}: {value:.1f} ms > référence {previous:.1f} ms (+{tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage de GEND-TRACK")
+    parser.add_argument("--runs", type=int, default=5, help="Nombre de démarrages à froid")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Fichier JSON de sortie")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET, help="Fichier JSON du budget")
+    parser.add_argument("--baseline", help="Résultat JSON précédent pour détecter les régressions")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, PROJECT_ROOT)
+        run_child(args.child)
+        return 0
+
+    runs = measure_startup(args.runs)
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "phases_ms": {
+            phase: round(statistics.median(r["phases_ms"][phase] for r in runs), 2)
+            for phase in PHASES
+        },
+        "runs_detail": runs,
+        "importtime": collect_importtime(),
+    }
+
+    with open(args.budget, encoding="utf-8") as f:
+        budget = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report["budget"] = budget
+    report["regressions"] = check_budget(report, budget, baseline)
+    report["ok"] = not report["regressions"]
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("=== Benchmark démarrage ===")
+    for phase in PHASES:
+        print(f"{phase:>14}: {report['phases_ms'][phase]:8.1f} ms")
+    print(f"{'importtime':>14}: {report['importtime']['total_ms']} ms")
+    for regression in report["regressions"]:
+        print(f"✗ {regression}")
+    print("✓ Budget respecté" if report["ok"] else "✗ Budget dépassé")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
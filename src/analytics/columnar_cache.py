@@ -0,0 +1,134 @@
+import glob
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnarCache:
+    """
+    Cache disque en colonnes d'un DataFrame, rangé à côté de la base
+    (gendarmes.db.cache/) et valide pour une version des données (compteur
+    des écritures sources, DatabaseManager.get_source_version).
+
+    Une colonne = un fichier .npy relu avec mmap_mode='r' :
+        - bool      : tableau booléen
+        - int       : valeurs int64 + masque des valeurs nulles (Int64)
+        - float     : valeurs float64 (NaN pour les valeurs nulles)
+        - category  : codes + dictionnaire des catégories dans meta.json
+        - object    : encodage par dictionnaire (codes + valeurs dans meta.json)
+
+    meta.json est écrit en dernier par remplacement atomique : un cache
+    partiellement écrit n'est jamais lu.
+    """
+
+    FORMAT = 2
+
+    def __init__(self, db_manager, name="snapshot"):
+        self.directory = f"{db_manager.db_name}.cache"
+        self.name = name
+        self.meta_path = os.path.join(self.directory, f"{name}.meta.json")
+
+    def _column_path(self, version, column, suffix):
+        return os.path.join(self.directory, f"{self.name}.{version}.{column}.{suffix}.npy")
+
+    def cached_version(self) -> Optional[int]:
+        """Version des données du cache présent sur disque, None s'il n'y en a pas"""
+        meta = self._read_meta()
+        return meta['version'] if meta else None
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('format') == self.FORMAT else None
+
+    def load(self, version) -> Optional[pd.DataFrame]:
+        """Ouvre le cache en mémoire mappée s'il correspond à la version demandée"""
+        if version is None:
+            return None
+        meta = self._read_meta()
+        if meta is None or meta['version'] != version:
+            return None
+
+        try:
+            data = {}
+            for column, spec in meta['columns'].items():
+                kind = spec['kind']
+                if kind == 'bool':
+                    data[column] = np.load(self._column_path(version, column, 'values'), mmap_mode='r')
+                elif kind == 'int':
+                    values = np.load(self._column_path(version, column, 'values'), mmap_mode='r')
+                    mask = np.load(self._column_path(version, column, 'mask'), mmap_mode='r')
+                    data[column] = pd.arrays.IntegerArray(values, mask)
+                elif kind == 'float':
+                    data[column] = np.load(self._column_path(version, column, 'values'), mmap_mode='r')
+                elif kind == 'category':
+                    codes = np.load(self._column_path(version, column, 'codes'), mmap_mode='r')
+                    data[column] = pd.Categorical.from_codes(
+                        codes, categories=spec['categories'], ordered=spec['ordered'])
+                else:
+                    codes = np.load(self._column_path(version, column, 'codes'), mmap_mode='r')
+                    uniques = np.array(spec['values'] + [None], dtype=object)
+                    # Le code -1 (valeur nulle) pointe sur le None ajouté en fin de tableau
+                    data[column] = uniques[codes]
+            return pd.DataFrame(data, columns=list(meta['columns']))
+
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Cache en colonnes illisible, il sera reconstruit : {str(e)}")
+            return None
+
+    def save(self, frame: pd.DataFrame, version):
+        """Écrit le DataFrame pour la version donnée puis supprime les anciennes versions"""
+        if version is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+
+        columns = {}
+        for column in frame.columns:
+            series = frame[column]
+            if pd.api.types.is_bool_dtype(series.dtype):
+                np.save(self._column_path(version, column, 'values'), series.to_numpy(dtype=bool))
+                columns[column] = {'kind': 'bool'}
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                np.save(self._column_path(version, column, 'codes'), series.cat.codes.to_numpy())
+                columns[column] = {'kind': 'category',
+                                   'categories': series.cat.categories.tolist(),
+                                   'ordered': bool(series.cat.ordered)}
+            elif pd.api.types.is_integer_dtype(series.dtype):
+                values = series.astype('Int64')
+                np.save(self._column_path(version, column, 'values'),
+                        values.fillna(0).to_numpy(dtype=np.int64))
+                np.save(self._column_path(version, column, 'mask'), values.isna().to_numpy())
+                columns[column] = {'kind': 'int'}
+            elif pd.api.types.is_float_dtype(series.dtype):
+                np.save(self._column_path(version, column, 'values'),
+                        series.to_numpy(dtype=np.float64, na_value=np.nan))
+                columns[column] = {'kind': 'float'}
+            else:
+                codes, uniques = pd.factorize(series)
+                np.save(self._column_path(version, column, 'codes'), codes.astype(np.int32))
+                columns[column] = {'kind': 'object',
+                                   'values': [v.item() if hasattr(v, 'item') else v for v in uniques]}
+
+        meta = {'format': self.FORMAT, 'version': version, 'rows': len(frame), 'columns': columns}
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+
+        self._remove_other_versions(version)
+
+    def _remove_other_versions(self, version):
+        current = f"{self.name}.{version}."
+        for path in glob.glob(os.path.join(self.directory, f"{self.name}.*.npy")):
+            if not os.path.basename(path).startswith(current):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Fichier encore mappé (Windows) : il sera supprimé au prochain enregistrement
+                    pass
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def _codes(values: pd.Series):
+    """Codes entiers (-1 = valeur nulle) et libellés d'une colonne"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype=np.int64), list(values.cat.categories)
+    try:
+        codes, uniques = pd.factorize(values, sort=True)
+    except TypeError:
+        # Types mélangés (texte et nombres) : tri sur la représentation textuelle
+        codes, uniques = pd.factorize(values)
+        order = sorted(range(len(uniques)), key=lambda i: str(uniques[i]))
+        remap = np.empty(len(order), dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+        uniques = [uniques[i] for i in order]
+    return np.asarray(codes, dtype=np.int64), list(uniques)
+
+
+@dataclass(frozen=True)
+class Crosstab:
+    """
+    Effectifs d'un tableau croisé : counts[y, x] pour les libellés y_labels × x_labels.
+    Le tableau (avec marges) et les données des graphiques sont dérivés de ce même tableau.
+    """
+    counts: np.ndarray
+    x_labels: list
+    y_labels: list
+    x_name: str = None
+    y_name: str = None
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def to_pivot(self, margins_name='TOTAL') -> pd.DataFrame:
+        """Tableau croisé avec une ligne et une colonne de totaux, comme pd.crosstab(margins=True)"""
+        table = np.zeros((len(self.y_labels) + 1, len(self.x_labels) + 1), dtype=np.int64)
+        table[:-1, :-1] = self.counts
+        table[:-1, -1] = self.counts.sum(axis=1)
+        table[-1, :-1] = self.counts.sum(axis=0)
+        table[-1, -1] = self.counts.sum()
+
+        index = pd.Index(self.y_labels + [margins_name], name=self.y_name)
+        columns = pd.Index(self.x_labels + [margins_name], name=self.x_name)
+        return pd.DataFrame(table, index=index, columns=columns)
+
+    def to_long(self) -> pd.DataFrame:
+        """Cellules non nulles (x_value, y_value, count), triées par x puis y"""
+        x_idx, y_idx = np.nonzero(self.counts.T)
+        return pd.DataFrame({
+            'x_value': [self.x_labels[i] for i in x_idx],
+            'y_value': [self.y_labels[i] for i in y_idx],
+            'count': self.counts[y_idx, x_idx],
+        })
+
+
+def crosstab(x: pd.Series, y: pd.Series, weights=None) -> Crosstab:
+    """
+    Tableau croisé de deux colonnes en un seul np.bincount sur x_code * ny + y_code.
+
+    Les lignes où x ou y est nul sont ignorées ; les libellés sans effectif sont
+    retirés (comme pd.crosstab avec marges). weights permet de compter des cellules
+    déjà agrégées (cube statistique).
+    """
+    x_codes, x_labels = _codes(x)
+    y_codes, y_labels = _codes(y)
+    nx, ny = len(x_labels), len(y_labels)
+
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    flat = x_codes[valid] * ny + y_codes[valid]
+    if weights is not None:
+        weights = np.asarray(weights)[valid]
+    counts = np.bincount(flat, weights=weights, minlength=nx * ny)
+    counts = np.rint(counts).astype(np.int64).reshape(nx, ny).T
+
+    rows = counts.any(axis=1)
+    cols = counts.any(axis=0)
+    return Crosstab(
+        counts=counts[rows][:, cols],
+        x_labels=[label for label, keep in zip(x_labels, cols) if keep],
+        y_labels=[label for label, keep in zip(y_labels, rows) if keep],
+        x_name=x.name,
+        y_name=y.name,
+    )
@@ -0,0 +1,148 @@
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from src.database.migrations import CUBE_DIMENSIONS, tranche_label
+
+from .crosstab_engine import Crosstab, crosstab
+from .cube_maintenance import CUBE_CELLS_QUERY, cube_is_fresh, mark_cube_fresh
+from .dimensions import SERVICE_LABELS, NON_SPECIFIE
+
+# Champs de ANALYSIS_THEMES -> colonne du cube (les années de service sont rangées par tranches)
+FIELD_DIMENSIONS = {dim: dim for dim in CUBE_DIMENSIONS if dim != 'service_range'}
+FIELD_DIMENSIONS['annee_service'] = 'service_range'
+
+CUBE_BUILD_QUERY = (f"INSERT INTO stats_cube ({', '.join(CUBE_DIMENSIONS)}, nombre)"
+                    + CUBE_CELLS_QUERY.format(scope="1"))
+
+
+def cube_dimension(field) -> Optional[str]:
+    """Colonne du cube correspondant à un champ d'analyse, None si le cube ne la couvre pas"""
+    return FIELD_DIMENSIONS.get(field)
+
+
+class CubeEngine:
+    """
+    Cube persisté (table stats_cube) des sanctions uniques par combinaison de
+    dimensions : année, faute, statut, subdivision, catégorie, situation
+    matrimoniale, tranche d'années de service et grade.
+
+    Chaque cellule compte des lignes de sanction uniques : les effectifs sont
+    additifs, toute coupe 2-D filtrée s'obtient en sommant les cellules.
+
+    Les formulaires de saisie le maintiennent par écarts (CubeDeltaTracker) ; il est
+    reconstruit quand stats_meta.cube_version ne correspond plus à source_version
+    (incrémentée par trigger à chaque écriture sur sanctions ou gendarmes), par
+    exemple après un import.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._lock = threading.Lock()
+
+    def covers(self, *fields) -> bool:
+        return all(cube_dimension(field) is not None for field in fields)
+
+    def ensure_fresh(self, conn):
+        """Reconstruit le cube si les données sources ont changé depuis sa construction"""
+        if not cube_is_fresh(conn.cursor()):
+            self.rebuild(conn)
+
+    def rebuild(self, conn):
+        """Recalcule tout le cube dans une seule transaction"""
+        print("Reconstruction du cube statistique")
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM stats_cube")
+        cursor.execute(CUBE_BUILD_QUERY)
+        mark_cube_fresh(cursor)
+        conn.commit()
+
+    def slice(self, x_field, y_field, filters=None) -> Optional[pd.DataFrame]:
+        """
+        Coupe 2-D du cube : effectifs par couple (x, y) après filtrage.
+
+        Args:
+            x_field, y_field: Champs d'analyse des axes (ANALYSIS_THEMES)
+            filters: {champ: valeur} ; pour annee_service la valeur est une tranche ('0-5')
+
+        Returns:
+            DataFrame x_value, y_value, count (cellules non nulles),
+            None si un des champs n'est pas une dimension du cube
+        """
+        filters = filters or {}
+        if not self.covers(x_field, y_field, *filters):
+            return None
+
+        x_dim = cube_dimension(x_field)
+        y_dim = cube_dimension(y_field)
+        conditions, params = self._conditions([x_dim, y_dim], filters)
+
+        query = f"""
+            SELECT {x_dim} AS x_value, {y_dim} AS y_value, SUM(nombre) AS count
+            FROM stats_cube
+            WHERE {' AND '.join(conditions)}
+            GROUP BY 1, 2
+            HAVING SUM(nombre) > 0
+            ORDER BY 1, 2
+        """
+        return self._read(query, params)
+
+    def aggregate(self, fields, filters=None) -> Optional[pd.DataFrame]:
+        """
+        Effectifs regroupés sur un nombre quelconque de dimensions.
+
+        Returns:
+            DataFrame (une colonne par champ + count), None si un champ n'est pas couvert
+        """
+        filters = filters or {}
+        fields = list(dict.fromkeys(fields))
+        if not fields or not self.covers(*fields, *filters):
+            return None
+
+        dims = [cube_dimension(field) for field in fields]
+        conditions, params = self._conditions(dims, filters)
+        query = f"""
+            SELECT {', '.join(f'{dim} AS "{field}"' for dim, field in zip(dims, fields))},
+                   SUM(nombre) AS count
+            FROM stats_cube
+            WHERE {' AND '.join(conditions)}
+            GROUP BY {', '.join(str(i + 1) for i in range(len(dims)))}
+            HAVING SUM(nombre) > 0
+        """
+        return self._read(query, params)
+
+    @staticmethod
+    def _conditions(dims, filters):
+        """Axes renseignés et filtres {champ: valeur}"""
+        conditions = [f"{dim} IS NOT NULL" for dim in dims]
+        params = []
+        for field, value in filters.items():
+            if field == 'annee_service':
+                value = tranche_label(value)
+            # Comparaison textuelle : la valeur saisie est une chaîne, l'année et la catégorie des entiers
+            conditions.append(f"CAST({cube_dimension(field)} AS TEXT) = ?")
+            params.append(str(value))
+        return conditions, params
+
+    def _read(self, query, params) -> pd.DataFrame:
+        with self._lock, self.db_manager.get_connection() as conn:
+            self.ensure_fresh(conn)
+            cells = pd.read_sql_query(query, conn, params=params)
+
+        cells['count'] = cells['count'].astype('int64')
+        return cells
+
+    @staticmethod
+    def crosstab(cells: pd.DataFrame, x_field, y_field) -> Crosstab:
+        """Tableau croisé des cellules d'une coupe (même moteur que le snapshot)"""
+        x_values = CubeEngine._axis(cells['x_value'], x_field)
+        y_values = CubeEngine._axis(cells['y_value'], y_field)
+        return crosstab(x_values, y_values, weights=cells['count'])
+
+    @staticmethod
+    def _axis(values: pd.Series, field) -> pd.Series:
+        if cube_dimension(field) == 'service_range':
+            # Tranches dans l'ordre de la catégorie ordonnée du snapshot
+            values = pd.Categorical(values, categories=SERVICE_LABELS + [NON_SPECIFIE], ordered=True)
+        return pd.Series(values, name=field)
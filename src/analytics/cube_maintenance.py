@@ -0,0 +1,175 @@
+from collections import Counter
+
+from src.database.migrations import CUBE_DIMENSIONS
+
+from .dimensions import NON_SPECIFIE, reference_joins
+
+# Cellules du cube : une ligne par sanction unique (mêmes règles de doublon que le
+# snapshot analytique), rattachée à la version de la fiche gendarme valide à la
+# date des faits (gendarmes_historique).
+# Les dimensions textuelles sont regroupées sur l'identifiant de leur valeur de
+# référence (tables ref_*) et libellées par celle-ci ; les années de service
+# par leur tranche à la date des faits (table tranches).
+# {scope} restreint les sanctions prises en compte (mise à jour incrémentale).
+CUBE_CELLS_QUERY = f"""
+    SELECT
+        u.annee_punition,
+        f.libelle,
+        st.libelle,
+        sd.libelle,
+        u.categorie,
+        g.situation_matrimoniale,
+        COALESCE(sv.libelle, '{NON_SPECIFIE}'),
+        gr.libelle,
+        COUNT(*)
+    FROM (
+        SELECT s.faute_id, s.categorie, s.statut_id, s.annee_punition, s.date_faits,
+               MIN(s.gendarme_version_id) AS gendarme_version_id
+        FROM sanctions s
+        WHERE {{scope}}
+        GROUP BY COALESCE(s.numero_dossier, 'SANS_NUMERO_' || s.id), s.matricule, s.date_enr,
+                 s.date_faits, s.faute_id, s.categorie, s.statut_id, s.annee_punition, s.annee_faits
+    ) u
+    LEFT JOIN gendarmes_historique g ON g.id = u.gendarme_version_id
+    {reference_joins('u', 'g')}
+    GROUP BY u.annee_punition, u.faute_id, u.statut_id, sd.id, u.categorie,
+             g.situation_matrimoniale, sv.id, gr.id
+"""
+
+_CELL_CONDITION = " AND ".join(f"{dim} IS ?" for dim in CUBE_DIMENSIONS)
+
+
+def cube_cells(cursor, scope="1", params=()) -> Counter:
+    """Effectifs recalculés depuis les tables sources : {tuple des dimensions: nombre}"""
+    cursor.execute(CUBE_CELLS_QUERY.format(scope=scope), params)
+    return Counter({tuple(row[:-1]): row[-1] for row in cursor.fetchall()})
+
+
+def stored_cells(cursor) -> Counter:
+    """Effectifs enregistrés dans stats_cube"""
+    cursor.execute(f"SELECT {', '.join(CUBE_DIMENSIONS)}, SUM(nombre) FROM stats_cube "
+                   f"GROUP BY {', '.join(CUBE_DIMENSIONS)}")
+    return Counter({tuple(row[:-1]): row[-1] for row in cursor.fetchall() if row[-1]})
+
+
+def cube_is_fresh(cursor) -> bool:
+    cursor.execute("SELECT cle, valeur FROM stats_meta WHERE cle IN ('source_version', 'cube_version')")
+    versions = dict(cursor.fetchall())
+    return 'source_version' in versions and versions.get('cube_version') == versions['source_version']
+
+
+def mark_cube_fresh(cursor):
+    """Le cube reflète l'état courant des tables sources"""
+    cursor.execute("""UPDATE stats_meta
+        SET valeur = (SELECT valeur FROM stats_meta WHERE cle = 'source_version')
+        WHERE cle = 'cube_version'""")
+
+
+def apply_cube_deltas(cursor, deltas):
+    """Ajoute les écarts {cellule: +n/-n} aux cellules du cube (sans commit)"""
+    for cell, delta in deltas.items():
+        if not delta:
+            continue
+        cursor.execute(f"UPDATE stats_cube SET nombre = nombre + ? WHERE {_CELL_CONDITION}",
+                       (delta, *cell))
+        if cursor.rowcount == 0:
+            cursor.execute(f"INSERT INTO stats_cube ({', '.join(CUBE_DIMENSIONS)}, nombre) "
+                           f"VALUES ({', '.join('?' * len(CUBE_DIMENSIONS))}, ?)", (*cell, delta))
+        elif delta < 0:
+            cursor.execute(f"DELETE FROM stats_cube WHERE nombre <= 0 AND {_CELL_CONDITION}", cell)
+
+
+class CubeDeltaTracker:
+    """
+    Maintient stats_cube à jour pendant une écriture sur sanctions / gendarmes.
+
+    À l'entrée, les cellules des matricules concernés sont calculées (anciens
+    tuples de dimensions) ; à la sortie, elles sont recalculées (nouveaux tuples)
+    et la différence (+1/-1 par sanction) est appliquée au cube sur la même
+    connexion, donc dans la même transaction que l'écriture.
+
+    Les dimensions gendarme (version de fiche valide à la date des faits) et les
+    doublons dépendent du matricule : recalculer les sanctions du matricule suffit.
+
+    Usage :
+        with db_manager.get_connection() as conn:
+            with CubeDeltaTracker(conn, [matricule]):
+                cursor.execute("UPDATE sanctions ...")
+            conn.commit()
+
+    Si le cube n'était pas à jour avant l'écriture, rien n'est fait : il sera
+    reconstruit entièrement à la prochaine consultation.
+    """
+
+    def __init__(self, conn, matricules):
+        self.conn = conn
+        self.matricules = set(matricules)
+        self._before = None
+
+    def _scope(self):
+        values = [m for m in self.matricules if m is not None]
+        conditions = []
+        if values:
+            conditions.append(f"s.matricule IN ({', '.join('?' * len(values))})")
+        if None in self.matricules:
+            conditions.append("s.matricule IS NULL")
+        return " OR ".join(conditions) or "0", values
+
+    def _cells(self):
+        scope, params = self._scope()
+        return cube_cells(self.conn.cursor(), scope, params)
+
+    def __enter__(self):
+        try:
+            if cube_is_fresh(self.conn.cursor()):
+                self._before = self._cells()
+        except Exception as e:
+            # Base sans cube (migration non appliquée) : l'écriture ne doit pas échouer
+            print(f"Suivi du cube statistique désactivé : {str(e)}")
+            self._before = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None or self._before is None:
+            return False
+
+        after = self._cells()
+        deltas = Counter(after)
+        deltas.subtract(self._before)
+
+        cursor = self.conn.cursor()
+        apply_cube_deltas(cursor, deltas)
+        mark_cube_fresh(cursor)
+        print(f"Cube statistique : {sum(1 for d in deltas.values() if d)} cellule(s) ajustée(s)")
+        return False
+
+
+class CubeConsistencyChecker:
+    """Compare stats_cube à un recalcul complet ; en cas d'écart, le cube est marqué périmé"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def check(self):
+        """
+        Returns:
+            dict {cellule: (enregistré, recalculé)} des écarts trouvés,
+            vide si le cube est exact ou pas encore construit
+        """
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            if not cube_is_fresh(cursor):
+                return {}
+
+            expected = cube_cells(cursor)
+            stored = stored_cells(cursor)
+            differences = {cell: (stored.get(cell, 0), expected.get(cell, 0))
+                           for cell in set(expected) | set(stored)
+                           if stored.get(cell, 0) != expected.get(cell, 0)}
+
+            if differences:
+                print(f"Cube statistique incohérent ({len(differences)} cellule(s)), reconstruction")
+                # Le cube sera reconstruit à la prochaine consultation
+                cursor.execute("UPDATE stats_meta SET valeur = -1 WHERE cle = 'cube_version'")
+                conn.commit()
+            return differences
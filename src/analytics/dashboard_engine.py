@@ -0,0 +1,109 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from src.database.reference_data import canonical_label_join
+
+from .dimensions import GENDARME_JOIN, service_tranche_joins
+
+
+MOIS = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin', 'Juillet',
+        'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
+
+FAUTE_ABSENCE = 'ABSENCE IRREGULIERE PROLONGEE'
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Valeurs des cartes du tableau de bord pour une année"""
+    year: int
+    total: int
+    top_grade: Optional[str]
+    top_service_range: Optional[str]
+    top_subdiv: Optional[str]
+    absences: int
+    monthly: Tuple[Tuple[str, int], ...]  # (nom du mois, nombre de dossiers), mois présents uniquement
+
+
+class DashboardEngine:
+    """
+    Calcule toutes les cartes du tableau de bord en une seule lecture des dossiers de l'année.
+
+    La table d'en-tête dossiers contient une ligne par numero_dossier : chaque ligne
+    lue compte pour un dossier, sans dédoublonnage. Le résultat est mis en cache par
+    (année, version des données).
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._cache_key = None
+        self._snapshot = None
+
+    def get_snapshot(self, year: int) -> DashboardSnapshot:
+        """Retourne le snapshot de l'année, recalculé seulement après une écriture"""
+        version = self.db_manager.get_source_version()
+        key = (year, version)
+        if self._snapshot is not None and version is not None and self._cache_key == key:
+            return self._snapshot
+
+        with self.db_manager.get_connection() as conn:
+            snapshot = self.compute(conn, year)
+        self._cache_key = key
+        self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def compute(conn, year: int) -> DashboardSnapshot:
+        """Agrège les dossiers de l'année en un seul passage"""
+        cursor = conn.cursor()
+        # Libellés de référence et tranche à la date des faits par jointures (pas de sous-requête par ligne)
+        cursor.execute(f"""
+            SELECT COALESCE(f.libelle, s.faute_commise), strftime('%m', s.date_enr),
+                   g.mle, COALESCE(gr.libelle, g.grade), COALESCE(sd.libelle, g.subdiv), sv.code
+            FROM dossiers s
+            {GENDARME_JOIN}
+            {canonical_label_join('faute', 'f', 's.faute_commise')}
+            {canonical_label_join('grade', 'gr', 'g.grade')}
+            {canonical_label_join('subdiv', 'sd', 'g.subdiv')}
+            {service_tranche_joins('s', 'g')}
+            WHERE s.annee_enr = ?
+        """, (str(year),))
+
+        total = 0
+        absences = 0
+        by_grade = Counter()
+        by_service = Counter()
+        by_subdiv = Counter()
+        by_month = Counter()
+
+        for faute, mois, mle, grade, subdiv, tranche in cursor:
+            total += 1
+            if faute == FAUTE_ABSENCE:
+                absences += 1
+            if mois:
+                by_month[mois] += 1
+            if mle is None:
+                # Dossier sans gendarme correspondant : hors des cartes jointes
+                continue
+            if grade:
+                by_grade[grade] += 1
+            if subdiv:
+                by_subdiv[subdiv] += 1
+            if tranche:
+                by_service[f"{tranche}ans"] += 1
+
+        def top(groups):
+            if not groups:
+                return None
+            # Égalité départagée par ordre alphabétique pour un résultat stable
+            return min(groups, key=lambda k: (-groups[k], k))
+
+        return DashboardSnapshot(
+            year=year,
+            total=total,
+            top_grade=top(by_grade),
+            top_service_range=top(by_service),
+            top_subdiv=top(by_subdiv),
+            absences=absences,
+            monthly=tuple((MOIS[int(m) - 1], by_month[m]) for m in sorted(by_month)),
+        )
@@ -0,0 +1,85 @@
+from src.data.gendarmerie.structure import SERVICE_RANGES
+from src.database.migrations import (date_day_sql, derived_tranche_joins, gendarme_version_sql, tranche_label,
+                                     years_between_sql)
+from src.database.reference_data import canonical_id_sql, canonical_label_join
+
+
+# Libellés des tranches d'années de service dans les tableaux croisés
+SERVICE_LABELS = [tranche_label(tranche) for tranche in SERVICE_RANGES]
+NON_SPECIFIE = "Non spécifié"
+
+
+def _years_at_facts(source_day, sanction='s'):
+    """Années révolues à la date des faits depuis la date source de la fiche gendarme gd"""
+    return years_between_sql(f'gd.{source_day}', date_day_sql(f'{sanction}.date_faits'))
+
+
+def service_tranche_joins(sanction='s', version='g'):
+    """
+    Tranche des années de service à la date des faits : gd (fiche gendarme actuelle,
+    date d'entrée), sv_d (durée calculée en sv_d.duree) et sv (tranches). Sans date
+    d'entrée, la tranche enregistrée sur la version de fiche sert.
+    """
+    return f"""
+    LEFT JOIN gendarmes gd ON gd.mle = {version}.mle""" + derived_tranche_joins(
+        'sv', 'service', _years_at_facts('date_entree_gie_jour', sanction), f'{version}.annee_service_tranche_id')
+
+
+# Jointure sur la version de la fiche gendarme valide à la date des faits
+# (gendarmes_historique) : une ligne par dossier, COUNT(*) reste exact
+GENDARME_JOIN = f"LEFT JOIN gendarmes_historique g ON g.id = {gendarme_version_sql('s.matricule', 's.date_faits')}"
+
+
+def reference_joins(sanction='s', version='g'):
+    """
+    Jointures des valeurs de référence (tables ref_*) : f (faute) et st (statut)
+    par les clés de la sanction, sd (subdivision) et gr (grade) par les libellés
+    de la version de fiche gendarme, et la tranche d'années de service (service_tranche_joins).
+    """
+    return f"""
+    LEFT JOIN ref_faute f ON f.id = {sanction}.faute_id
+    LEFT JOIN ref_statut st ON st.id = {sanction}.statut_id
+    LEFT JOIN ref_subdiv sd ON sd.id = {canonical_id_sql('subdiv', f'{version}.subdiv')}
+    LEFT JOIN ref_grade gr ON gr.id = {canonical_id_sql('grade', f'{version}.grade')}""" + service_tranche_joins(sanction, version)
+
+
+def label_joins(dossier='s', version='g'):
+    """
+    Jointures des libellés de référence d'un dossier (libellés textuels de la table dossiers)
+    et de sa version de fiche : f (faute), st (statut), sd (subdivision), gr (grade), rg (région),
+    libellé COALESCE(<alias>.libelle, valeur) ; tranches à la date des faits sv (années de
+    service) et ag (âge). Une recherche par index par ligne, sans sous-requête corrélée.
+    """
+    return (canonical_label_join('faute', 'f', f'{dossier}.faute_commise')
+            + canonical_label_join('statut', 'st', f'{dossier}.statut')
+            + canonical_label_join('subdiv', 'sd', f'{version}.subdiv')
+            + canonical_label_join('grade', 'gr', f'{version}.grade')
+            + canonical_label_join('region', 'rg', f'{version}.regions')
+            + service_tranche_joins(dossier, version)
+            + derived_tranche_joins('ag', 'age', _years_at_facts('date_naissance_jour', dossier),
+                                    'gd.age_tranche_id'))
+
+
+# Libellés de référence des dimensions textuelles (colonnes des jointures de label_joins)
+FAUTE_LABEL = "COALESCE(f.libelle, s.faute_commise)"
+STATUT_LABEL = "COALESCE(st.libelle, s.statut)"
+SUBDIV_LABEL = "COALESCE(sd.libelle, g.subdiv)"
+GRADE_LABEL = "COALESCE(gr.libelle, g.grade)"
+REGION_LABEL = "COALESCE(rg.libelle, g.regions)"
+# Code de tranche ('6-10') des années de service et de l'âge à la date des faits
+SERVICE_RANGE_CODE = "sv.code"
+AGE_RANGE_CODE = "ag.code"
+
+# Dimensions de comparaison pluriannuelle (libellés de ANALYSIS_THEMES -> expression SQL sur label_joins)
+TREND_DIMENSIONS = {
+    "Total": "'TOTAL'",
+    "Fautes commises": FAUTE_LABEL,
+    "Statut": STATUT_LABEL,
+    "Subdivision": SUBDIV_LABEL,
+    "Catégorie de Fautes": "s.categorie",
+    "Situation matrimoniale": "g.situation_matrimoniale",
+    "Tranches années service": SERVICE_RANGE_CODE,
+    "Tranches d'âge": AGE_RANGE_CODE,
+    "Grades": GRADE_LABEL,
+    "Régions": REGION_LABEL,
+}
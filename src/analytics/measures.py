@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Mesures disponibles par cellule de tableau croisé (clé -> libellé)
+MEASURES = {
+    'nombre': "Nombre de sanctions",
+    'jar_somme': "Jours d'arrêt (total)",
+    'jar_moyenne': "Jours d'arrêt (moyenne)",
+    'jar_mediane': "Jours d'arrêt (médiane)",
+    'jar_p90': "Jours d'arrêt (90e centile)",
+    'sanctions_par_dossier': "Sanctions par dossier",
+}
+DEFAULT_MEASURE = 'nombre'
+
+_ALL = '_tout'
+
+
+def group_measures(df: pd.DataFrame, keys) -> pd.DataFrame:
+    """
+    Toutes les mesures par groupe en un seul regroupement.
+
+    Args:
+        df: Snapshot analytique (colonnes taux_jar_jours et dossier_key)
+        keys: Colonnes de regroupement ([] = ensemble des lignes)
+
+    Returns:
+        DataFrame indexé par groupe, une colonne par mesure de MEASURES
+    """
+    keys = list(keys)
+    if not keys:
+        df = df.assign(**{_ALL: 'TOTAL'})
+        keys = [_ALL]
+
+    grouped = df.groupby(keys, observed=True, sort=True)
+    jar = grouped['taux_jar_jours']
+    size = grouped.size()
+
+    result = pd.DataFrame({
+        'nombre': size,
+        'jar_somme': jar.sum(min_count=1),
+        'jar_moyenne': jar.mean(),
+        'sanctions_par_dossier': size / grouped['dossier_key'].nunique(),
+    })
+
+    # Quantiles calculés pour tous les groupes en un appel (le dernier niveau est le quantile)
+    quantiles = jar.quantile([0.5, 0.9]).unstack(level=-1)
+    result['jar_mediane'] = quantiles[0.5]
+    result['jar_p90'] = quantiles[0.9]
+    return result[list(MEASURES)]
+
+
+def _labels(index: pd.Index) -> list:
+    return list(index.astype(object))
+
+
+def measure_pivot(df: pd.DataFrame, x_column, y_column, measure, margins_name='TOTAL') -> pd.DataFrame:
+    """
+    Tableau croisé d'une mesure (lignes y, colonnes x) avec marges.
+
+    Les marges sont calculées sur les lignes sous-jacentes (médiane ou moyenne du
+    total), pas en additionnant les cellules.
+    """
+    df = df[df[x_column].notna() & df[y_column].notna()]
+    for column in {x_column, y_column}:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df = df.assign(**{column: df[column].cat.remove_unused_categories()})
+    cells = group_measures(df, [y_column, x_column])[measure].unstack(x_column)
+    row_margin = group_measures(df, [y_column])[measure]
+    column_margin = group_measures(df, [x_column])[measure]
+    overall = group_measures(df, [])[measure].iloc[0] if len(df) else np.nan
+
+    y_labels, x_labels = _labels(cells.index), _labels(cells.columns)
+    table = np.full((len(y_labels) + 1, len(x_labels) + 1), np.nan)
+    table[:-1, :-1] = cells.to_numpy(dtype=np.float64, na_value=np.nan)
+    table[:-1, -1] = row_margin.reindex(cells.index).to_numpy(dtype=np.float64, na_value=np.nan)
+    table[-1, :-1] = column_margin.reindex(cells.columns).to_numpy(dtype=np.float64, na_value=np.nan)
+    table[-1, -1] = overall
+
+    return pd.DataFrame(table,
+                        index=pd.Index(y_labels + [margins_name], name=y_column),
+                        columns=pd.Index(x_labels + [margins_name], name=x_column))
+
+
+def measure_long(pivot: pd.DataFrame, margins_name='TOTAL') -> pd.DataFrame:
+    """Cellules renseignées (x_value, y_value, count) pour les graphiques"""
+    values = pivot.drop(index=margins_name, columns=margins_name)
+    long = values.T.stack().reset_index()
+    long.columns = ['x_value', 'y_value', 'count']
+    return long[long['count'].notna()].reset_index(drop=True)
@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pandas as pd
+
+from .crosstab_engine import Crosstab, crosstab
+from .cube_engine import CubeEngine
+from .dimensions import SERVICE_LABELS, NON_SPECIFIE
+from .snapshot_service import AnalyticalSnapshotService, filter_subject
+
+TOTAL = 'TOTAL'
+SUBTOTAL = 'Sous-total'
+
+
+@dataclass(frozen=True)
+class PivotSpec:
+    """Dimensions en lignes et en colonnes (champs de ANALYSIS_THEMES) et filtres {champ: valeur}"""
+    rows: tuple
+    columns: tuple = ()
+    filters: dict = field(default_factory=dict)
+
+    @property
+    def fields(self):
+        return list(dict.fromkeys(self.rows + self.columns))
+
+
+@dataclass(frozen=True)
+class PivotResult:
+    """
+    Tableau hiérarchique : index et colonnes multi-niveaux, une ligne (colonne)
+    'Sous-total' après chaque groupe de niveau supérieur et un TOTAL général.
+    """
+    spec: PivotSpec
+    cells: pd.DataFrame
+    table: pd.DataFrame
+
+    def crosstab(self) -> Crosstab:
+        """Croisement des deux premiers niveaux (ligne × colonne) pour les graphiques"""
+        y_field = self.spec.rows[0]
+        x_field = self.spec.columns[0] if self.spec.columns else self.spec.rows[-1]
+        return crosstab(self.cells[x_field], self.cells[y_field], weights=self.cells['count'])
+
+
+def _ordered(values: pd.Series, field_name) -> pd.Categorical:
+    """Catégorie ordonnée des valeurs présentes (tranches de service dans leur ordre naturel)"""
+    observed = pd.unique(values.dropna())
+    if field_name == 'annee_service':
+        categories = [label for label in SERVICE_LABELS + [NON_SPECIFIE] if label in set(observed)]
+    else:
+        try:
+            categories = sorted(observed)
+        except TypeError:
+            categories = sorted(observed, key=str)
+    return pd.Categorical(values, categories=categories, ordered=True)
+
+
+def _flat_index(index: pd.Index) -> pd.Index:
+    """Index sans catégories (les libellés de sous-total peuvent y être ajoutés)"""
+    if index.nlevels == 1:
+        return pd.Index(list(index), name=index.name, dtype=object)
+    return pd.MultiIndex.from_tuples(list(index), names=index.names)
+
+
+def _total_key(nlevels, label=TOTAL):
+    return label if nlevels == 1 else (label,) + ('',) * (nlevels - 1)
+
+
+def _add_subtotals(table: pd.DataFrame) -> pd.DataFrame:
+    """Insère une ligne 'Sous-total' après chaque groupe, à chaque niveau sauf le dernier"""
+    nlevels = table.index.nlevels
+    if nlevels == 1 or table.empty:
+        return table
+
+    parts = []
+    for key, group in table.groupby(level=0, sort=False):
+        inner = _add_subtotals(group.droplevel(0))
+        inner.index = pd.MultiIndex.from_tuples(
+            [(key,) + (k if isinstance(k, tuple) else (k,)) for k in inner.index])
+        subtotal = group.sum(axis=0).to_frame().T
+        subtotal.index = pd.MultiIndex.from_tuples([(key, SUBTOTAL) + ('',) * (nlevels - 2)])
+        parts.extend([inner, subtotal])
+
+    result = pd.concat(parts)
+    result.index.names = table.index.names
+    return result
+
+
+def build_table(cells: pd.DataFrame, rows, columns) -> pd.DataFrame:
+    """Tableau hiérarchique avec sous-totaux à partir des effectifs par combinaison de dimensions"""
+    rows, columns = list(rows), list(columns)
+    counts = cells.groupby(rows + columns, observed=True, sort=True)['count'].sum()
+
+    if columns:
+        # Les niveaux catégoriels donnent l'ordre des colonnes (unstack suit l'ordre d'apparition)
+        table = counts.unstack(columns, fill_value=0).sort_index(axis=1)
+    else:
+        table = counts.to_frame(TOTAL)
+    # Combinaisons absentes des données (produit des niveaux dépilés)
+    table = table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+    table.index = _flat_index(table.index)
+    table.columns = _flat_index(table.columns)
+
+    if columns:
+        leaves = table
+        table = _add_subtotals(table.T).T
+        table[_total_key(table.columns.nlevels)] = leaves.sum(axis=1)
+
+    grand_total = table.sum(axis=0).to_frame().T
+    grand_total.index = (pd.MultiIndex.from_tuples([_total_key(len(rows))]) if len(rows) > 1
+                         else pd.Index([TOTAL]))
+    table = pd.concat([_add_subtotals(table), grand_total])
+    table.index.names = rows
+    return table.astype('int64')
+
+
+def is_total_label(label, include_subtotals=True) -> bool:
+    """Ligne ou colonne de total (et de sous-total si include_subtotals)"""
+    parts = label if isinstance(label, tuple) else (label,)
+    return TOTAL in parts or (include_subtotals and SUBTOTAL in parts)
+
+
+def header_label(label) -> str:
+    """Libellé d'en-tête d'un niveau hiérarchique : '2024 / S1 / Sous-total'"""
+    parts = label if isinstance(label, tuple) else (label,)
+    return " / ".join(str(part) for part in parts if part != '')
+
+
+class PivotEngine:
+    """
+    Tableaux croisés à N dimensions (lignes et colonnes multi-niveaux) avec sous-totaux.
+
+    Les effectifs par combinaison de dimensions sont obtenus en un seul regroupement :
+    dans le cube statistique si toutes les dimensions y figurent, sinon dans le
+    snapshot analytique. Les sous-totaux et totaux sont dérivés de ces effectifs.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.cube_engine = CubeEngine(db_manager)
+
+    def compute(self, spec: PivotSpec) -> Optional[PivotResult]:
+        """Tableau hiérarchique de spec, None s'il n'y a aucune donnée"""
+        fields = spec.fields
+        cells = self.cube_engine.aggregate(fields, spec.filters)
+        if cells is None:
+            cells = self._snapshot_cells(fields, spec.filters)
+        if cells.empty:
+            return None
+
+        for name in fields:
+            cells[name] = _ordered(cells[name], name)
+        table = build_table(cells, spec.rows, spec.columns)
+        return PivotResult(spec=spec, cells=cells, table=table)
+
+    def _snapshot_cells(self, fields, filters) -> pd.DataFrame:
+        df = AnalyticalSnapshotService.for_db(self.db_manager).get_frame()
+        df = df[~df['est_doublon']]
+        for name, value in filters.items():
+            df = filter_subject(df, name, value)
+
+        # Les années de service sont présentées par tranches
+        columns = ['service_range' if name == 'annee_service' else name for name in fields]
+        cells = df.groupby(columns, observed=True).size().reset_index(name='count')
+        cells.columns = fields + ['count']
+        for name in fields:
+            cells[name] = cells[name].astype(object)
+        return cells
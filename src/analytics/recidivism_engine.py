@@ -0,0 +1,134 @@
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class DisciplinaryProfile:
+    """Résumé disciplinaire d'un gendarme (table gendarmes_resume)"""
+    matricule: int
+    nb_sanctions: int
+    nb_dossiers: int
+    premiere_date_faits: Optional[str]
+    derniere_date_faits: Optional[str]
+    pire_statut: Optional[str]
+    jours_jar: float
+    categories: Dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class RepeatOffender:
+    """Gendarme ayant cumulé au moins n sanctions dans une fenêtre de temps"""
+    matricule: int
+    nom_prenoms: Optional[str]
+    grade: Optional[str]
+    nb_sanctions: int
+    debut: str
+    fin: str
+    pire_statut: Optional[str]
+
+
+# Gendarme d'un résumé : recherche par l'index idx_gendarmes_mle_num
+_GENDARME_JOIN = "LEFT JOIN gendarmes g ON CAST(g.mle AS INTEGER) = r.matricule"
+
+
+class RecidivismEngine:
+    """
+    Profils disciplinaires et récidives à partir du résumé par gendarme.
+
+    gendarmes_resume (une ligne par matricule) est tenu à jour par triggers à
+    chaque écriture sur sanctions : un profil est une lecture par clé primaire,
+    le classement des plus sanctionnés un parcours de l'index nb_sanctions.
+    Les récidives ne parcourent que les sanctions des gendarmes ayant assez de
+    sanctions, dans l'ordre de l'index (matricule, date_faits).
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._cache_key = None
+        self._cache = None
+
+    def profile(self, matricule) -> Optional[DisciplinaryProfile]:
+        """Résumé disciplinaire d'un matricule, None s'il n'a aucune sanction"""
+        try:
+            matricule = int(matricule)
+        except (TypeError, ValueError):
+            return None
+
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT matricule, nb_sanctions, nb_dossiers, premiere_date_faits, derniere_date_faits,
+                       pire_statut, jours_jar
+                FROM gendarmes_resume WHERE matricule = ?
+            """, (matricule,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute("""
+                SELECT categorie, nombre FROM gendarmes_resume_categories
+                WHERE matricule = ? ORDER BY categorie
+            """, (matricule,))
+            return DisciplinaryProfile(*row, categories=dict(cursor.fetchall()))
+
+    def top_offenders(self, limit: int = 20) -> List[RepeatOffender]:
+        """Gendarmes les plus sanctionnés, toutes périodes confondues"""
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT r.matricule, g.nom_prenoms, g.grade, r.nb_sanctions,
+                       r.premiere_date_faits, r.derniere_date_faits, r.pire_statut
+                FROM gendarmes_resume r
+                {_GENDARME_JOIN}
+                ORDER BY r.nb_sanctions DESC, r.derniere_date_faits DESC
+                LIMIT ?
+            """, (int(limit),))
+            return [RepeatOffender(*row) for row in cursor.fetchall()]
+
+    def repeat_offenders(self, min_sanctions: int = 3, months: int = 24) -> List[RepeatOffender]:
+        """
+        Gendarmes ayant au moins min_sanctions sanctions (dates des faits) en moins
+        de months mois ; pour chacun, la série la plus récente.
+
+        Résultat mis en cache tant que la base ne change pas.
+        """
+        min_sanctions, months = max(int(min_sanctions), 2), max(int(months), 1)
+        version = self.db_manager.get_source_version()
+        key = (min_sanctions, months, version)
+        if self._cache is not None and version is not None and self._cache_key == key:
+            return self._cache
+
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # fin : une sanction ; debut : la (n-1)-ième précédente du même gendarme
+                cursor.execute(f"""
+                    WITH series AS (
+                        SELECT matricule, date_faits AS fin,
+                               LAG(date_faits, {min_sanctions - 1})
+                                   OVER (PARTITION BY matricule ORDER BY date_faits, id) AS debut
+                        FROM sanctions
+                        WHERE matricule IN (SELECT matricule FROM gendarmes_resume WHERE nb_sanctions >= ?)
+                    ),
+                    recidives AS (
+                        SELECT matricule, debut, fin,
+                               ROW_NUMBER() OVER (PARTITION BY matricule ORDER BY fin DESC, debut DESC) AS rang
+                        FROM series
+                        WHERE debut IS NOT NULL AND debut >= date(fin, '-{months} months')
+                    )
+                    SELECT r.matricule, g.nom_prenoms, g.grade, rs.nb_sanctions, r.debut, r.fin, rs.pire_statut
+                    FROM recidives r
+                    JOIN gendarmes_resume rs ON rs.matricule = r.matricule
+                    {_GENDARME_JOIN}
+                    WHERE r.rang = 1
+                    ORDER BY rs.nb_sanctions DESC, r.fin DESC
+                """, (min_sanctions,))
+            except sqlite3.OperationalError as e:
+                # Schéma non migré (gendarmes_resume absente) : pas de rapport
+                print(f"Récidives indisponibles : {str(e)}")
+                return []
+            offenders = [RepeatOffender(*row) for row in cursor.fetchall()]
+
+        self._cache_key = key
+        self._cache = offenders
+        return offenders
@@ -0,0 +1,232 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.database.columnar_fetch import FLOAT, INT
+from src.database.migrations import tranche_label
+from src.database.models import StatisticsRepository
+
+from .columnar_cache import ColumnarCache
+from .dimensions import SERVICE_LABELS, NON_SPECIFIE, reference_joins
+
+CATEGORICAL_COLUMNS = ['faute_commise', 'statut', 'grade', 'subdiv', 'situation_matrimoniale']
+INTEGER_COLUMNS = ['id', 'matricule', 'annee_punition', 'annee_faits', 'annee_service', 'comite']
+
+# Types d'extraction en colonnes (les autres colonnes sont encodées par dictionnaire)
+SNAPSHOT_KINDS = {**{column: INT for column in INTEGER_COLUMNS}, 'taux_jar_jours': FLOAT}
+
+# Colonnes utilisées pour repérer les lignes de sanction en double (même dossier, mêmes faits)
+DUPLICATE_KEY = ['dossier_key', 'matricule', 'date_enr', 'date_faits', 'faute_commise',
+                 'categorie', 'statut', 'annee_punition', 'annee_faits']
+
+# Fautes, statuts, grades et subdivisions : libellés de référence (tables ref_*) ;
+# années de service à la date des faits et libellé de leur tranche (table tranches)
+SNAPSHOT_QUERY = f"""
+    SELECT
+        s.id,
+        s.numero_dossier,
+        COALESCE(s.numero_dossier, 'SANS_NUMERO_' || s.id) AS dossier_key,
+        s.matricule,
+        s.date_enr,
+        s.date_faits,
+        f.libelle AS faute_commise,
+        s.categorie,
+        st.libelle AS statut,
+        s.annee_punition,
+        s.annee_faits,
+        s.comite,
+        s.taux_jar_jours,
+        h.mle,
+        g.nom_prenoms,
+        gr.libelle AS grade,
+        sd.libelle AS subdiv,
+        COALESCE(sv_d.duree, h.annee_service) AS annee_service,
+        sv.libelle AS service_range,
+        h.situation_matrimoniale
+    FROM sanctions s
+    LEFT JOIN gendarmes_historique h ON h.id = s.gendarme_version_id
+    LEFT JOIN gendarmes g ON g.mle = h.mle
+    {reference_joins('s', 'h')}
+"""
+
+
+def service_range(labels: pd.Series) -> pd.Series:
+    """Tranches d'années de service (catégorie ordonnée) à partir des libellés extraits, 'Non spécifié' hors tranches"""
+    ranges = pd.Categorical(labels.fillna(NON_SPECIFIE), categories=SERVICE_LABELS + [NON_SPECIFIE], ordered=True)
+    return pd.Series(ranges, index=labels.index)
+
+
+def _categorical(column) -> pd.Categorical:
+    """Catégorie (catégories triées, comme astype('category')) à partir des codes extraits"""
+    dictionary = column.dictionary
+    try:
+        order = sorted(range(len(dictionary)), key=dictionary.__getitem__)
+    except TypeError:
+        order = sorted(range(len(dictionary)), key=lambda i: str(dictionary[i]))
+    # Le code -1 (valeur nulle) pointe sur le -1 ajouté en fin de tableau
+    remap = np.full(len(order) + 1, -1, dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    return pd.Categorical.from_codes(remap[column.values], categories=[dictionary[i] for i in order])
+
+
+def columns_to_frame(columns, categorical=()) -> pd.DataFrame:
+    """
+    DataFrame à partir des colonnes extraites (StatisticsRepository.fetch_columns) :
+    Int64 pour INT, float64 pour FLOAT, catégorie pour les colonnes de categorical,
+    objet pour les autres colonnes CODE (valeurs distinctes partagées, sans copie).
+    """
+    data = {}
+    for name, column in columns.items():
+        if column.kind == INT:
+            data[name] = pd.arrays.IntegerArray(column.values, column.mask)
+        elif column.kind == FLOAT:
+            data[name] = np.where(column.mask, np.nan, column.values)
+        elif name in categorical:
+            data[name] = _categorical(column)
+        else:
+            uniques = np.array(column.dictionary + [None], dtype=object)
+            data[name] = uniques[column.values]
+    return pd.DataFrame(data, columns=list(columns))
+
+
+def _to_nullable_int(series: pd.Series) -> pd.Series:
+    """Entier nullable si toutes les valeurs s'y prêtent, catégorie sinon"""
+    numeric = pd.to_numeric(series, errors='coerce')
+    if numeric.notna().sum() != series.notna().sum() or (numeric.dropna() % 1 != 0).any():
+        return series.astype('category')
+    return numeric.astype('Int64')
+
+
+def filter_equals(df: pd.DataFrame, field: str, value) -> pd.DataFrame:
+    """Filtre df[field] == value en convertissant la valeur saisie au type de la colonne"""
+    column = df[field]
+    if pd.api.types.is_integer_dtype(column.dtype):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return df.iloc[0:0]
+    elif isinstance(column.dtype, pd.CategoricalDtype) and value not in column.cat.categories:
+        value = str(value)
+        if value not in column.cat.categories:
+            return df.iloc[0:0]
+    return df[column == value]
+
+
+def filter_subject(df: pd.DataFrame, field: str, value) -> pd.DataFrame:
+    """Filtre d'un sujet d'analyse ; pour annee_service la valeur est une tranche ('0-5')"""
+    if field == "annee_service":
+        return df[df['service_range'] == tranche_label(value)]
+    if field in df.columns:
+        return filter_equals(df, field, value)
+    return df
+
+
+class AnalyticalSnapshotService:
+    """
+    Snapshot analytique partagé : la jointure sanctions × gendarmes construite une
+    seule fois par version des données, avec des types compacts. Les attributs
+    gendarme (grade, subdivision...) sont ceux de la version de fiche valide à la
+    date des faits.
+
+    - grade, subdiv, faute_commise, statut, situation_matrimoniale : catégories
+    - annee_service, service_range : années de service à la date des faits et leur tranche
+      (table tranches, catégorie ordonnée)
+    - colonnes numériques : entiers nullables (Int64), taux_jar_jours en float64
+    - est_doublon : ligne identique à une précédente (même dossier, mêmes faits)
+
+    Une instance par base (for_db), partagée par toutes les fenêtres statistiques.
+    Le DataFrame retourné est partagé : les appelants doivent le copier avant de le modifier.
+
+    Le snapshot est aussi conservé sur disque (ColumnarCache) : au redémarrage il est
+    relu en mémoire mappée au lieu d'être extrait de SQLite ligne par ligne.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._lock = threading.Lock()
+        self._version = None
+        self._frame = None
+        self._cache = ColumnarCache(db_manager)
+        self._prime_thread = None
+
+    @classmethod
+    def for_db(cls, db_manager):
+        """Retourne le service partagé pour la base de db_manager"""
+        with cls._instances_lock:
+            service = cls._instances.get(db_manager.db_name)
+            if service is None:
+                service = cls(db_manager)
+                cls._instances[db_manager.db_name] = service
+            return service
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._frame = None
+
+    def get_frame(self) -> pd.DataFrame:
+        """Retourne le snapshot, reconstruit seulement si la base a changé"""
+        version = self.db_manager.get_source_version()
+        with self._lock:
+            if self._frame is not None and version is not None and self._version == version:
+                return self._frame
+
+            frame = self._cache.load(version)
+            if frame is None:
+                frame = self.build()
+                self._save_in_background(frame, version)
+            self._frame = frame
+            self._version = version
+            return frame
+
+    def prime(self):
+        """
+        Prépare le snapshot en arrière-plan (appelé au préchargement des statistiques) :
+        relecture du cache disque s'il est valide, reconstruction sinon.
+        """
+        if self._prime_thread is not None and self._prime_thread.is_alive():
+            return
+        self._prime_thread = threading.Thread(target=self._prime, name="snapshot-prime", daemon=True)
+        self._prime_thread.start()
+
+    def _prime(self):
+        try:
+            self.get_frame()
+        except Exception as e:
+            print(f"Préchargement du snapshot impossible : {str(e)}")
+
+    def _save_in_background(self, frame, version):
+        """Écrit le cache disque sans bloquer l'affichage"""
+        def save():
+            try:
+                self._cache.save(frame, version)
+            except Exception as e:
+                print(f"Écriture du cache en colonnes impossible : {str(e)}")
+
+        threading.Thread(target=save, name="snapshot-cache", daemon=True).start()
+
+    def build(self) -> pd.DataFrame:
+        # Extraction en colonnes numpy : ni liste de lignes, ni colonnes objet à reconvertir
+        columns = StatisticsRepository(self.db_manager).fetch_columns(SNAPSHOT_QUERY, kinds=SNAPSHOT_KINDS)
+        return self.prepare(columns_to_frame(columns, categorical=CATEGORICAL_COLUMNS))
+
+    @staticmethod
+    def prepare(df: pd.DataFrame) -> pd.DataFrame:
+        """Applique les types compacts et les colonnes dérivées"""
+        df['est_doublon'] = df.duplicated(subset=DUPLICATE_KEY)
+
+        for column in INTEGER_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+        df['categorie'] = _to_nullable_int(df['categorie'])
+        # Jours d'arrêt : flottants (NaN si non renseigné) pour les mesures numériques
+        df['taux_jar_jours'] = pd.to_numeric(df['taux_jar_jours'], errors='coerce').astype('float64')
+
+        for column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype('category')
+
+        df['service_range'] = service_range(df['service_range'])
+        return df
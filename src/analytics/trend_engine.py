@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .dimensions import GENDARME_JOIN, TREND_DIMENSIONS, label_joins
+
+
+NON_RENSEIGNE = "Non renseigné"
+
+
+@dataclass(frozen=True)
+class TrendPoint:
+    """Nombre de dossiers d'une valeur pour une année, avec l'évolution sur l'année précédente"""
+    annee: int
+    valeur: str
+    nombre: int
+    delta: Optional[int]          # None pour la première année de la plage
+    croissance: Optional[float]   # en %, None si l'année précédente vaut 0
+
+
+class TrendEngine:
+    """
+    Tendances pluriannuelles : nombre de dossiers par année et par valeur d'une
+    dimension, avec écart et taux de croissance d'une année sur l'autre.
+
+    Une seule requête sur la table d'en-tête dossiers (une ligne par dossier, donc
+    COUNT(*) sans dédoublonnage) : filtre sur l'index idx_dossiers_annee_enr, grille
+    dense années × valeurs (les années sans dossier valent 0) et LAG() pour les écarts.
+    Les libellés de référence et les tranches viennent des jointures de label_joins.
+    Seul le dernier résultat est gardé en cache, pour la version courante des données.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._cache_key = None
+        self._cache = None
+
+    def get_trends(self, start_year: int, end_year: int, dimension: str = "Total") -> List[TrendPoint]:
+        if dimension not in TREND_DIMENSIONS:
+            raise ValueError(f"Dimension inconnue : {dimension}")
+        start_year, end_year = sorted((int(start_year), int(end_year)))
+
+        version = self.db_manager.get_source_version()
+        key = (start_year, end_year, dimension, version)
+        if self._cache is not None and version is not None and self._cache_key == key:
+            return self._cache
+
+        with self.db_manager.get_connection() as conn:
+            points = self.compute(conn, start_year, end_year, dimension)
+        self._cache_key = key
+        self._cache = points
+        return points
+
+    @staticmethod
+    def compute(conn, start_year: int, end_year: int, dimension: str) -> List[TrendPoint]:
+        expression = TREND_DIMENSIONS[dimension]
+        query = f"""
+            WITH RECURSIVE annees(annee) AS (
+                SELECT ?
+                UNION ALL
+                SELECT annee + 1 FROM annees WHERE annee < ?
+            ),
+            comptes AS (
+                SELECT CAST(s.annee_enr AS INTEGER) AS annee,
+                       COALESCE(CAST({expression} AS TEXT), ?) AS valeur,
+                       COUNT(*) AS nombre
+                FROM dossiers s
+                {GENDARME_JOIN}
+                {label_joins('s', 'g')}
+                WHERE s.annee_enr BETWEEN ? AND ?
+                GROUP BY annee, valeur
+            ),
+            grille AS (
+                SELECT a.annee, v.valeur, COALESCE(c.nombre, 0) AS nombre
+                FROM annees a
+                CROSS JOIN (SELECT DISTINCT valeur FROM comptes) v
+                LEFT JOIN comptes c ON c.annee = a.annee AND c.valeur = v.valeur
+            )
+            SELECT annee, valeur, nombre,
+                   nombre - LAG(nombre) OVER w AS delta,
+                   CASE WHEN LAG(nombre) OVER w > 0
+                        THEN ROUND((nombre - LAG(nombre) OVER w) * 100.0 / LAG(nombre) OVER w, 2)
+                   END AS croissance
+            FROM grille
+            WINDOW w AS (PARTITION BY valeur ORDER BY annee)
+            ORDER BY valeur, annee
+        """
+        cursor = conn.cursor()
+        cursor.execute(query, (start_year, end_year, NON_RENSEIGNE,
+                               f"{start_year:04d}", f"{end_year:04d}"))
+        return [TrendPoint(*row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def by_value(points: List[TrendPoint]) -> Dict[str, List[TrendPoint]]:
+        """Regroupe les points par valeur, les valeurs les plus fréquentes en premier"""
+        series = {}
+        for point in points:
+            series.setdefault(point.valeur, []).append(point)
+        return dict(sorted(series.items(), key=lambda item: (-sum(p.nombre for p in item[1]), item[0])))
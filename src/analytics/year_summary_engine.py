@@ -0,0 +1,153 @@
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from .dimensions import (FAUTE_LABEL, GENDARME_JOIN, GRADE_LABEL, REGION_LABEL, SERVICE_RANGE_CODE, SUBDIV_LABEL,
+                         label_joins)
+
+
+# Dimensions conservées dans un résumé annuel
+DIMENSIONS = ('grade', 'subdiv', 'service', 'faute', 'mois', 'region')
+
+
+@dataclass
+class YearSummary:
+    """Total et répartitions (en dossiers) d'une année d'enregistrement"""
+    year: int
+    total: int = 0
+    distributions: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def distribution(self, dimension: str) -> Dict[str, int]:
+        return self.distributions.get(dimension, {})
+
+    def top(self, dimension: str, lowest: bool = False) -> Optional[Tuple[str, int]]:
+        """Retourne (valeur, nombre) la plus (ou la moins) représentée d'une dimension"""
+        counts = self.distribution(dimension)
+        if not counts:
+            return None
+        sign = 1 if lowest else -1
+        valeur = min(counts, key=lambda k: (sign * counts[k], k))
+        return valeur, counts[valeur]
+
+
+class YearSummaryEngine:
+    """
+    Calcule un résumé par année en une seule lecture des dossiers (table d'en-tête) de l'année.
+
+    Les années closes (antérieures à l'année courante) sont stockées dans la
+    table year_summaries : les ouvrir ensuite n'est qu'une lecture. Les triggers
+    posés par les migrations suppriment le résumé d'une année dès qu'une
+    sanction de cette année (ou un gendarme) est modifiée.
+    L'année en cours est recalculée, avec un cache mémoire par version des données.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._live_key = None
+        self._live_summary = None
+
+    def get_summary(self, year: int) -> YearSummary:
+        year = int(year)
+        if year >= datetime.now().year:
+            return self._get_live_summary(year)
+
+        with self.db_manager.get_connection() as conn:
+            try:
+                summary = self._load(conn, year)
+                if summary is None:
+                    summary = self.compute(conn, year)
+                    self._store(conn, summary)
+            except sqlite3.OperationalError as e:
+                # Schéma non migré (table year_summaries absente) : calcul direct
+                print(f"Résumé annuel non persisté : {str(e)}")
+                summary = self.compute(conn, year)
+            return summary
+
+    def _get_live_summary(self, year: int) -> YearSummary:
+        """Année en cours : pas de persistance, cache mémoire tant que la base ne change pas"""
+        version = self.db_manager.get_source_version()
+        key = (year, version)
+        if self._live_summary is not None and version is not None and self._live_key == key:
+            return self._live_summary
+
+        with self.db_manager.get_connection() as conn:
+            summary = self.compute(conn, year)
+        self._live_key = key
+        self._live_summary = summary
+        return summary
+
+    @staticmethod
+    def compute(conn, year: int) -> YearSummary:
+        """Agrège toutes les répartitions de l'année en un seul passage"""
+        cursor = conn.cursor()
+        # Libellés de référence et tranche à la date des faits par jointures (pas de sous-requête par ligne)
+        cursor.execute(f"""
+            SELECT {FAUTE_LABEL}, strftime('%m', s.date_enr),
+                   g.mle, {GRADE_LABEL}, {SUBDIV_LABEL}, {SERVICE_RANGE_CODE}, {REGION_LABEL}
+            FROM dossiers s
+            {GENDARME_JOIN}
+            {label_joins('s', 'g')}
+            WHERE s.annee_enr = ?
+        """, (str(year),))
+
+        total = 0
+        distributions = {dimension: Counter() for dimension in DIMENSIONS}
+
+        for faute, mois, mle, grade, subdiv, tranche, region in cursor:
+            total += 1
+            if faute is not None:
+                distributions['faute'][faute] += 1
+            if mois:
+                distributions['mois'][mois] += 1
+            if mle is None:
+                continue
+            if grade is not None:
+                distributions['grade'][grade] += 1
+            if subdiv is not None:
+                distributions['subdiv'][subdiv] += 1
+            if tranche:
+                distributions['service'][tranche] += 1
+            if region is not None:
+                distributions['region'][region] += 1
+
+        distributions = {dimension: dict(counts) for dimension, counts in distributions.items()}
+
+        # Les régions sans sanction cette année comptent (carte « région la moins exposée »)
+        cursor.execute("SELECT valeur FROM dimension_catalog WHERE dimension = 'regions'")
+        for (region,) in cursor.fetchall():
+            distributions['region'].setdefault(region, 0)
+
+        return YearSummary(year=year, total=total, distributions=distributions)
+
+    @staticmethod
+    def _load(conn, year: int) -> Optional[YearSummary]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT dimension, valeur, nombre FROM year_summaries WHERE annee = ?
+        """, (str(year),))
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+
+        summary = YearSummary(year=year, distributions={dimension: {} for dimension in DIMENSIONS})
+        for dimension, valeur, nombre in rows:
+            if dimension == 'total':
+                summary.total = nombre
+            else:
+                summary.distributions.setdefault(dimension, {})[valeur] = nombre
+        return summary
+
+    @staticmethod
+    def _store(conn, summary: YearSummary):
+        rows = [(str(summary.year), 'total', '', summary.total)]
+        for dimension, counts in summary.distributions.items():
+            rows.extend((str(summary.year), dimension, str(valeur), nombre)
+                        for valeur, nombre in counts.items())
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM year_summaries WHERE annee = ?", (str(summary.year),))
+        cursor.executemany("""
+            INSERT INTO year_summaries (annee, dimension, valeur, nombre) VALUES (?, ?, ?, ?)
+        """, rows)
+        conn.commit()
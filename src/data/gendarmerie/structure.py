@@ -30,6 +30,17 @@ SERVICE_RANGES = [
     "36-40"
 ]
 
+AGE_RANGES = [
+    "18-25",
+    "26-30",
+    "31-35",
+    "36-40",
+    "41-45",
+    "46-50",
+    "51-55",
+    "56-60"
+]
+
 FAUTES_COMMISES = [
     "ABSENCE IRREGULIERE PROLONGEE",
     "FAUTE CONTRE L'HONNEUR",
@@ -47,6 +58,13 @@ FAUTES_COMMISES = [
     "PERTE D'ARME"
 ]
 
+GRADES = ["ESO", "MDL", "MDC", "ADJ", "ADC", "ACM"]
+
+STATUTS_DOSSIER = ["EN COURS", "PUNI", "RADIE", "AVERTI"]
+
+# Gravité des statuts : le plus grave est retenu dans le résumé disciplinaire d'un gendarme
+GRAVITE_STATUTS = {"EN COURS": 0, "AVERTI": 1, "PUNI": 2, "RADIE": 3}
+
 # Thèmes d'analyse statistique
 ANALYSIS_THEMES = {
     "Année": {
@@ -0,0 +1,78 @@
+import sqlite3
+import threading
+from typing import Dict, List
+
+from .migrations import CATALOG_DIMENSIONS
+
+
+def _sort_key(value):
+    # Années et catégories (entiers) avant les textes si une dimension mélange les deux
+    return (isinstance(value, str), value)
+
+
+class DimensionCatalogService:
+    """
+    Valeurs distinctes et effectifs des dimensions filtrables (CATALOG_DIMENSIONS).
+
+    La table dimension_catalog est tenue à jour par triggers à chaque écriture sur
+    sanctions ou gendarmes ; le service en garde une copie en mémoire, relue (une
+    seule requête sur cette petite table) quand le compteur des écritures sources
+    (DatabaseManager.get_source_version) change. Ouvrir un filtre ou changer de thème ne parcourt pas les tables.
+
+    Une instance par base (for_db), partagée par les fenêtres et dialogues.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._lock = threading.Lock()
+        self._version = None
+        self._counts = None
+
+    @classmethod
+    def for_db(cls, db_manager):
+        """Retourne le service partagé pour la base de db_manager"""
+        with cls._instances_lock:
+            service = cls._instances.get(db_manager.db_name)
+            if service is None:
+                service = cls(db_manager)
+                cls._instances[db_manager.db_name] = service
+            return service
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._counts = None
+
+    def counts(self, dimension) -> Dict:
+        """Effectifs {valeur: nombre} d'une dimension (sanctions ou fiches gendarmes)"""
+        return self._catalog().get(dimension, {})
+
+    def values(self, dimension, descending=False) -> List:
+        """Valeurs renseignées (ni NULL ni chaîne vide) d'une dimension, triées"""
+        values = [value for value in self.counts(dimension) if value != '']
+        return sorted(values, key=_sort_key, reverse=descending)
+
+    def _catalog(self):
+        version = self.db_manager.get_source_version()
+        with self._lock:
+            if self._counts is not None and version is not None and self._version == version:
+                return self._counts
+
+            counts = {dimension.name: {} for dimension in CATALOG_DIMENSIONS}
+            try:
+                with self.db_manager.get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT dimension, valeur, nombre FROM dimension_catalog")
+                    for dimension, value, count in cursor.fetchall():
+                        counts.setdefault(dimension, {})[value] = count
+            except sqlite3.Error as e:
+                # Base sans catalogue (schéma non migré) : listes vides, rien n'est mis en cache
+                print(f"Catalogue des dimensions indisponible : {str(e)}")
+                return counts
+
+            self._counts = counts
+            self._version = version
+            return counts
@@ -0,0 +1,136 @@
+"""
+Extraction d'une requête SQLite directement en colonnes numpy.
+
+Les lignes sont lues par lots (fetchmany) et recopiées dans des tableaux
+préalloués (agrandis par doublement) : aucune liste de lignes ni colonne
+d'objets intermédiaire n'est construite pour le résultat complet.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+# Types de colonne
+INT = 'int'        # int64 + masque des valeurs nulles (lu en float64 : entiers jusqu'à 2**53)
+FLOAT = 'float'    # float64, NaN pour les valeurs nulles
+CODE = 'code'      # encodage par dictionnaire : codes int32 (-1 = NULL) + valeurs distinctes
+
+COLUMNAR_BATCH_SIZE = 8192
+
+
+@dataclass
+class FetchedColumn:
+    """Colonne extraite : values (int64, float64 ou codes), mask (True = NULL), dictionary (CODE)"""
+    kind: str
+    values: np.ndarray
+    mask: np.ndarray
+    dictionary: Optional[list] = None
+
+
+class _Dictionary(dict):
+    """Valeur -> code, le code d'une nouvelle valeur est attribué à la première rencontre"""
+
+    def __init__(self):
+        super().__init__({None: -1})
+
+    def encode(self, column, count):
+        """Codes int32 d'un lot de valeurs"""
+        # Valeurs distinctes du lot (dict.fromkeys, en C) : seules les nouvelles passent par Python
+        new_values = [value for value in dict.fromkeys(column) if value not in self]
+        self.update(zip(new_values, range(len(self) - 1, len(self) - 1 + len(new_values))))
+        return np.fromiter(map(self.__getitem__, column), dtype=np.int32, count=count)
+
+    def values_list(self):
+        """Valeurs dans l'ordre des codes (ordre d'insertion, None exclu)"""
+        return list(self)[1:]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _floats(column, count):
+    """Conversion en float64 (None -> NaN), valeur par valeur seulement si le texte n'est pas numérique"""
+    try:
+        return np.array(column, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.fromiter(map(_to_float, column), dtype=np.float64, count=count)
+
+
+class _Buffer:
+    """Tableau préalloué d'une colonne, agrandi par doublement"""
+
+    def __init__(self, dtype, capacity):
+        self.array = np.empty(capacity, dtype=dtype)
+
+    def write(self, start, values):
+        end = start + len(values)
+        if end > len(self.array):
+            grown = np.empty(max(end, 2 * len(self.array)), dtype=self.array.dtype)
+            grown[:start] = self.array[:start]
+            self.array = grown
+        self.array[start:end] = values
+
+    def result(self, size):
+        return self.array[:size].copy() if size < len(self.array) else self.array
+
+
+def fetch_columns(cursor, query, params=(), kinds: Dict[str, str] = None,
+                  batch_size=COLUMNAR_BATCH_SIZE, size_hint=0) -> Dict[str, FetchedColumn]:
+    """
+    Exécute query et retourne ses colonnes sous forme de tableaux numpy.
+
+    Args:
+        cursor: Curseur SQLite
+        query, params: Requête et paramètres
+        kinds: {colonne: INT | FLOAT | CODE} ; CODE par défaut (texte, dates...)
+        batch_size: Lignes lues par fetchmany
+        size_hint: Nombre de lignes attendu (taille de préallocation)
+
+    Returns:
+        {colonne: FetchedColumn} dans l'ordre des colonnes de la requête.
+        Une valeur non numérique d'une colonne INT ou FLOAT est traitée comme NULL.
+    """
+    kinds = kinds or {}
+    cursor.execute(query, params)
+    names = [description[0] for description in cursor.description]
+    column_kinds = [kinds.get(name, CODE) for name in names]
+
+    capacity = max(size_hint, batch_size)
+    buffers = []
+    for kind in column_kinds:
+        dtype = {INT: np.int64, FLOAT: np.float64}.get(kind, np.int32)
+        buffers.append((_Buffer(dtype, capacity), _Buffer(bool, capacity)))
+    dictionaries = [_Dictionary() if kind == CODE else None for kind in column_kinds]
+
+    size = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        count = len(rows)
+        for column, kind, (values, mask), dictionary in zip(zip(*rows), column_kinds, buffers, dictionaries):
+            if kind == CODE:
+                codes = dictionary.encode(column, count)
+                values.write(size, codes)
+                mask.write(size, codes < 0)
+                continue
+
+            numbers = _floats(column, count)
+            missing = ~np.isfinite(numbers)
+            if kind == INT:
+                # Un réel non entier n'est pas une valeur entière valide
+                missing |= numbers != np.floor(numbers)
+                numbers = np.where(missing, 0, numbers).astype(np.int64)
+            values.write(size, numbers)
+            mask.write(size, missing)
+        size += count
+
+    return {
+        name: FetchedColumn(kind=kind, values=values.result(size), mask=mask.result(size),
+                            dictionary=dictionary.values_list() if dictionary is not None else None)
+        for name, kind, (values, mask), dictionary in zip(names, column_kinds, buffers, dictionaries)
+    }
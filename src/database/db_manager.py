@@ -1,7 +1,10 @@
 import os
 import sqlite3
+import struct
 from contextlib import contextmanager
-import pandas as pd
+
+from .migrations import apply_migrations, reset_derived_data
+from .reference_data import map_reference_values, print_unmapped_report, unmapped_values
 
 
 # Fonction pour vérifier la présence des colonnes
@@ -14,6 +17,19 @@ def check_required_columns(df, required_columns):
     return True
 
 
+# Nombre de lignes lues par fetchmany dans les lectures en flux
+FETCH_BATCH_SIZE = 500
+
+
+def iter_rows(cursor, batch_size=FETCH_BATCH_SIZE):
+    """Parcourt le résultat d'un curseur par lots de batch_size lignes (fetchmany)"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
 class DatabaseManager:
     def __init__(self, db_name="gendarmes.db"):
         # Trouver le répertoire racine du projet
@@ -22,6 +38,9 @@ class DatabaseManager:
         self.db_name = os.path.join(project_root, db_name)
         print(f"Chemin complet de la DB: {self.db_name}")  # Debug
 
+        if os.path.exists(self.db_name):
+            self.ensure_schema()
+
     @contextmanager
     def get_connection(self):
         """Crée et gère la connexion à la base de données"""
@@ -31,12 +50,59 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def ensure_schema(self, rerun=False):
+        """Applique les migrations de schéma en attente (tables dérivées, triggers)"""
+        try:
+            with self.get_connection() as conn:
+                return apply_migrations(conn, rerun=rerun)
+        except Exception as e:
+            print(f"Erreur lors de la migration du schéma : {str(e)}")
+            return None
+
+    def get_data_version(self):
+        """
+        Retourne le compteur de modifications du fichier SQLite (en-tête, octet 24).
+
+        Ce compteur est incrémenté à chaque transaction d'écriture validée, quelle que
+        soit la connexion, y compris celles des tables dérivées (voir get_source_version).
+        Retourne None si le fichier n'existe pas ou n'est pas encore initialisé.
+        """
+        try:
+            with open(self.db_name, 'rb') as f:
+                header = f.read(28)
+        except OSError:
+            return None
+        if len(header) < 28:
+            return None
+        return struct.unpack('>I', header[24:28])[0]
+
+    def get_source_version(self):
+        """
+        Retourne le compteur des écritures sur les tables sources (stats_meta.source_version,
+        incrémenté par trigger). Les écritures des tables dérivées (cube, résumés annuels,
+        catalogue...) ne le changent pas : c'est la clé d'invalidation des caches.
+        Retourne None si le fichier n'existe pas ou si la base n'est pas migrée.
+        """
+        if not os.path.exists(self.db_name):
+            return None
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT valeur FROM stats_meta WHERE cle = 'source_version'")
+                row = cursor.fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
     def create_tables(self):
         """Crée les tables de la base de données"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            # Suppression des tables existantes si elles existent
+            # Suppression des tables existantes si elles existent ; les triggers d'historique
+            # des gendarmes écrivent dans sanctions et sont recréés par la migration 7
+            cursor.execute("DROP TRIGGER IF EXISTS trg_gendarmes_insert_historique")
+            cursor.execute("DROP TRIGGER IF EXISTS trg_gendarmes_update_historique")
             cursor.execute("DROP TABLE IF EXISTS sanctions")
             cursor.execute("DROP TABLE IF EXISTS gendarmes_etat")
 
@@ -92,12 +158,21 @@ class DatabaseManager:
 
             conn.commit()
 
+            # Les triggers de sanctions ont disparu avec la table : on rejoue les migrations
+            apply_migrations(conn, rerun=True)
+            reset_derived_data(cursor)
+            conn.commit()
+
     def get_all_gendarmes(self):
         """Récupère tous les gendarmes de la base de données"""
+        return list(self.iter_all_gendarmes())
+
+    def iter_all_gendarmes(self, batch_size=FETCH_BATCH_SIZE):
+        """Parcourt tous les gendarmes par lots, sans charger toute la table en mémoire"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM gendarmes ORDER BY nom_prenoms")
-            return cursor.fetchall()
+            yield from iter_rows(cursor, batch_size)
 
     def get_sanctions_by_gendarme_id(self, matricule):
         """Récupère toutes les sanctions d'un gendarme"""
@@ -193,13 +268,37 @@ class DatabaseManager:
             print(f"Erreur lors de la vérification des doublons : {str(e)}")
             return None
 
+    def check_unmapped_values(self, remap=False):
+        """
+        Rapport des valeurs textuelles rattachées à aucune valeur de référence.
+
+        Args:
+            remap: Relance d'abord le rapprochement (après ajout d'une valeur de référence
+                   ou saisie d'une nouvelle orthographe)
+
+        Returns:
+            Liste de UnmappedValue (dimension, libelle, occurrences), None en cas d'erreur
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                if remap:
+                    map_reference_values(cursor)
+                    conn.commit()
+                report = unmapped_values(cursor)
+            print_unmapped_report(report)
+            return report
+        except Exception as e:
+            print(f"Erreur lors du contrôle des tables de référence : {str(e)}")
+            return None
+
     def run_sanctions_diagnostic(self):
         """Exécute un diagnostic complet de la table sanctions."""
         debug_queries = [
             # 1. Total des dossiers uniques
             """
-            SELECT COUNT(DISTINCT numero_dossier) as total_unique_dossiers 
-            FROM sanctions;
+            SELECT COUNT(*) as total_unique_dossiers
+            FROM dossiers;
             """,
 
             # 2. Détail des doublons par numéro de dossier
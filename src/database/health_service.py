@@ -0,0 +1,76 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class HealthStatus:
+    """Résultat d'une vérification de l'état de la base"""
+    ok: bool
+    message: str = ""
+    source_version: Optional[int] = None
+
+
+class DatabaseHealthService:
+    """
+    Vérifie l'état de la base en une seule connexion.
+
+    Présence des tables : une requête sur sqlite_master.
+    Tables non vides : EXISTS (SELECT 1 ...), sans COUNT(*) sur toute la table.
+    Le résultat est mis en cache tant que le compteur des écritures sources
+    (DatabaseManager.get_source_version) ne change pas.
+    """
+
+    REQUIRED_TABLES = ('sanctions', 'gendarmes')
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._status = None
+
+    def invalidate(self):
+        """Force une nouvelle vérification au prochain appel"""
+        self._status = None
+
+    def check(self) -> HealthStatus:
+        """Retourne l'état de la base, depuis le cache si aucune écriture n'a eu lieu"""
+        version = self.db_manager.get_source_version()
+        if self._status is not None and version is not None and self._status.source_version == version:
+            return self._status
+
+        status = self._probe(version)
+        # On ne met en cache que si la version est connue
+        self._status = status if version is not None else None
+        return status
+
+    def _probe(self, version) -> HealthStatus:
+        """Exécute la vérification sur une seule connexion"""
+        if not os.path.exists(self.db_manager.db_name):
+            return HealthStatus(False, "La base de données n'existe pas", version)
+
+        try:
+            with self.db_manager.get_connection() as conn:
+                cursor = conn.cursor()
+                placeholders = ','.join('?' * len(self.REQUIRED_TABLES))
+                cursor.execute(f"""
+                    SELECT name FROM sqlite_master
+                    WHERE type='table' AND name IN ({placeholders})
+                """, self.REQUIRED_TABLES)
+                existing = {row[0] for row in cursor.fetchall()}
+
+                for table in self.REQUIRED_TABLES:
+                    if table not in existing:
+                        return HealthStatus(False, f"La table {table} n'existe pas", version)
+
+                cursor.execute(
+                    "SELECT " + ", ".join(
+                        f"EXISTS (SELECT 1 FROM {table})" for table in self.REQUIRED_TABLES
+                    )
+                )
+                for table, not_empty in zip(self.REQUIRED_TABLES, cursor.fetchone()):
+                    if not not_empty:
+                        return HealthStatus(False, f"La table {table} est vide", version)
+
+            return HealthStatus(True, "", version)
+
+        except Exception as e:
+            return HealthStatus(False, f"La base de données n'est pas connectée: {str(e)}", version)
@@ -0,0 +1,918 @@
+"""
+Migrations du schéma, versionnées par PRAGMA user_version.
+
+Chaque migration est idempotente (CREATE ... IF NOT EXISTS) : create_tables
+supprime et recrée la table sanctions (et donc ses triggers), il relance alors
+toutes les migrations pour réinstaller les objets dérivés.
+"""
+from collections import namedtuple
+
+from src.data.gendarmerie.structure import AGE_RANGES, GRAVITE_STATUTS, SERVICE_RANGES
+
+from .reference_data import (REFERENCE_DIMENSIONS, canonical_id_sql, create_reference_tables,
+                             map_reference_values, print_unmapped_report, register_statements,
+                             unmapped_values)
+
+
+def _migration_001_year_summaries(cursor):
+    """Résumés annuels persistés et triggers d'invalidation"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS year_summaries (
+        annee TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        valeur TEXT NOT NULL DEFAULT '',
+        nombre INTEGER NOT NULL,
+        PRIMARY KEY (annee, dimension, valeur)
+    )''')
+
+    # Une écriture sur sanctions invalide l'année concernée
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_sanctions_insert_year_summaries
+        AFTER INSERT ON sanctions
+        BEGIN
+            DELETE FROM year_summaries WHERE annee = strftime('%Y', NEW.date_enr);
+        END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_sanctions_update_year_summaries
+        AFTER UPDATE ON sanctions
+        BEGIN
+            DELETE FROM year_summaries
+            WHERE annee IN (strftime('%Y', OLD.date_enr), strftime('%Y', NEW.date_enr));
+        END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_sanctions_delete_year_summaries
+        AFTER DELETE ON sanctions
+        BEGIN
+            DELETE FROM year_summaries WHERE annee = strftime('%Y', OLD.date_enr);
+        END''')
+
+    # Une écriture sur gendarmes (grade, subdivision, région...) peut toucher toutes les années
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_gendarmes_{event.lower()}_year_summaries
+            AFTER {event} ON gendarmes
+            BEGIN
+                DELETE FROM year_summaries;
+            END''')
+
+
+def _migration_002_trend_indexes(cursor):
+    """Index sur l'année d'enregistrement et sur la jointure sanctions / gendarmes"""
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_sanctions_annee_enr
+        ON sanctions (strftime('%Y', date_enr))""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sanctions_matricule ON sanctions (matricule)")
+    # s.matricule est INTEGER et g.mle TEXT : l'index porte sur la forme numérique du matricule
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_gendarmes_mle_num
+        ON gendarmes (CAST(mle AS INTEGER))""")
+
+
+# Dimensions du cube statistique (colonnes de stats_cube)
+CUBE_DIMENSIONS = ('annee_punition', 'faute_commise', 'statut', 'subdiv', 'categorie',
+                   'situation_matrimoniale', 'service_range', 'grade')
+
+
+def _migration_003_stats_cube(cursor):
+    """Cube des effectifs par dimensions et version des données sources"""
+    # Colonnes sans type : les valeurs gardent le type d'origine (année et catégorie entières),
+    # NULL = valeur non renseignée
+    cursor.execute(f'''CREATE TABLE IF NOT EXISTS stats_cube (
+        {', '.join(CUBE_DIMENSIONS)},
+        nombre INTEGER NOT NULL
+    )''')
+    cursor.execute(f"""CREATE INDEX IF NOT EXISTS idx_stats_cube_cellule
+        ON stats_cube ({', '.join(CUBE_DIMENSIONS)})""")
+
+    # source_version : incrémentée à chaque écriture sur les colonnes sources de sanctions
+    # ou gendarmes (pas par les tables et colonnes dérivées) ; clé des caches
+    # cube_version : source_version au moment de la construction du cube
+    cursor.execute('''CREATE TABLE IF NOT EXISTS stats_meta (
+        cle TEXT PRIMARY KEY,
+        valeur INTEGER NOT NULL
+    )''')
+    cursor.execute("INSERT OR IGNORE INTO stats_meta (cle, valeur) VALUES ('source_version', 0)")
+    cursor.execute("INSERT OR IGNORE INTO stats_meta (cle, valeur) VALUES ('cube_version', -1)")
+
+    for table, columns in SOURCE_COLUMNS.items():
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            _create_source_version_trigger(cursor, table, event, columns if event == 'UPDATE' else None)
+
+
+# Colonnes saisies (formulaires, import) : les triggers en cascade d'une écriture
+# (clés de référence, jours d'arrêt, version de fiche, tranches...) ne modifient que
+# des colonnes dérivées et n'incrémentent donc pas source_version.
+SOURCE_COLUMNS = {
+    'sanctions': ('numero_dossier', 'annee_punition', 'numero_ordre', 'date_enr', 'matricule',
+                  'faute_commise', 'date_faits', 'categorie', 'statut', 'reference_statut',
+                  'taux_jar', 'comite', 'annee_faits', 'numero_decision'),
+    'gendarmes': ('mle', 'nom_prenoms', 'grade', 'sexe', 'date_naissance', 'age', 'unite', 'legions',
+                  'subdiv', 'regions', 'date_entree_gie', 'annee_service', 'situation_matrimoniale',
+                  'nb_enfants'),
+}
+
+SOURCE_VERSION_BUMP = "UPDATE stats_meta SET valeur = valeur + 1 WHERE cle = 'source_version';"
+
+
+def _create_source_version_trigger(cursor, table, event, columns=None):
+    """Trigger trg_<table>_<event>_source_version (remplacé s'il existe)"""
+    name = f"trg_{table}_{event.lower()}_source_version"
+    cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cursor.execute(f'''CREATE TRIGGER {name}
+        AFTER {event}{f" OF {', '.join(columns)}" if columns else ""} ON {table}
+        BEGIN
+            {SOURCE_VERSION_BUMP}
+        END''')
+
+
+def taux_jar_jours_sql(column):
+    """Nombre de jours d'arrêt (REAL) lu dans le texte de taux_jar : '20', '20.0', '20 JOURS' ; NULL sinon"""
+    value = f"replace(trim({column}), ',', '.')"
+    return f"CASE WHEN {value} GLOB '[0-9]*' THEN CAST({value} AS REAL) END"
+
+
+def _migration_004_taux_jar_jours(cursor):
+    """Colonne numérique des jours d'arrêt, tenue à jour depuis taux_jar (TEXT)"""
+    cursor.execute("PRAGMA table_info(sanctions)")
+    if 'taux_jar_jours' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE sanctions ADD COLUMN taux_jar_jours REAL")
+    cursor.execute(f"UPDATE sanctions SET taux_jar_jours = {taux_jar_jours_sql('taux_jar')}")
+
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_sanctions_insert_taux_jar_jours
+        AFTER INSERT ON sanctions
+        BEGIN
+            UPDATE sanctions SET taux_jar_jours = {taux_jar_jours_sql('NEW.taux_jar')} WHERE id = NEW.id;
+        END''')
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_sanctions_update_taux_jar_jours
+        AFTER UPDATE OF taux_jar ON sanctions
+        BEGIN
+            UPDATE sanctions SET taux_jar_jours = {taux_jar_jours_sql('NEW.taux_jar')} WHERE id = NEW.id;
+        END''')
+
+
+# Colonnes d'en-tête d'un dossier, reprises de sa première ligne de sanction
+DOSSIER_COLUMNS = ('matricule', 'date_enr', 'date_faits', 'faute_commise', 'categorie',
+                   'statut', 'annee_punition')
+
+_DOSSIER_INSERT = (f"INSERT INTO dossiers (numero_dossier, {', '.join(DOSSIER_COLUMNS)}, "
+                   f"annee_enr, nb_sanctions)")
+
+
+def dossier_header_sql(condition):
+    """SELECT des en-têtes (première ligne et nombre de lignes) des dossiers vérifiant condition"""
+    return f"""
+        SELECT s.numero_dossier, {', '.join('s.' + column for column in DOSSIER_COLUMNS)},
+               strftime('%Y', s.date_enr), d.nb_sanctions
+        FROM (
+            SELECT numero_dossier, MIN(id) AS premier_id, COUNT(*) AS nb_sanctions
+            FROM sanctions
+            WHERE numero_dossier IS NOT NULL AND {condition}
+            GROUP BY numero_dossier
+        ) d
+        JOIN sanctions s ON s.id = d.premier_id"""
+
+
+def rebuild_dossiers(cursor):
+    """Recalcule toute la table dossiers depuis sanctions"""
+    cursor.execute("DELETE FROM dossiers")
+    cursor.execute(_DOSSIER_INSERT + dossier_header_sql("1"))
+
+
+def _migration_005_dossiers(cursor):
+    """En-têtes de dossier (une ligne par numero_dossier), tenus à jour par triggers"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS dossiers (
+        numero_dossier TEXT PRIMARY KEY,
+        matricule INTEGER,
+        date_enr DATE,
+        date_faits DATE,
+        faute_commise TEXT,
+        categorie INTEGER,
+        statut TEXT,
+        annee_punition INTEGER,
+        annee_enr TEXT,
+        nb_sanctions INTEGER NOT NULL
+    )''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dossiers_annee_enr ON dossiers (annee_enr)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dossiers_matricule ON dossiers (matricule)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sanctions_numero_dossier ON sanctions (numero_dossier)")
+    rebuild_dossiers(cursor)
+
+    # Une écriture sur sanctions recalcule l'en-tête des dossiers touchés (ancien et nouveau numéro)
+    events = {
+        'insert': ('INSERT', ('NEW',)),
+        # taux_jar_jours ou numero_decision ne changent pas l'en-tête
+        'update': (f"UPDATE OF numero_dossier, {', '.join(DOSSIER_COLUMNS)}", ('OLD', 'NEW')),
+        'delete': ('DELETE', ('OLD',)),
+    }
+    for name, (event, rows) in events.items():
+        statements = []
+        for row in rows:
+            statements.append(f"DELETE FROM dossiers WHERE numero_dossier = {row}.numero_dossier;")
+            statements.append(_DOSSIER_INSERT
+                              + dossier_header_sql(f"numero_dossier = {row}.numero_dossier") + ";")
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_sanctions_{name}_dossiers
+            AFTER {event} ON sanctions
+            BEGIN
+                {' '.join(statements)}
+            END''')
+
+
+def _sync_duplicates_archive(cursor):
+    """Table d'archive des fiches fusionnées, avec les colonnes actuelles de gendarmes"""
+    cursor.execute("PRAGMA table_info(gendarmes)")
+    columns = [row[1] for row in cursor.fetchall()]
+    cursor.execute("""CREATE TABLE IF NOT EXISTS gendarmes_doublons_archive (
+        fiche_conservee_id INTEGER,
+        archive_le TEXT NOT NULL
+    )""")
+    cursor.execute("PRAGMA table_info(gendarmes_doublons_archive)")
+    existing = [row[1] for row in cursor.fetchall()]
+    for column in columns:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE gendarmes_doublons_archive ADD COLUMN {column}")
+    return columns
+
+
+def _migration_006_gendarmes_mle_unique(cursor):
+    """Fusion des fiches gendarmes en double et unicité du matricule"""
+    cursor.execute("PRAGMA table_info(gendarmes)")
+    columns = [row[1] for row in cursor.fetchall() if row[1] not in ('id', 'mle')]
+
+    cursor.execute("DROP TABLE IF EXISTS temp.gendarmes_doublons")
+    cursor.execute("""CREATE TEMP TABLE gendarmes_doublons AS
+        SELECT mle, MIN(id) AS fiche_id FROM gendarmes
+        WHERE mle IS NOT NULL
+        GROUP BY mle HAVING COUNT(*) > 1""")
+
+    # Copie des fiches en double avant fusion (fiche conservée comprise, valeurs d'origine) :
+    # rien n'est perdu, fiche_conservee_id désigne la fiche qui les remplace
+    cursor.execute("SELECT COUNT(*) FROM gendarmes_doublons")
+    if cursor.fetchone()[0]:
+        archive_columns = _sync_duplicates_archive(cursor)
+        cursor.execute(f"""INSERT INTO gendarmes_doublons_archive
+                ({', '.join(archive_columns)}, fiche_conservee_id, archive_le)
+            SELECT {', '.join('g.' + column for column in archive_columns)}, d.fiche_id, datetime('now')
+            FROM gendarmes g JOIN gendarmes_doublons d ON d.mle = g.mle""")
+
+    # La fiche la plus ancienne est conservée (id stable) ; chaque colonne y reçoit
+    # la valeur renseignée la plus récente parmi les doublons
+    assignments = ", ".join(f"""{column} = COALESCE((
+            SELECT g2.{column} FROM gendarmes g2
+            WHERE g2.mle = gendarmes.mle AND g2.{column} IS NOT NULL AND g2.{column} != ''
+            ORDER BY g2.id DESC LIMIT 1), {column})""" for column in columns)
+    cursor.execute(f"""UPDATE gendarmes SET {assignments}
+        WHERE id IN (SELECT fiche_id FROM gendarmes_doublons)""")
+    cursor.execute("""DELETE FROM gendarmes
+        WHERE mle IN (SELECT mle FROM gendarmes_doublons)
+          AND id NOT IN (SELECT fiche_id FROM gendarmes_doublons)""")
+    if cursor.rowcount > 0:
+        print(f"Fiches gendarmes fusionnées : {cursor.rowcount} doublon(s) supprimé(s), "
+              f"fiches d'origine dans gendarmes_doublons_archive")
+    cursor.execute("DROP TABLE temp.gendarmes_doublons")
+
+    # Cible de INSERT ... ON CONFLICT(mle) (GendarmeRepository.upsert)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_gendarmes_mle ON gendarmes (mle)")
+
+
+# Attributs d'une fiche gendarme qui évoluent dans le temps (historisés)
+HISTORY_COLUMNS = ('grade', 'unite', 'legions', 'subdiv', 'regions', 'annee_service',
+                   'situation_matrimoniale', 'nb_enfants')
+
+# Début de la première version d'une fiche : elle couvre tous les faits antérieurs
+HISTORY_START = '0000-01-01'
+
+
+def gendarme_version_sql(matricule, date_faits):
+    """
+    Sous-requête : id de la version de fiche valide à la date des faits
+    (recherche par intervalle sur l'index idx_gendarmes_historique_periode).
+    """
+    return f"""(SELECT h.id FROM gendarmes_historique h
+            WHERE h.matricule = {matricule} AND h.valide_du <= COALESCE({date_faits}, date('now'))
+            ORDER BY h.valide_du DESC, h.id DESC LIMIT 1)"""
+
+
+def history_effect_sql(row):
+    """
+    Date d'effet d'une modification de la fiche row : date des faits de l'affaire qui l'a
+    déclenchée (gendarmes_historique_effet, renseignée par GendarmeRepository.upsert),
+    à défaut la date du jour ; jamais postérieure à la date du jour.
+    """
+    return f"""MIN(date('now'), COALESCE(
+            (SELECT valide_du FROM gendarmes_historique_effet WHERE mle = {row}.mle), date('now')))"""
+
+
+def _history_statements(row):
+    """
+    Corps de trigger : nouvelle version de la fiche row (NEW) à la date d'effet et
+    rattachement des sanctions. Une version en cours ouverte à la date d'effet ou après
+    (même jour, affaires saisies dans le désordre) est corrigée sur place.
+    """
+    values = ', '.join(f'{row}.{column}' for column in HISTORY_COLUMNS)
+    effect = history_effect_sql(row)
+    return f"""
+        UPDATE gendarmes_historique
+        SET {', '.join(f'{column} = {row}.{column}' for column in HISTORY_COLUMNS)}
+        WHERE mle = {row}.mle AND valide_au IS NULL AND valide_du >= {effect};
+        UPDATE gendarmes_historique SET valide_au = {effect}
+        WHERE mle = {row}.mle AND valide_au IS NULL AND valide_du < {effect};
+        INSERT INTO gendarmes_historique (mle, matricule, valide_du, valide_au, {', '.join(HISTORY_COLUMNS)})
+        SELECT {row}.mle, CAST({row}.mle AS INTEGER),
+               CASE WHEN EXISTS (SELECT 1 FROM gendarmes_historique WHERE mle = {row}.mle)
+                    THEN {effect} ELSE '{HISTORY_START}' END,
+               NULL, {values}
+        WHERE {row}.mle IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM gendarmes_historique WHERE mle = {row}.mle AND valide_au IS NULL);
+        UPDATE sanctions SET gendarme_version_id = {gendarme_version_sql('sanctions.matricule', 'sanctions.date_faits')}
+        WHERE matricule = CAST({row}.mle AS INTEGER);
+    """
+
+
+def _create_history_triggers(cursor):
+    """Toute modification d'un attribut historisé ouvre une nouvelle version (triggers remplacés)"""
+    # Date d'effet posée le temps d'une écriture par l'appelant (même transaction)
+    cursor.execute("""CREATE TABLE IF NOT EXISTS gendarmes_historique_effet (
+        mle TEXT PRIMARY KEY,
+        valide_du TEXT NOT NULL
+    )""")
+
+    changed = ' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in ('mle',) + HISTORY_COLUMNS)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_gendarmes_insert_historique")
+    cursor.execute(f'''CREATE TRIGGER trg_gendarmes_insert_historique
+        AFTER INSERT ON gendarmes
+        BEGIN
+            {_history_statements('NEW')}
+        END''')
+    cursor.execute("DROP TRIGGER IF EXISTS trg_gendarmes_update_historique")
+    cursor.execute(f'''CREATE TRIGGER trg_gendarmes_update_historique
+        AFTER UPDATE ON gendarmes
+        WHEN {changed}
+        BEGIN
+            {_history_statements('NEW')}
+        END''')
+
+
+def _migration_007_gendarmes_historique(cursor):
+    """Historique des fiches gendarmes (intervalles de validité) référencé par les sanctions"""
+    # valide_du / valide_au : dates ISO, valide_au NULL pour la version en cours ;
+    # matricule : forme numérique de mle, comparable à sanctions.matricule
+    cursor.execute(f'''CREATE TABLE IF NOT EXISTS gendarmes_historique (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mle TEXT NOT NULL,
+        matricule INTEGER,
+        valide_du TEXT NOT NULL,
+        valide_au TEXT,
+        grade TEXT,
+        unite TEXT,
+        legions TEXT,
+        subdiv TEXT,
+        regions TEXT,
+        annee_service INTEGER,
+        situation_matrimoniale TEXT,
+        nb_enfants INTEGER
+    )''')
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_gendarmes_historique_periode
+        ON gendarmes_historique (matricule, valide_du)""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_gendarmes_historique_mle
+        ON gendarmes_historique (mle, valide_au)""")
+
+    # Version initiale des fiches sans historique
+    cursor.execute(f"""INSERT INTO gendarmes_historique
+            (mle, matricule, valide_du, valide_au, {', '.join(HISTORY_COLUMNS)})
+        SELECT mle, CAST(mle AS INTEGER), '{HISTORY_START}', NULL, {', '.join(HISTORY_COLUMNS)}
+        FROM gendarmes
+        WHERE mle IS NOT NULL AND mle NOT IN (SELECT mle FROM gendarmes_historique)""")
+
+    cursor.execute("PRAGMA table_info(sanctions)")
+    if 'gendarme_version_id' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE sanctions ADD COLUMN gendarme_version_id INTEGER")
+    cursor.execute(f"""UPDATE sanctions
+        SET gendarme_version_id = {gendarme_version_sql('sanctions.matricule', 'sanctions.date_faits')}""")
+
+    # Une sanction référence la version valide à la date des faits
+    for name, event in (('insert', 'INSERT'), ('update', 'UPDATE OF matricule, date_faits')):
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_sanctions_{name}_gendarme_version
+            AFTER {event} ON sanctions
+            BEGIN
+                UPDATE sanctions
+                SET gendarme_version_id = {gendarme_version_sql('NEW.matricule', 'NEW.date_faits')}
+                WHERE id = NEW.id;
+            END''')
+
+    _create_history_triggers(cursor)
+
+
+def _migration_008_sanctions_pagination(cursor):
+    """Index de la pagination par clé de la liste des sanctions (date des faits, id)"""
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_sanctions_date_faits
+        ON sanctions (COALESCE(date_faits, ''), id)""")
+
+
+def _create_reference_key_triggers(cursor, dimension):
+    """Une orthographe inconnue est enregistrée (non rapprochée) puis la clé est renseignée (triggers remplacés)"""
+    name, table, column = dimension
+    for trigger, event in (('insert', 'INSERT'), ('update', f'UPDATE OF {column}')):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{trigger}_{name}_id")
+        cursor.execute(f'''CREATE TRIGGER trg_{table}_{trigger}_{name}_id
+            AFTER {event} ON {table}
+            BEGIN
+                {register_statements(name, f'NEW.{column}')}
+                UPDATE {table} SET {name}_id = {canonical_id_sql(name, f'NEW.{column}')}
+                WHERE id = NEW.id;
+            END''')
+
+
+def _migration_009_reference_tables(cursor):
+    """Tables de référence des dimensions textuelles et clés étrangères vers ces tables"""
+    create_reference_tables(cursor)
+
+    for dimension in REFERENCE_DIMENSIONS:
+        name, table, column = dimension
+        cursor.execute(f"PRAGMA table_info({table})")
+        if f'{name}_id' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name}_id INTEGER REFERENCES ref_{name}(id)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{name}_id ON {table} ({name}_id)")
+
+        _create_reference_key_triggers(cursor, dimension)
+
+        # Un rattachement modifié change les libellés des agrégats
+        _create_source_version_trigger(cursor, f'ref_{name}', 'UPDATE', ('canonique_id', 'libelle'))
+
+    mapped = map_reference_values(cursor)
+    if mapped:
+        print(f"Tables de référence : {mapped} orthographe(s) rattachée(s) à une valeur de référence")
+    print_unmapped_report(unmapped_values(cursor))
+
+
+CatalogDimension = namedtuple('CatalogDimension', 'name table column reference')
+
+# Dimensions filtrables du catalogue (champ d'analyse -> colonne source) ; reference :
+# table ref_* dont la colonne est la clé, le catalogue contient alors le libellé de référence.
+# Les dimensions de sanctions comptent des lignes de sanction, celles de gendarmes des fiches.
+CATALOG_DIMENSIONS = (
+    CatalogDimension('faute_commise', 'sanctions', 'faute_id', 'faute'),
+    CatalogDimension('statut', 'sanctions', 'statut_id', 'statut'),
+    CatalogDimension('categorie', 'sanctions', 'categorie', None),
+    CatalogDimension('annee_punition', 'sanctions', 'annee_punition', None),
+    CatalogDimension('grade', 'gendarmes', 'grade_id', 'grade'),
+    CatalogDimension('subdiv', 'gendarmes', 'subdiv_id', 'subdiv'),
+    CatalogDimension('regions', 'gendarmes', 'region_id', 'region'),
+    CatalogDimension('situation_matrimoniale', 'gendarmes', 'situation_matrimoniale', None),
+    CatalogDimension('annee_service', 'gendarmes', 'annee_service', None),
+    CatalogDimension('nom_prenoms', 'gendarmes', 'nom_prenoms', None),
+)
+
+
+def _catalog_value_sql(dimension, row):
+    if dimension.reference:
+        return f"(SELECT libelle FROM ref_{dimension.reference} WHERE id = {row}.{dimension.column})"
+    return f"{row}.{dimension.column}"
+
+
+def _catalog_statements(dimension, row, delta, condition="1"):
+    """Corps de trigger : ajoute delta à l'effectif de la valeur de row"""
+    value = _catalog_value_sql(dimension, row)
+    statements = f"""
+        INSERT INTO dimension_catalog (dimension, valeur, nombre)
+        SELECT '{dimension.name}', {value}, {delta}
+        WHERE {row}.{dimension.column} IS NOT NULL AND {condition}
+        ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + excluded.nombre;"""
+    if delta < 0:
+        statements += f"""
+        DELETE FROM dimension_catalog
+        WHERE dimension = '{dimension.name}' AND valeur = {value} AND nombre <= 0;"""
+    return statements
+
+
+def rebuild_dimension_catalog(cursor):
+    """Recalcule tout le catalogue depuis sanctions et gendarmes"""
+    cursor.execute("DELETE FROM dimension_catalog")
+    for dimension in CATALOG_DIMENSIONS:
+        cursor.execute(f"""INSERT INTO dimension_catalog (dimension, valeur, nombre)
+            SELECT ?, {_catalog_value_sql(dimension, 't')}, COUNT(*)
+            FROM {dimension.table} t
+            WHERE t.{dimension.column} IS NOT NULL
+            GROUP BY t.{dimension.column}""", (dimension.name,))
+
+
+def _migration_010_dimension_catalog(cursor):
+    """Catalogue des valeurs distinctes (et effectifs) des dimensions filtrables"""
+    # valeur sans type : années et catégories restent entières
+    cursor.execute('''CREATE TABLE IF NOT EXISTS dimension_catalog (
+        dimension TEXT NOT NULL,
+        valeur NOT NULL,
+        nombre INTEGER NOT NULL,
+        PRIMARY KEY (dimension, valeur)
+    )''')
+    rebuild_dimension_catalog(cursor)
+
+    for table in ('sanctions', 'gendarmes'):
+        dimensions = [dimension for dimension in CATALOG_DIMENSIONS if dimension.table == table]
+        columns = ', '.join(dimension.column for dimension in dimensions)
+        inserted = ''.join(_catalog_statements(dimension, 'NEW', 1) for dimension in dimensions)
+        deleted = ''.join(_catalog_statements(dimension, 'OLD', -1) for dimension in dimensions)
+        updated = ''.join(
+            _catalog_statements(dimension, 'OLD', -1, f"OLD.{dimension.column} IS NOT NEW.{dimension.column}")
+            + _catalog_statements(dimension, 'NEW', 1, f"OLD.{dimension.column} IS NOT NEW.{dimension.column}")
+            for dimension in dimensions)
+
+        # Les clés de référence (faute_id...) sont renseignées par trigger après l'insertion :
+        # leur valeur est comptée par le trigger de mise à jour
+        for name, event, statements in (('insert', 'INSERT', inserted),
+                                        ('update', f'UPDATE OF {columns}', updated),
+                                        ('delete', 'DELETE', deleted)):
+            cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_{name}_dimension_catalog
+                AFTER {event} ON {table}
+                BEGIN
+                    {statements}
+                END''')
+
+
+def tranche_ranges():
+    """Tranches par dimension, dans l'ordre de structure.py"""
+    return {
+        'service': SERVICE_RANGES,
+        'age': AGE_RANGES,
+    }
+
+
+def tranche_label(code):
+    """Libellé d'une tranche dans les tableaux : '6-10' -> '6-10 ANS'"""
+    return f"{code} ANS"
+
+
+# Colonnes rangées par tranches : (table, colonne source, dimension de tranche)
+TRANCHE_COLUMNS = (
+    ('gendarmes', 'annee_service', 'service'),
+    ('gendarmes', 'age', 'age'),
+    ('gendarmes_historique', 'annee_service', 'service'),
+)
+
+
+def tranche_id_sql(dimension, value):
+    """
+    Sous-requête : tranche de value, mêmes bornes que pd.cut(include_lowest=True) :
+    [0-5], ]5-10], ]10-15]... ; NULL hors tranches ou pour une valeur non numérique.
+    """
+    return f"""(SELECT t.id FROM tranches t
+            WHERE t.dimension = '{dimension}' AND typeof({value}) IN ('integer', 'real')
+              AND {value} >= (SELECT MIN(debut) FROM tranches WHERE dimension = '{dimension}')
+              AND {value} <= t.fin
+            ORDER BY t.fin LIMIT 1)"""
+
+
+def sync_tranches(cursor):
+    """
+    Recharge la table tranches depuis structure.py et recalcule les tranches enregistrées.
+    Une tranche inchangée garde son id (migrations rejouées).
+    """
+    rows = [(dimension, code, tranche_label(code), *map(int, code.split('-')), ordre)
+            for dimension, ranges in tranche_ranges().items()
+            for ordre, code in enumerate(ranges)]
+    cursor.execute(f"""DELETE FROM tranches WHERE dimension || '|' || code NOT IN
+        ({', '.join('?' * len(rows))})""", [f"{row[0]}|{row[1]}" for row in rows])
+    cursor.executemany("""INSERT INTO tranches (dimension, code, libelle, debut, fin, ordre)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(dimension, code) DO UPDATE SET
+            libelle = excluded.libelle, debut = excluded.debut, fin = excluded.fin, ordre = excluded.ordre""",
+                       rows)
+    for table, column, dimension in TRANCHE_COLUMNS:
+        cursor.execute(f"UPDATE {table} SET {column}_tranche_id = {tranche_id_sql(dimension, column)}")
+
+
+def _migration_011_tranches(cursor):
+    """Tranches d'années de service et d'âge (table de correspondance et colonnes indexées)"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS tranches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dimension TEXT NOT NULL,
+        code TEXT NOT NULL,
+        libelle TEXT NOT NULL,
+        debut INTEGER NOT NULL,
+        fin INTEGER NOT NULL,
+        ordre INTEGER NOT NULL,
+        UNIQUE (dimension, code)
+    )''')
+
+    for table, column, dimension in TRANCHE_COLUMNS:
+        cursor.execute(f"PRAGMA table_info({table})")
+        if f'{column}_tranche_id' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}_tranche_id INTEGER REFERENCES tranches(id)")
+        cursor.execute(f"""CREATE INDEX IF NOT EXISTS idx_{table}_{column}_tranche
+            ON {table} ({column}_tranche_id)""")
+
+        for trigger, event in (('insert', 'INSERT'), ('update', f'UPDATE OF {column}')):
+            cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_{trigger}_{column}_tranche
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE {table} SET {column}_tranche_id = {tranche_id_sql(dimension, f'NEW.{column}')}
+                    WHERE id = NEW.id;
+                END''')
+
+    sync_tranches(cursor)
+    # Les résumés persistés utilisaient l'ancien découpage (... 21-25, 25+)
+    cursor.execute("DELETE FROM year_summaries")
+
+
+# Valeurs calculées à une date de référence : (colonne enregistrée, date source, dimension de tranche).
+# La date source est aussi conservée en jour AAAAMMJJ (entier) dans la colonne <date source>_jour.
+DERIVED_YEARS = (
+    ('age', 'date_naissance', 'age'),
+    ('annee_service', 'date_entree_gie', 'service'),
+)
+
+# Date par défaut des formulaires (01/01/1900) : traitée comme inconnue
+UNKNOWN_DAY = 19000101
+
+# Plus grande durée (en années) de la table tranches_durees
+MAX_YEARS = 150
+
+TODAY_DAY = "CAST(strftime('%Y%m%d', 'now') AS INTEGER)"
+
+
+def date_day_sql(value):
+    """Jour AAAAMMJJ (entier) d'une date saisie en AAAA-MM-JJ, JJ/MM/AAAA ou JJ-MM-AAAA ; NULL sinon"""
+    return f"""(CASE
+            WHEN {value} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+                THEN CAST(substr({value}, 1, 4) || substr({value}, 6, 2) || substr({value}, 9, 2) AS INTEGER)
+            WHEN {value} GLOB '[0-9][0-9][/-][0-9][0-9][/-][0-9][0-9][0-9][0-9]*'
+                THEN CAST(substr({value}, 7, 4) || substr({value}, 4, 2) || substr({value}, 1, 2) AS INTEGER)
+        END)"""
+
+
+def years_between_sql(start_day, reference_day):
+    """
+    Années révolues entre deux jours AAAAMMJJ : (référence - début) / 10000 en division
+    entière. NULL si l'un est inconnu ou si le début est postérieur à la référence.
+    """
+    return (f"(CASE WHEN {start_day} > {UNKNOWN_DAY} AND {reference_day} >= {start_day} "
+            f"THEN ({reference_day} - {start_day}) / 10000 END)")
+
+
+def derived_tranche_joins(alias, dimension, years, fallback):
+    """
+    Jointures de la tranche d'une durée calculée : {alias}_d (tranches_durees, durée
+    calculée en {alias}_d.duree) et {alias} (tranches). La tranche enregistrée fallback
+    n'est retenue que si la durée ne peut pas être calculée (date inconnue).
+    """
+    return f"""
+    LEFT JOIN tranches_durees {alias}_d ON {alias}_d.dimension = '{dimension}' AND {alias}_d.duree = {years}
+    LEFT JOIN tranches {alias} ON {alias}.id = CASE WHEN {alias}_d.duree IS NULL THEN {fallback}
+                                              ELSE {alias}_d.tranche_id END"""
+
+
+def _migration_012_derived_years(cursor):
+    """Âge et années de service calculés à une date de référence (jours AAAAMMJJ, vue gendarmes_actuels)"""
+    for _, source, _ in DERIVED_YEARS:
+        cursor.execute("PRAGMA table_info(gendarmes)")
+        if f'{source}_jour' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE gendarmes ADD COLUMN {source}_jour INTEGER")
+        cursor.execute(f"""UPDATE gendarmes SET {source}_jour = {date_day_sql(source)}
+            WHERE {source}_jour IS NOT {date_day_sql(source)}""")
+
+        for trigger, event in (('insert', 'INSERT'), ('update', f'UPDATE OF {source}')):
+            cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_gendarmes_{trigger}_{source}_jour
+                AFTER {event} ON gendarmes
+                BEGIN
+                    UPDATE gendarmes SET {source}_jour = {date_day_sql(f'NEW.{source}')} WHERE id = NEW.id;
+                END''')
+
+    # Durée en années -> tranche (NULL hors tranches) : une recherche par clé, sans comparaison de bornes
+    cursor.execute('''CREATE TABLE IF NOT EXISTS tranches_durees (
+        dimension TEXT NOT NULL,
+        duree INTEGER NOT NULL,
+        tranche_id INTEGER REFERENCES tranches(id),
+        PRIMARY KEY (dimension, duree)
+    ) WITHOUT ROWID''')
+    cursor.execute("DELETE FROM tranches_durees")
+    cursor.execute(f"""
+        WITH RECURSIVE durees(duree) AS (
+            SELECT 0
+            UNION ALL
+            SELECT duree + 1 FROM durees WHERE duree < {MAX_YEARS}
+        )
+        INSERT INTO tranches_durees (dimension, duree, tranche_id)
+        SELECT d.dimension, v.duree,
+               (SELECT t.id FROM tranches t
+                WHERE t.dimension = d.dimension AND v.duree BETWEEN t.debut AND t.fin)
+        FROM (SELECT DISTINCT dimension FROM tranches) d, durees v""")
+
+    # Fiches gendarmes avec l'âge et les années de service à la date du jour ; les
+    # valeurs enregistrées ne servent que si la date source est inconnue
+    joins = ''.join(
+        derived_tranche_joins(f'{column}_t', dimension,
+                              years_between_sql(f'g.{source}_jour', TODAY_DAY),
+                              f'g.{column}_tranche_id')
+        for column, source, dimension in DERIVED_YEARS)
+    derived = ', '.join(
+        f"COALESCE({column}_t_d.duree, g.{column}) AS {column}_actuel, {column}_t.id AS {column}_tranche_actuelle_id"
+        for column, _, _ in DERIVED_YEARS)
+    cursor.execute("DROP VIEW IF EXISTS gendarmes_actuels")
+    cursor.execute(f"""CREATE VIEW gendarmes_actuels AS
+        SELECT g.*, {derived}
+        FROM gendarmes g
+        {joins}""")
+
+
+def statut_gravite_sql(label):
+    """Gravité (GRAVITE_STATUTS) d'un libellé de statut de référence ; 0 pour un statut inconnu"""
+    whens = " ".join(f"WHEN '{statut}' THEN {gravite}" for statut, gravite in GRAVITE_STATUTS.items())
+    return f"(CASE {label} {whens} ELSE 0 END)"
+
+
+def gendarme_summary_sql(condition):
+    """SELECT des résumés disciplinaires des matricules de sanctions vérifiant condition"""
+    return f"""
+        SELECT s.matricule, COUNT(*), COUNT(DISTINCT s.numero_dossier),
+               MIN(s.date_faits), MAX(s.date_faits),
+               (SELECT st.libelle FROM sanctions w JOIN ref_statut st ON st.id = w.statut_id
+                WHERE w.matricule = s.matricule
+                ORDER BY {statut_gravite_sql('st.libelle')} DESC, w.date_faits DESC LIMIT 1),
+               COALESCE(SUM(s.taux_jar_jours), 0)
+        FROM sanctions s
+        WHERE s.matricule IS NOT NULL AND {condition}
+        GROUP BY s.matricule"""
+
+
+def gendarme_categories_sql(condition):
+    """SELECT du nombre de sanctions par catégorie des matricules de sanctions vérifiant condition"""
+    return f"""
+        SELECT s.matricule, s.categorie, COUNT(*)
+        FROM sanctions s
+        WHERE s.matricule IS NOT NULL AND s.categorie IS NOT NULL AND {condition}
+        GROUP BY s.matricule, s.categorie"""
+
+
+_SUMMARY_INSERT = ("INSERT INTO gendarmes_resume (matricule, nb_sanctions, nb_dossiers, premiere_date_faits, "
+                   "derniere_date_faits, pire_statut, jours_jar)")
+_CATEGORIES_INSERT = "INSERT INTO gendarmes_resume_categories (matricule, categorie, nombre)"
+
+
+def rebuild_gendarme_summaries(cursor):
+    """Recalcule tous les résumés disciplinaires depuis sanctions"""
+    cursor.execute("DELETE FROM gendarmes_resume")
+    cursor.execute("DELETE FROM gendarmes_resume_categories")
+    cursor.execute(_SUMMARY_INSERT + gendarme_summary_sql("1"))
+    cursor.execute(_CATEGORIES_INSERT + gendarme_categories_sql("1"))
+
+
+def _migration_013_gendarmes_resume(cursor):
+    """Résumé disciplinaire par matricule, tenu à jour par triggers, et index des récidives"""
+    # WITHOUT ROWID : la clé n'est pas un alias de rowid et accepte un matricule mal saisi (texte)
+    cursor.execute('''CREATE TABLE IF NOT EXISTS gendarmes_resume (
+        matricule INTEGER PRIMARY KEY,
+        nb_sanctions INTEGER NOT NULL,
+        nb_dossiers INTEGER NOT NULL,
+        premiere_date_faits DATE,
+        derniere_date_faits DATE,
+        pire_statut TEXT,
+        jours_jar REAL NOT NULL
+    ) WITHOUT ROWID''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS gendarmes_resume_categories (
+        matricule INTEGER NOT NULL,
+        categorie,
+        nombre INTEGER NOT NULL,
+        PRIMARY KEY (matricule, categorie)
+    ) WITHOUT ROWID''')
+    # Classement des plus sanctionnés et séries de sanctions par gendarme
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_gendarmes_resume_nb_sanctions
+        ON gendarmes_resume (nb_sanctions)""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_sanctions_matricule_date_faits
+        ON sanctions (matricule, date_faits)""")
+    rebuild_gendarme_summaries(cursor)
+
+    # Une écriture sur sanctions recalcule le résumé des matricules touchés (ancien et nouveau).
+    # statut_id et taux_jar_jours sont renseignés par leurs propres triggers après l'insertion :
+    # leur mise à jour relance le calcul.
+    events = {
+        'insert': ('INSERT', ('NEW',)),
+        'update': ('UPDATE OF matricule, numero_dossier, date_faits, categorie, statut_id, taux_jar_jours',
+                   ('OLD', 'NEW')),
+        'delete': ('DELETE', ('OLD',)),
+    }
+    for name, (event, rows) in events.items():
+        statements = []
+        for row in rows:
+            condition = f"s.matricule = {row}.matricule"
+            statements.append(f"DELETE FROM gendarmes_resume WHERE matricule = {row}.matricule;")
+            statements.append(f"DELETE FROM gendarmes_resume_categories WHERE matricule = {row}.matricule;")
+            statements.append(_SUMMARY_INSERT + gendarme_summary_sql(condition) + ";")
+            statements.append(_CATEGORIES_INSERT + gendarme_categories_sql(condition) + ";")
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_sanctions_{name}_gendarmes_resume
+            AFTER {event} ON sanctions
+            BEGIN
+                {' '.join(statements)}
+            END''')
+
+
+def _create_source_version_triggers(cursor):
+    """Triggers de source_version des tables sources et de référence (remplacés s'ils existent)"""
+    for table, columns in SOURCE_COLUMNS.items():
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            _create_source_version_trigger(cursor, table, event, columns if event == 'UPDATE' else None)
+    for dimension in REFERENCE_DIMENSIONS:
+        _create_source_version_trigger(cursor, f'ref_{dimension.name}', 'UPDATE', ('canonique_id', 'libelle'))
+
+
+def _migration_014_source_version_once(cursor):
+    """Triggers de source_version : les triggers en cascade d'une écriture ne l'incrémentent pas"""
+    _create_source_version_triggers(cursor)
+
+
+def _migration_015_ref_year_summaries(cursor):
+    """Un libellé ou un rattachement de référence modifié invalide les résumés annuels"""
+    # Les libellés de référence figurent dans toutes les années : tous les résumés sont supprimés,
+    # comme après une écriture sur gendarmes (un résumé partiel serait relu comme complet)
+    for dimension in REFERENCE_DIMENSIONS:
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_ref_{dimension.name}_update_year_summaries
+            AFTER UPDATE OF canonique_id, libelle ON ref_{dimension.name}
+            BEGIN
+                DELETE FROM year_summaries;
+            END''')
+    cursor.execute("DELETE FROM year_summaries")
+
+
+def _migration_016_reference_key_triggers(cursor):
+    """Triggers des clés de référence sans INSERT OR IGNORE (upsert d'une fiche existante)"""
+    for dimension in REFERENCE_DIMENSIONS:
+        _create_reference_key_triggers(cursor, dimension)
+
+
+def _migration_017_history_effect(cursor):
+    """Versions de fiche datées de la date des faits de l'affaire qui les a ouvertes"""
+    _create_history_triggers(cursor)
+
+
+def _migration_018_source_version_counter(cursor):
+    """source_version compte les écritures sources (clé des caches) : une par ligne écrite"""
+    _create_source_version_triggers(cursor)
+
+
+# (version, description, fonction)
+MIGRATIONS = [
+    (1, "Résumés annuels", _migration_001_year_summaries),
+    (2, "Index des tendances pluriannuelles", _migration_002_trend_indexes),
+    (3, "Cube statistique", _migration_003_stats_cube),
+    (4, "Jours d'arrêt numériques", _migration_004_taux_jar_jours),
+    (5, "En-têtes de dossier", _migration_005_dossiers),
+    (6, "Matricule unique des gendarmes", _migration_006_gendarmes_mle_unique),
+    (7, "Historique des fiches gendarmes", _migration_007_gendarmes_historique),
+    (8, "Pagination de la liste des sanctions", _migration_008_sanctions_pagination),
+    (9, "Tables de référence des dimensions", _migration_009_reference_tables),
+    (10, "Catalogue des valeurs des dimensions", _migration_010_dimension_catalog),
+    (11, "Tranches d'années de service et d'âge", _migration_011_tranches),
+    (12, "Âge et années de service calculés", _migration_012_derived_years),
+    (13, "Résumé disciplinaire des gendarmes", _migration_013_gendarmes_resume),
+    (14, "Incrémentation unique de source_version", _migration_014_source_version_once),
+    (15, "Résumés annuels invalidés par les tables de référence", _migration_015_ref_year_summaries),
+    (16, "Triggers des clés de référence", _migration_016_reference_key_triggers),
+    (17, "Date d'effet des versions de fiche", _migration_017_history_effect),
+    (18, "Compteur des écritures sources", _migration_018_source_version_counter),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+REQUIRED_TABLES = ('sanctions', 'gendarmes')
+
+
+def base_tables_exist(cursor):
+    """Vérifie que les tables de base (créées par create_tables) sont présentes"""
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM sqlite_master
+        WHERE type='table' AND name IN ({','.join('?' * len(REQUIRED_TABLES))})
+    """, REQUIRED_TABLES)
+    return cursor.fetchone()[0] == len(REQUIRED_TABLES)
+
+
+def reset_derived_data(cursor):
+    """Invalide les agrégats persistés (après recréation des tables de base)"""
+    cursor.execute("DELETE FROM year_summaries")
+    cursor.execute("DELETE FROM stats_cube")
+    cursor.execute("UPDATE stats_meta SET valeur = valeur + 1 WHERE cle = 'source_version'")
+
+
+def apply_migrations(conn, rerun=False):
+    """
+    Applique les migrations manquantes.
+
+    Args:
+        conn: Connexion SQLite
+        rerun: Rejoue toutes les migrations (après recréation des tables)
+
+    Returns:
+        La version du schéma après migration, None si les tables de base n'existent pas
+    """
+    cursor = conn.cursor()
+    if not base_tables_exist(cursor):
+        return None
+
+    cursor.execute("PRAGMA user_version")
+    current = 0 if rerun else cursor.fetchone()[0]
+
+    applied = False
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"Migration {version}: {description}")
+        migration(cursor)
+        cursor.execute(f"PRAGMA user_version = {version}")
+        applied = True
+
+    if applied:
+        # Colonnes dérivées recalculées sans passer par les triggers : caches invalidés
+        cursor.execute(SOURCE_VERSION_BUMP)
+
+    conn.commit()
+    return max(current, SCHEMA_VERSION)
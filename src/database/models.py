@@ -1,11 +1,135 @@
-from dataclasses import dataclass
+import base64
+import json
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import Optional, List
-from typing import Dict, List, Any
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union, get_args, get_origin
 
+from .catalog_service import DimensionCatalogService
+from .db_manager import FETCH_BATCH_SIZE, iter_rows
+from .reference_data import canonical_id_sql
 
-@dataclass
-class Gendarme:
+
+# Colonnes d'une fiche gendarme hors identifiant et matricule (clé unique)
+GENDARME_FIELDS = ('nom_prenoms', 'grade', 'sexe', 'date_naissance', 'age', 'unite', 'legions',
+                   'subdiv', 'regions', 'date_entree_gie', 'annee_service',
+                   'situation_matrimoniale', 'nb_enfants')
+
+
+def _to_int(value):
+    """Entier SQLite, texte '12' / '12.0' ou réel entier ; None sinon"""
+    if value is None or type(value) is int:
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def _to_float(value):
+    if value is None or type(value) is float:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_str(value):
+    """Texte ; une valeur NULL devient '' (valeur par défaut des champs texte)"""
+    if type(value) is str:
+        return value
+    return "" if value is None else str(value)
+
+
+_CONVERTERS = {int: _to_int, float: _to_float, str: _to_str}
+
+
+def _converter(annotation):
+    """Convertisseur d'un champ d'après son annotation (int, Optional[int], str...)"""
+    if get_origin(annotation) is Union:
+        annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), None)
+    return _CONVERTERS.get(annotation)
+
+
+def _identity(value):
+    return value
+
+
+class RowMapper:
+    """
+    Hydratation des lignes d'une requête en instances d'un modèle.
+
+    Le plan (position de chaque champ dans la ligne et convertisseur) est calculé
+    une fois par (modèle, colonnes du curseur) ; chaque ligne n'est ensuite qu'un
+    itemgetter et un appel positionnel au constructeur. Les colonnes sans champ
+    correspondant (ex. gendarme_version_id) sont ignorées ; les champs sans
+    colonne prennent leur valeur par défaut.
+    """
+
+    def __init__(self, model, column_names):
+        self.model = model
+        positions = {name: index for index, name in enumerate(column_names)}
+        indices, converters, defaults = [], [], []
+        for field in fields(model):
+            if not field.init:
+                continue
+            index = positions.get(field.name)
+            if index is None:
+                # Valeur par défaut placée après les colonnes de la ligne
+                index = len(column_names) + len(defaults)
+                defaults.append(field.default)
+                converters.append(_identity)
+            else:
+                converters.append(_converter(field.type) or _identity)
+            indices.append(index)
+        self._defaults = tuple(defaults)
+        self._converters = tuple(converters)
+        self._getter = itemgetter(*indices) if len(indices) > 1 else (lambda row: (row[indices[0]],))
+
+    def __call__(self, row):
+        values = self._getter(tuple(row) + self._defaults if self._defaults else row)
+        return self.model(*[convert(value) for convert, value in zip(self._converters, values)])
+
+    def map(self, rows: Iterable[tuple]) -> Iterator:
+        return map(self, rows)
+
+
+@lru_cache(maxsize=64)
+def row_mapper(model, column_names: tuple) -> RowMapper:
+    """RowMapper partagé pour un modèle et une liste de colonnes"""
+    return RowMapper(model, column_names)
+
+
+def cursor_columns(cursor) -> tuple:
+    return tuple(description[0] for description in cursor.description)
+
+
+class RecordMixin:
+    """Construction des modèles depuis des lignes SQLite (une ou plusieurs)"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_db_row(cls, row: tuple, column_names):
+        """Crée une instance à partir d'une ligne de la base de données"""
+        return row_mapper(cls, tuple(column_names))(row)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple], column_names) -> list:
+        """Crée les instances d'un lot de lignes avec un seul plan de correspondance"""
+        return list(row_mapper(cls, tuple(column_names)).map(rows))
+
+    def to_dict(self):
+        """Convertit l'instance en dictionnaire"""
+        return {field.name: getattr(self, field.name) for field in fields(self)
+                if field.name in self.DICT_FIELDS}
+
+
+@dataclass(slots=True)
+class Gendarme(RecordMixin):
     """Classe représentant un gendarme"""
     id: Optional[int] = None
     mle: str = ""
@@ -22,83 +146,37 @@ class Gendarme:
     annee_service: Optional[int] = None
     situation_matrimoniale: str = ""
     nb_enfants: Optional[int] = None
-    sanctions: List['Sanction'] = None
-
-    def __post_init__(self):
-        if self.sanctions is None:
-            self.sanctions = []
+    # Sanctions rattachées si l'appelant les charge (tuple vide partagé par défaut)
+    sanctions: tuple = ()
 
-    @classmethod
-    def from_db_row(cls, row: tuple, column_names: list):
-        """Crée une instance de Gendarme à partir d'une ligne de la base de données"""
-        data = dict(zip(column_names, row))
-        return cls(**data)
-
-    def to_dict(self):
-        """Convertit l'instance en dictionnaire"""
-        return {
-            'id': self.id,
-            'mle': self.mle,
-            'nom_prenoms': self.nom_prenoms,
-            'grade': self.grade,
-            'sexe': self.sexe,
-            'date_naissance': self.date_naissance,
-            'age': self.age,
-            'unite': self.unite,
-            'legions': self.legions,
-            'subdiv': self.subdiv,
-            'regions': self.regions,
-            'date_entree_gie': self.date_entree_gie,
-            'annee_service': self.annee_service,
-            'situation_matrimoniale': self.situation_matrimoniale,
-            'nb_enfants': self.nb_enfants
-        }
+    DICT_FIELDS = ('id', 'mle') + GENDARME_FIELDS
 
 
-@dataclass
-class Sanction:
+@dataclass(slots=True)
+class Sanction(RecordMixin):
     """Classe représentant une sanction"""
     id: Optional[int] = None
     numero_dossier: str = ""
     annee_punition: Optional[int] = None
-    numero_ordre: int = ""
+    numero_ordre: Optional[int] = None
     date_enr: str = ""
-    matricule: int = ""
+    matricule: Optional[int] = None
     faute_commise: str = ""
     date_faits: str = ""
-    numero_cat: str = ""
+    categorie: Optional[int] = None
     statut: str = ""
     reference_statut: str = ""
-    taux_jar: Optional[int] = None
-    comite: str = ""
+    # Texte saisi ('20', '20 JOURS'...) et sa valeur numérique (colonne taux_jar_jours)
+    taux_jar: str = ""
+    taux_jar_jours: Optional[float] = None
+    comite: Optional[int] = None
     annee_faits: Optional[int] = None
     numero_decision: str = ""
 
-    @classmethod
-    def from_db_row(cls, row: tuple, column_names: list):
-        """Crée une instance de Sanction à partir d'une ligne de la base de données"""
-        data = dict(zip(column_names, row))
-        return cls(**data)
-
-    def to_dict(self):
-        """Convertit l'instance en dictionnaire"""
-        return {
-            'id': self.id,
-            'numero_dossier': self.numero_dossier,
-            'annee_punition': self.annee_punition,
-            'numero_ordre': self.numero_ordre,
-            'date_enr': self.date_enr,
-            'matricule': self.matricule,
-            'faute_commise': self.faute_commise,
-            'date_faits': self.date_faits,
-            'numero_cat': self.numero_cat,
-            'statut': self.statut,
-            'reference_statut': self.reference_statut,
-            'taux_jar': self.taux_jar,
-            'comite': self.comite,
-            'annee_faits': self.annee_faits,
-            'numero_decision': self.numero_decision
-        }
+    DICT_FIELDS = ('id', 'numero_dossier', 'annee_punition', 'numero_ordre', 'date_enr',
+                   'matricule', 'faute_commise', 'date_faits', 'categorie', 'statut',
+                   'reference_statut', 'taux_jar', 'taux_jar_jours', 'comite', 'annee_faits',
+                   'numero_decision')
 
 
 class GendarmeRepository:
@@ -109,11 +187,14 @@ class GendarmeRepository:
 
     def get_all(self) -> List[Gendarme]:
         """Récupère tous les gendarmes"""
+        return list(self.iter_all())
+
+    def iter_all(self, batch_size: int = FETCH_BATCH_SIZE) -> Iterator[Gendarme]:
+        """Parcourt tous les gendarmes par lots (fetchmany), le premier arrive sans attendre le dernier"""
         with self.db_manager.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM gendarmes ORDER BY nom_prenoms")
-            columns = [description[0] for description in cursor.description]
-            return [Gendarme.from_db_row(row, columns) for row in cursor.fetchall()]
+            yield from row_mapper(Gendarme, cursor_columns(cursor)).map(iter_rows(cursor, batch_size))
 
     def get_by_mle(self, mle: str) -> Optional[Gendarme]:
         """Récupère un gendarme par son matricule"""
@@ -122,8 +203,7 @@ class GendarmeRepository:
             cursor.execute("SELECT * FROM gendarmes WHERE mle = ?", (mle,))
             row = cursor.fetchone()
             if row:
-                columns = [description[0] for description in cursor.description]
-                return Gendarme.from_db_row(row, columns)
+                return Gendarme.from_db_row(row, cursor_columns(cursor))
         return None
 
     def get_by_name(self, name: str) -> List[Gendarme]:
@@ -131,8 +211,32 @@ class GendarmeRepository:
         with self.db_manager.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM gendarmes WHERE nom_prenoms LIKE ?", (f"%{name}%",))
-            columns = [description[0] for description in cursor.description]
-            return [Gendarme.from_db_row(row, columns) for row in cursor.fetchall()]
+            return Gendarme.from_rows(cursor.fetchall(), cursor_columns(cursor))
+
+    @staticmethod
+    def upsert(cursor, data: Dict[str, Any], valide_du: Optional[str] = None):
+        """
+        Crée la fiche du matricule data['mle'] ou met à jour la fiche existante
+        (index unique idx_gendarmes_mle). Une valeur NULL ne remplace pas l'existant.
+        valide_du : date (ISO) d'effet d'une modification historisée, en général la date
+        des faits de l'affaire saisie ; à défaut la version est datée du jour.
+
+        Utilise le curseur de l'appelant : l'écriture fait partie de sa transaction.
+        """
+        fields = [name for name in GENDARME_FIELDS if name in data]
+        columns = ['mle'] + fields
+        updates = ", ".join(f"{name} = COALESCE(excluded.{name}, {name})" for name in fields)
+        if valide_du:
+            # Lue par les triggers d'historique (history_effect_sql)
+            cursor.execute("INSERT OR REPLACE INTO gendarmes_historique_effet (mle, valide_du) VALUES (?, ?)",
+                           (data['mle'], valide_du))
+        cursor.execute(f"""
+            INSERT INTO gendarmes ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT(mle) DO UPDATE SET {updates}
+        """, [data[name] for name in columns])
+        if valide_du:
+            cursor.execute("DELETE FROM gendarmes_historique_effet WHERE mle = ?", (data['mle'],))
 
 
 class SanctionRepository:
@@ -150,8 +254,7 @@ class SanctionRepository:
                 WHERE matricule = ? 
                 ORDER BY date_faits DESC
             """, (gendarme_id,))
-            columns = [description[0] for description in cursor.description]
-            return [Sanction.from_db_row(row, columns) for row in cursor.fetchall()]
+            return Sanction.from_rows(cursor.fetchall(), cursor_columns(cursor))
 
     def get_statistics(self) -> dict:
         """Récupère des statistiques sur les sanctions"""
@@ -175,6 +278,36 @@ class SanctionRepository:
             return stats
 
 
+# Ordre stable de la liste des sanctions (index idx_sanctions_date_faits)
+FULL_LIST_ORDER = "COALESCE(s.date_faits, '') DESC, s.id DESC"
+
+# Colonnes par défaut de la liste des sanctions. Alias disponibles : s (sanction),
+# g (fiche gendarme actuelle, vue gendarmes_actuels) et les libellés de référence
+# f (faute), st (statut), gr (grade), sd (subdivision)
+FULL_LIST_COLUMNS = ('s.matricule', 'g.nom_prenoms', 'g.grade', 'g.regions', 's.date_faits',
+                     's.faute_commise', 's.categorie', 's.statut')
+
+
+def _encode_page_token(date_faits: str, sanction_id: int) -> str:
+    """Jeton opaque de la dernière ligne d'une page"""
+    return base64.urlsafe_b64encode(json.dumps([date_faits, sanction_id]).encode()).decode()
+
+
+def _decode_page_token(token: str) -> list:
+    try:
+        date_faits, sanction_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return [str(date_faits), int(sanction_id)]
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Jeton de pagination invalide : {token}") from e
+
+
+@dataclass
+class SanctionsPage:
+    """Page de la liste des sanctions et jeton de la page suivante (None sur la dernière)"""
+    rows: List[tuple]
+    next_token: Optional[str] = None
+
+
 @dataclass
 class StatisticsData:
     """Classe pour stocker les données statistiques"""
@@ -241,67 +374,132 @@ class StatisticsRepository:
                 data=results
             )
 
-    def get_sanctions_full_list(self, filters: Dict[str, Any] = None) -> List[tuple]:
+    def get_sanctions_full_list(self, filters: Dict[str, Any] = None,
+                                columns: Sequence[str] = FULL_LIST_COLUMNS) -> List[tuple]:
         """Récupère la liste complète des sanctions avec filtres optionnels"""
+        return list(self.iter_sanctions_full_list(filters, columns=columns))
+
+    def iter_sanctions_full_list(self, filters: Dict[str, Any] = None, batch_size: int = FETCH_BATCH_SIZE,
+                                 columns: Sequence[str] = FULL_LIST_COLUMNS) -> Iterator[tuple]:
+        """Même liste que get_sanctions_full_list, lue par lots (fetchmany)"""
+        query, params = self._full_list_query(filters, columns)
         with self.db_manager.get_connection() as conn:
             cursor = conn.cursor()
-            query = """
-                SELECT 
-                    s.matricule,
-                    g.nom_prenoms,
-                    g.grade,
-                    g.regions,
-                    s.date_faits,
-                    s.faute_commise,
-                    s.categorie,
-                    s.statut
-                FROM sanctions s
-                LEFT JOIN gendarmes g ON CAST(s.matricule AS TEXT) = g.mle
-                WHERE 1=1
-            """
-            params = []
-
-            if filters:
-                if filters.get('grade'):
-                    query += " AND g.grade = ?"
-                    params.append(filters['grade'])
-                if filters.get('region'):
-                    query += " AND g.regions = ?"
-                    params.append(filters['region'])
-                if filters.get('year'):
-                    query += " AND s.annee_punition = ?"
-                    params.append(filters['year'])
-                if filters.get('matricule'):
-                    query += " AND s.matricule LIKE ?"
-                    params.append(f"%{filters['matricule']}%")
-                if filters.get('categorie'):
-                    query += " AND s.categorie = ?"
-                    params.append(filters['categorie'])
-
-            query += " ORDER BY s.date_faits DESC"
-            cursor.execute(query, params)
-            return cursor.fetchall()
+            cursor.execute(f"{query} ORDER BY {FULL_LIST_ORDER}", params)
+            for row in iter_rows(cursor, batch_size):
+                yield row[:-2]
+
+    def get_sanctions_page(self, filters: Dict[str, Any] = None, page_size: int = FETCH_BATCH_SIZE,
+                           token: Optional[str] = None,
+                           columns: Sequence[str] = FULL_LIST_COLUMNS) -> SanctionsPage:
+        """
+        Page de la liste des sanctions, pagination par clé sur (date_faits, id).
+
+        Args:
+            filters: Mêmes filtres que get_sanctions_full_list
+            page_size: Nombre de lignes de la page
+            token: next_token de la page précédente (None pour la première page)
+            columns: Colonnes des lignes (FULL_LIST_COLUMNS par défaut)
+
+        Returns:
+            SanctionsPage ; next_token vaut None sur la dernière page
+        """
+        query, params = self._full_list_query(filters, columns)
+        if token:
+            # Lignes strictement après la dernière ligne de la page précédente (ordre décroissant)
+            query += " AND (COALESCE(s.date_faits, ''), s.id) < (?, ?)"
+            params.extend(_decode_page_token(token))
 
-    def get_available_filters(self) -> Dict[str, List[str]]:
-        """Récupère les valeurs disponibles pour les filtres"""
-        filters = {}
         with self.db_manager.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(f"{query} ORDER BY {FULL_LIST_ORDER} LIMIT ?", params + [page_size + 1])
+            rows = cursor.fetchall()
+
+        next_token = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_token = _encode_page_token(rows[-1][-2], rows[-1][-1])
+        return SanctionsPage(rows=[row[:-2] for row in rows], next_token=next_token)
+
+    def count_sanctions_full_list(self, filters: Dict[str, Any] = None) -> int:
+        """Nombre de lignes de la liste des sanctions pour ces filtres"""
+        query, params = self._full_list_query(filters, ('1',))
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM ({query})", params)
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _full_list_query(filters: Dict[str, Any] = None, columns: Sequence[str] = FULL_LIST_COLUMNS):
+        """
+        Requête (sans ORDER BY) et paramètres de la liste des sanctions ; les deux
+        dernières colonnes sont la clé de pagination (date_faits normalisée, id).
+
+        Filtres : grade, region, subdiv, faute et statut (toutes les orthographes de la
+        valeur de référence), year, categorie, situation, service (code de tranche des
+        années de service à ce jour, '0-5'), matricule et nom (recherche partielle),
+        avec_fiche (sanctions rattachées à une fiche gendarme).
+        """
+        query = f"""
+            SELECT {', '.join(columns)}, COALESCE(s.date_faits, '') AS cle_date, s.id
+            FROM sanctions s
+            LEFT JOIN gendarmes_actuels g ON CAST(s.matricule AS TEXT) = g.mle
+            LEFT JOIN ref_faute f ON f.id = s.faute_id
+            LEFT JOIN ref_statut st ON st.id = s.statut_id
+            LEFT JOIN ref_grade gr ON gr.id = g.grade_id
+            LEFT JOIN ref_subdiv sd ON sd.id = g.subdiv_id
+            WHERE 1=1
+        """
+        params = []
+
+        if filters:
+            # Valeurs de référence : toutes les orthographes rattachées
+            for name, column in (('grade', 'g.grade_id'), ('region', 'g.region_id'), ('subdiv', 'g.subdiv_id'),
+                                 ('faute', 's.faute_id'), ('statut', 's.statut_id')):
+                if filters.get(name):
+                    query += f" AND {column} = {canonical_id_sql(name, '?')}"
+                    params.append(filters[name])
+            if filters.get('year'):
+                query += " AND s.annee_punition = ?"
+                params.append(filters['year'])
+            if filters.get('categorie'):
+                query += " AND s.categorie = ?"
+                params.append(filters['categorie'])
+            if filters.get('situation'):
+                query += " AND g.situation_matrimoniale = ?"
+                params.append(filters['situation'])
+            if filters.get('service'):
+                query += """ AND g.annee_service_tranche_actuelle_id =
+                    (SELECT id FROM tranches WHERE dimension = 'service' AND code = ?)"""
+                params.append(filters['service'])
+            if filters.get('matricule'):
+                query += " AND s.matricule LIKE ?"
+                params.append(f"%{filters['matricule']}%")
+            if filters.get('nom'):
+                query += " AND g.nom_prenoms LIKE ?"
+                params.append(f"%{filters['nom']}%")
+            if filters.get('avec_fiche'):
+                query += " AND g.mle IS NOT NULL"
+
+        return query, params
+
+    def fetch_columns(self, query: str, params=(), kinds: Dict[str, str] = None) -> Dict[str, Any]:
+        """
+        Résultat de query en colonnes numpy (codes pour les textes, int64 / float64
+        avec masque des valeurs nulles pour les nombres), voir columnar_fetch.
+        """
+        # numpy n'est chargé qu'à la première extraction en colonnes
+        from .columnar_fetch import fetch_columns
 
-            # Grades
-            cursor.execute("SELECT DISTINCT grade FROM gendarmes ORDER BY grade")
-            filters['grades'] = [row[0] for row in cursor.fetchall() if row[0]]
-
-            # Régions
-            cursor.execute("SELECT DISTINCT regions FROM gendarmes ORDER BY regions")
-            filters['regions'] = [row[0] for row in cursor.fetchall() if row[0]]
-
-            # Années
-            cursor.execute("SELECT DISTINCT annee_punition FROM sanctions ORDER BY annee_punition DESC")
-            filters['years'] = [row[0] for row in cursor.fetchall() if row[0]]
-
-            # Catégories de sanctions
-            cursor.execute("SELECT DISTINCT categorie FROM sanctions ORDER BY categorie")
-            filters['categories'] = [row[0] for row in cursor.fetchall() if row[0]]
+        with self.db_manager.get_connection() as conn:
+            return fetch_columns(conn.cursor(), query, params, kinds)
 
-            return filters
\ No newline at end of file
+    def get_available_filters(self) -> Dict[str, List[str]]:
+        """Valeurs disponibles pour les filtres (catalogue en mémoire, sans parcours des tables)"""
+        catalog = DimensionCatalogService.for_db(self.db_manager)
+        return {
+            'grades': catalog.values('grade'),
+            'regions': catalog.values('regions'),
+            'years': [year for year in catalog.values('annee_punition', descending=True) if year],
+            'categories': [categorie for categorie in catalog.values('categorie') if categorie],
+        }
\ No newline at end of file
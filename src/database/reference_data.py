@@ -0,0 +1,185 @@
+"""
+Tables de référence des dimensions textuelles (faute, statut, grade, unités...).
+
+Chaque table ref_<dimension> contient une ligne par orthographe rencontrée ;
+canonique_id désigne la valeur de référence à laquelle l'orthographe est
+rattachée (elle-même pour une valeur de la liste de référence ou une valeur
+non rapprochée). Les colonnes <dimension>_id de sanctions et gendarmes portent
+l'identifiant canonique : les regroupements se font sur des entiers et les
+variantes d'écriture ne scindent plus les statistiques.
+"""
+import unicodedata
+from collections import namedtuple
+from difflib import get_close_matches
+
+from src.data.gendarmerie.structure import (FAUTES_COMMISES, GRADES, STATUTS_DOSSIER, STRUCTURE_UNITE,
+                                            SUBDIVISIONS, get_all_unit_names)
+
+ReferenceDimension = namedtuple('ReferenceDimension', 'name table column')
+
+# Dimension -> table source et colonne texte (la clé étrangère est <name>_id)
+REFERENCE_DIMENSIONS = (
+    ReferenceDimension('faute', 'sanctions', 'faute_commise'),
+    ReferenceDimension('statut', 'sanctions', 'statut'),
+    ReferenceDimension('grade', 'gendarmes', 'grade'),
+    ReferenceDimension('unite', 'gendarmes', 'unite'),
+    ReferenceDimension('legion', 'gendarmes', 'legions'),
+    ReferenceDimension('subdiv', 'gendarmes', 'subdiv'),
+    ReferenceDimension('region', 'gendarmes', 'regions'),
+)
+
+# Rapprochement approché : seuil de similarité (difflib) des libellés normalisés
+FUZZY_CUTOFF = 0.9
+
+UnmappedValue = namedtuple('UnmappedValue', 'dimension libelle occurrences')
+
+
+def _legions(structure):
+    return [legion for region_data in structure["REGIONS"].values()
+            for subdivision_data in region_data.values() for legion in subdivision_data]
+
+
+def reference_values():
+    """Listes de référence par dimension (ordre de structure.py, sans doublon)"""
+    values = {
+        'faute': FAUTES_COMMISES,
+        'statut': STATUTS_DOSSIER,
+        'grade': GRADES,
+        'unite': get_all_unit_names(STRUCTURE_UNITE),
+        'legion': _legions(STRUCTURE_UNITE),
+        'subdiv': SUBDIVISIONS,
+        'region': list(STRUCTURE_UNITE["REGIONS"]),
+    }
+    return {name: list(dict.fromkeys(labels)) for name, labels in values.items()}
+
+
+def normalize_label(value):
+    """Clé de comparaison : majuscules sans accents, ponctuation et espaces réduits à un espace"""
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).upper()
+    return ' '.join(''.join(c if c.isalnum() else ' ' for c in text).split())
+
+
+def match_reference(value, references):
+    """
+    Valeur de référence correspondant à une orthographe, None si aucune.
+
+    Égalité des libellés normalisés, puis rapprochement approché des fautes de
+    frappe. Les libellés contenant des chiffres (1° LGT, 10° LGT...) ne sont
+    rapprochés qu'à l'identique : un chiffre près, ce n'est pas la même unité.
+    """
+    by_key = {normalize_label(reference): reference for reference in references}
+    key = normalize_label(value)
+    if key in by_key:
+        return by_key[key]
+    if not key or any(c.isdigit() for c in key):
+        return None
+    candidates = [k for k in by_key if not any(c.isdigit() for c in k)]
+    matches = get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+    return by_key[matches[0]] if matches else None
+
+
+def canonical_id_sql(name, value):
+    """Sous-requête : identifiant canonique de l'orthographe value"""
+    return f"(SELECT canonique_id FROM ref_{name} WHERE libelle = {value})"
+
+
+def canonical_label_join(name, alias, value):
+    """
+    Jointures du libellé de référence de l'orthographe value (une recherche par l'index
+    unique de libelle, puis par clé) : libellé COALESCE({alias}.libelle, value)
+    """
+    return f"""
+    LEFT JOIN ref_{name} {alias}_v ON {alias}_v.libelle = {value}
+    LEFT JOIN ref_{name} {alias} ON {alias}.id = {alias}_v.canonique_id"""
+
+
+def register_statements(name, value):
+    """
+    Corps de trigger : enregistre une orthographe inconnue, rattachée à la valeur de
+    référence de même libellé en majuscules sans espaces de bord, non rapprochée sinon
+    (le rapprochement complet est celui de map_reference_values).
+
+    Pas de INSERT OR IGNORE : dans un trigger, la politique de conflit de l'instruction
+    appelante l'emporte (un INSERT ... ON CONFLICT DO UPDATE échouerait sur un libellé connu).
+    """
+    return f"""
+        INSERT INTO ref_{name} (libelle) SELECT {value}
+        WHERE {value} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM ref_{name} WHERE libelle = {value});
+        UPDATE ref_{name}
+        SET canonique_id = COALESCE((SELECT r.id FROM ref_{name} r
+                                     WHERE r.reference = 1 AND r.libelle = UPPER(TRIM({value}))), id)
+        WHERE libelle = {value} AND canonique_id IS NULL;
+    """
+
+
+def create_reference_tables(cursor):
+    """Tables ref_<dimension> (une ligne par orthographe)"""
+    for dimension in REFERENCE_DIMENSIONS:
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS ref_{dimension.name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            libelle TEXT NOT NULL UNIQUE,
+            canonique_id INTEGER REFERENCES ref_{dimension.name}(id),
+            reference INTEGER NOT NULL DEFAULT 0
+        )''')
+
+
+def map_reference_values(cursor):
+    """
+    Enregistre les listes de référence, y rattache les orthographes présentes
+    en base et renseigne les colonnes <dimension>_id.
+
+    Returns:
+        Nombre d'orthographes rattachées à une valeur de référence
+    """
+    references = reference_values()
+    mapped = 0
+    for dimension in REFERENCE_DIMENSIONS:
+        name, column = dimension.name, dimension.column
+        labels = [(label,) for label in references[name]]
+        cursor.executemany(f"INSERT OR IGNORE INTO ref_{name} (libelle) VALUES (?)", labels)
+        cursor.executemany(f"UPDATE ref_{name} SET reference = 1, canonique_id = id WHERE libelle = ?",
+                           labels)
+        cursor.execute(f"""INSERT OR IGNORE INTO ref_{name} (libelle)
+            SELECT DISTINCT {column} FROM {dimension.table} WHERE {column} IS NOT NULL""")
+
+        cursor.execute(f"SELECT libelle FROM ref_{name} WHERE reference = 0")
+        for (libelle,) in cursor.fetchall():
+            target = match_reference(libelle, references[name])
+            if target is None:
+                cursor.execute(f"UPDATE ref_{name} SET canonique_id = id WHERE libelle = ?", (libelle,))
+            else:
+                cursor.execute(f"""UPDATE ref_{name}
+                    SET canonique_id = (SELECT id FROM ref_{name} WHERE libelle = ?)
+                    WHERE libelle = ?""", (target, libelle))
+                mapped += 1
+
+        cursor.execute(f"""UPDATE {dimension.table} SET {name}_id = {canonical_id_sql(name, column)}
+            WHERE {name}_id IS NOT {canonical_id_sql(name, column)}""")
+    return mapped
+
+
+def unmapped_values(cursor):
+    """Orthographes rattachées à aucune valeur de référence, avec leur nombre d'occurrences"""
+    report = []
+    for dimension in REFERENCE_DIMENSIONS:
+        cursor.execute(f"""
+            SELECT r.libelle, COUNT(t.{dimension.name}_id)
+            FROM ref_{dimension.name} r
+            LEFT JOIN {dimension.table} t ON t.{dimension.name}_id = r.id
+            WHERE r.reference = 0 AND r.canonique_id = r.id
+            GROUP BY r.id
+            ORDER BY 2 DESC, 1
+        """)
+        report.extend(UnmappedValue(dimension.name, libelle, count) for libelle, count in cursor.fetchall())
+    return report
+
+
+def print_unmapped_report(report):
+    """Affiche le rapport des valeurs non rapprochées (console)"""
+    if not report:
+        print("Tables de référence : toutes les valeurs sont rapprochées")
+        return
+    print(f"Tables de référence : {len(report)} valeur(s) non rapprochée(s)")
+    for value in report:
+        print(f"  {value.dimension:<8} | {value.libelle} ({value.occurrences})")
@@ -2,6 +2,8 @@ from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit
     QPushButton, QMessageBox
 from PyQt6.QtCore import Qt, pyqtSignal
 
+from src.analytics.cube_maintenance import CubeDeltaTracker
+
 
 class DeleteCaseDialog(QDialog):
     case_deleted = pyqtSignal()  # Signal émis quand un dossier est supprimé
@@ -112,12 +114,22 @@ class DeleteCaseDialog(QDialog):
                 with self.db_manager.get_connection() as conn:
                     cursor = conn.cursor()
 
-                    for _, numero_dossier in selected_rows:
-                        # Supprimer les enregistrements liés au dossier
-                        cursor.execute(
-                            "DELETE FROM sanctions WHERE numero_dossier = ?",
-                            (numero_dossier,)
-                        )
+                    # Matricules concernés : le cube statistique est ajusté dans la même transaction
+                    numeros = [numero_dossier for _, numero_dossier in selected_rows]
+                    cursor.execute(
+                        f"SELECT DISTINCT matricule FROM sanctions "
+                        f"WHERE numero_dossier IN ({', '.join('?' * len(numeros))})",
+                        numeros
+                    )
+                    matricules = [row[0] for row in cursor.fetchall()]
+
+                    with CubeDeltaTracker(conn, matricules):
+                        for numero_dossier in numeros:
+                            # Supprimer les enregistrements liés au dossier
+                            cursor.execute(
+                                "DELETE FROM sanctions WHERE numero_dossier = ?",
+                                (numero_dossier,)
+                            )
 
                     conn.commit()
 
@@ -10,6 +10,7 @@ from PyQt6.QtGui import QFont, QColor, QIcon
 
 from src.data.gendarmerie import STRUCTURE_PRINCIPALE
 from src.ui.styles.styles import Styles
+from src.analytics.cube_maintenance import CubeDeltaTracker
 
 
 #pour la recherche d'unité
@@ -188,12 +189,12 @@ class SearchMatriculeDialog(QDialog):
         try:
             with self.db_manager.get_connection() as conn:
                 cursor = conn.cursor()
-                # Vérifier dans les deux tables
+                # Gendarme ayant au moins une sanction : lecture par clé du résumé disciplinaire
                 cursor.execute("""
-                    SELECT s.matricule 
-                    FROM sanctions s
-                    JOIN gendarmes g ON s.matricule = g.mle
-                    WHERE s.matricule = ?
+                    SELECT r.matricule
+                    FROM gendarmes_resume r
+                    JOIN gendarmes g ON CAST(g.mle AS INTEGER) = r.matricule
+                    WHERE r.matricule = ?
                 """, (matricule,))
 
                 result = cursor.fetchone()
@@ -1073,71 +1074,73 @@ class EditCaseForm(QMainWindow):
             with self.db_manager.get_connection() as conn:
                 cursor = conn.cursor()
 
-                # 1. Mise à jour de la table sanctions
-                cursor.execute("""
-                    UPDATE sanctions SET
-                        numero_dossier = ?,
-                        annee_punition = ?,
-                        numero_ordre = ?,
-                        date_enr = ?,
-                        faute_commise = ?,
-                        date_faits = ?,
-                        categorie = ?,
-                        statut = ?,
-                        reference_statut = ?,
-                        taux_jar = ?,
-                        comite = ?,
-                        annee_faits = ?
-                    WHERE matricule = ?
-                """, (
-                    form_data['numero_dossier'],
-                    form_data['annee_punition'],
-                    form_data['numero_ordre'],
-                    form_data['date_enr'],
-                    form_data['faute_commise'],
-                    form_data['date_faits'],
-                    form_data['categorie'],
-                    form_data['statut'],
-                    form_data['reference_statut'],
-                    form_data['taux_jar'],
-                    form_data['comite'],
-                    form_data['annee_faits'],
-                    form_data['matricule']
-                ))
-
-                # 2. Mise à jour de la table gendarmes
-                cursor.execute("""
-                    UPDATE gendarmes SET
-                        nom_prenoms = ?,
-                        grade = ?,
-                        sexe = ?,
-                        date_naissance = ?,
-                        age = ?,
-                        unite = ?,
-                        legions = ?,
-                        subdiv = ?,
-                        regions = ?,
-                        date_entree_gie = ?,
-                        annee_service = ?,
-                        situation_matrimoniale = ?,
-                        nb_enfants = ?
-                    WHERE mle = ?
-                """, (
-                    form_data['nom_prenoms'],
-                    form_data['grade'],
-                    form_data['sexe'],
-                    form_data['date_naissance'],
-                    form_data['age'],
-                    form_data['unite'],
-                    form_data['legions'],
-                    form_data['subdiv'],
-                    form_data['regions'],
-                    form_data['date_entree_gie'],
-                    form_data['annee_service'],
-                    form_data['situation_matrimoniale'],
-                    form_data['nb_enfants'],
-                    form_data['mle']
-                ))
+                # Le cube statistique est ajusté dans la même transaction
+                with CubeDeltaTracker(conn, [form_data['matricule']]):
+                    # 1. Mise à jour de la table sanctions
+                    cursor.execute("""
+                        UPDATE sanctions SET
+                            numero_dossier = ?,
+                            annee_punition = ?,
+                            numero_ordre = ?,
+                            date_enr = ?,
+                            faute_commise = ?,
+                            date_faits = ?,
+                            categorie = ?,
+                            statut = ?,
+                            reference_statut = ?,
+                            taux_jar = ?,
+                            comite = ?,
+                            annee_faits = ?
+                        WHERE matricule = ?
+                    """, (
+                        form_data['numero_dossier'],
+                        form_data['annee_punition'],
+                        form_data['numero_ordre'],
+                        form_data['date_enr'],
+                        form_data['faute_commise'],
+                        form_data['date_faits'],
+                        form_data['categorie'],
+                        form_data['statut'],
+                        form_data['reference_statut'],
+                        form_data['taux_jar'],
+                        form_data['comite'],
+                        form_data['annee_faits'],
+                        form_data['matricule']
+                    ))
+
+                    # 2. Mise à jour de la table gendarmes
+                    cursor.execute("""
+                        UPDATE gendarmes SET
+                            nom_prenoms = ?,
+                            grade = ?,
+                            sexe = ?,
+                            date_naissance = ?,
+                            age = ?,
+                            unite = ?,
+                            legions = ?,
+                            subdiv = ?,
+                            regions = ?,
+                            date_entree_gie = ?,
+                            annee_service = ?,
+                            situation_matrimoniale = ?,
+                            nb_enfants = ?
+                        WHERE mle = ?
+                    """, (
+                        form_data['nom_prenoms'],
+                        form_data['grade'],
+                        form_data['sexe'],
+                        form_data['date_naissance'],
+                        form_data['age'],
+                        form_data['unite'],
+                        form_data['legions'],
+                        form_data['subdiv'],
+                        form_data['regions'],
+                        form_data['date_entree_gie'],
+                        form_data['annee_service'],
+                        form_data['situation_matrimoniale'],
+                        form_data['nb_enfants'],
+                        form_data['mle']
+                    ))
 
                 conn.commit()
 
@@ -12,7 +12,8 @@ from src.data.gendarmerie.structure import (get_all_unit_names, get_unit_by_name
                                             get_all_legions, Unit)
 from src.ui.styles.styles import Styles  # On va ajouter des styles dédiés
 from src.ui.forms.unit_search_dialog import UnitSearchDialog
-from src.ui.windows.statistics import StatistiquesWindow
+from src.analytics.cube_maintenance import CubeDeltaTracker
+from src.database.models import GENDARME_FIELDS, GendarmeRepository
 
 
 class NewCaseForm(QMainWindow):
@@ -935,7 +936,7 @@ class NewCaseForm(QMainWindow):
             form_data = {
                 'numero_dossier': self.num_dossier.text(),
                 'annee_punition': int(self.annee_punition.text()),
-                'date_enr': self.date_enr.date().toString("dd/MM/yyyy"),
+                'date_enr': self.date_enr.date().toString("yyyy-MM-dd"),
                 'numero_ordre': int(self.num_enr.text()),
                 'matricule': int(self.matricule.text()),
                 'mle': self.matricule.text(),
@@ -952,7 +953,7 @@ class NewCaseForm(QMainWindow):
                 'annee_service': self.annee_service.value(),
                 'situation_matrimoniale': self.situation_matrimoniale.currentText(),
                 'nb_enfants': self.nb_enfants.value(),
-                'date_faits': self.date_faits.date().toString("dd/MM/yyyy"),
+                'date_faits': self.date_faits.date().toString("yyyy-MM-dd"),
                 'faute_commise': self.faute_commise.currentText(),
                 'categorie': self.categorie.text(),
                 'statut': self.statut.currentText(),
@@ -973,50 +974,36 @@ class NewCaseForm(QMainWindow):
                                         f"Le numéro de dossier {form_data['numero_dossier']} existe déjà.")
                     return
 
-                cursor.execute("""
-                    INSERT INTO sanctions (
-                        numero_dossier, annee_punition, numero_ordre, date_enr,
-                        matricule, faute_commise, date_faits, categorie,
-                        statut, reference_statut, taux_jar, comite, annee_faits, 'numero_decision'
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    form_data['numero_dossier'],
-                    form_data['annee_punition'],
-                    form_data['date_enr'],
-                    form_data['numero_ordre'],
-                    form_data['matricule'],
-                    form_data['date_faits'],
-                    form_data['faute_commise'],
-                    form_data['categorie'],
-                    form_data['statut'],
-                    form_data['reference_statut'],
-                    form_data['taux_jar'],
-                    form_data['comite'],
-                    form_data['annee_faits'],
-                    form_data['numero_decision']
-                ))
-
-                cursor.execute("""
-                    INSERT INTO gendarmes (
-                        mle, nom_prenoms, grade, age, date_naissance, unite, legions, subdiv,
-                        regions, date_entree_gie, annee_service, situation_matrimoniale,
-                        nb_enfants
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    form_data['mle'],
-                    form_data['nom_prenoms'],
-                    form_data['grade'],
-                    form_data['age'],
-                    form_data['date_naissance'],
-                    form_data['unite'],
-                    form_data['legions'],
-                    form_data['subdiv'],
-                    form_data['regions'],
-                    form_data['date_entree_gie'],
-                    form_data['annee_service'],
-                    form_data['situation_matrimoniale'],
-                    form_data['nb_enfants']
-                ))
+                # Le cube statistique est ajusté dans la même transaction
+                with CubeDeltaTracker(conn, [form_data['matricule']]):
+                    cursor.execute("""
+                        INSERT INTO sanctions (
+                            numero_dossier, annee_punition, numero_ordre, date_enr,
+                            matricule, faute_commise, date_faits, categorie,
+                            statut, reference_statut, taux_jar, comite, annee_faits, numero_decision
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        form_data['numero_dossier'],
+                        form_data['annee_punition'],
+                        form_data['numero_ordre'],
+                        form_data['date_enr'],
+                        form_data['matricule'],
+                        form_data['faute_commise'],
+                        form_data['date_faits'],
+                        form_data['categorie'],
+                        form_data['statut'],
+                        form_data['reference_statut'],
+                        form_data['taux_jar'],
+                        form_data['comite'],
+                        form_data['annee_faits'],
+                        form_data['numero_decision']
+                    ))
+
+                    # Une seule fiche par matricule : mise à jour si le gendarme existe déjà,
+                    # la nouvelle version de la fiche vaut à partir de la date des faits
+                    GendarmeRepository.upsert(cursor, {
+                        name: form_data[name] for name in ('mle',) + GENDARME_FIELDS
+                    }, valide_du=form_data['date_faits'])
 
                 conn.commit()
 
@@ -1029,6 +1016,7 @@ class NewCaseForm(QMainWindow):
             print(f"Erreur détaillée : {str(e)}")
 
     def show_new_case_form(self):
+        from src.ui.windows.statistics import StatistiquesWindow
         form = NewCaseForm(self.db_manager)
         form.case_added.connect(StatistiquesWindow.update_trends)  # Connexion du signal
         form.show()
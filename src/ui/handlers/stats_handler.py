@@ -1,10 +1,25 @@
+import importlib
+import threading
+
 from PyQt6.QtWidgets import QMessageBox
-from PyQt6.QtCore import QObject, pyqtSignal
-from matplotlib import pyplot as plt
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
-from ..windows.statistics.stats_window import StatistiquesWindow
 import logging
 
+from src.database.health_service import DatabaseHealthService
+
+# Modules lourds (matplotlib, seaborn, reportlab, pptx, openpyxl, pandas) chargés
+# uniquement à la première utilisation des statistiques, jamais au démarrage.
+_STATS_MODULES = (
+    'pandas',
+    'matplotlib.pyplot',
+    'seaborn',
+    'src.ui.windows.statistics.stats_window',
+)
+
+# Intervalle de vérification du cube statistique contre un recalcul complet
+CUBE_CHECK_INTERVAL_MS = 30 * 60 * 1000
+
 # Cache global
 _global_cache = {
     'data': {},
@@ -40,6 +55,10 @@ class StatsHandler(QObject):
             print("✗ ERREUR: pas de db_manager dans main_window")
 
         self.stats_window = None
+        self._warmup_timer = None
+        self._cube_check_timer = None
+        self._cube_check_thread = None
+        self._health_service = None
 
         # Configuration du logging
         self.logger = logging.getLogger(__name__)
@@ -60,22 +79,12 @@ class StatsHandler(QObject):
             if not self.main_window.db_manager:
                 raise Exception("Le gestionnaire de base de données n'est pas initialisé")
 
-            print("3. Test de connexion...")
-            if not self.main_window.db_manager.is_connected():
-                raise Exception("La base de données n'est pas connectée")
-
-            print("4. Vérification des tables...")
-            required_tables = ['sanctions', 'gendarmes']
-            for table in required_tables:
-                print(f"   Vérification de la table {table}...")
-                if not self.main_window.db_manager.table_exists(table):
-                    raise Exception(f"La table {table} n'existe pas")
-
-                print(f"   Comptage des enregistrements dans {table}...")
-                count = self.main_window.db_manager.count_records(table)
-                print(f"   → {count} enregistrements trouvés dans {table}")
-                if count == 0:
-                    raise Exception(f"La table {table} est vide")
+            print("3. Vérification de l'état de la base...")
+            if self._health_service is None or self._health_service.db_manager is not self.main_window.db_manager:
+                self._health_service = DatabaseHealthService(self.main_window.db_manager)
+            status = self._health_service.check()
+            if not status.ok:
+                raise Exception(status.message)
 
             print("✓ Toutes les vérifications sont OK")
             return True
@@ -105,6 +114,7 @@ class StatsHandler(QObject):
                 return
 
             print("3. Création de la nouvelle fenêtre...")
+            from ..windows.statistics.stats_window import StatistiquesWindow
             self.stats_window = StatistiquesWindow(self.main_window.db_manager)
 
             print("4. Configuration des signaux...")
@@ -124,6 +134,65 @@ class StatsHandler(QObject):
         finally:
             print("=== Fin open_statistics ===\n")
 
+    def schedule_warmup(self, delay_ms=2000):
+        """
+        Programme le préchargement des modules statistiques après le premier affichage.
+
+        Args:
+            delay_ms: Délai en millisecondes avant le préchargement
+        """
+        if self._warmup_timer is not None:
+            return
+        self._warmup_timer = QTimer(self)
+        self._warmup_timer.setSingleShot(True)
+        self._warmup_timer.timeout.connect(self.warm_up)
+        self._warmup_timer.start(delay_ms)
+
+    def warm_up(self):
+        """Importe les modules statistiques pour que la première ouverture soit immédiate."""
+        for module_name in _STATS_MODULES:
+            try:
+                importlib.import_module(module_name)
+            except Exception as e:
+                self.logger.warning(f"Préchargement de {module_name} impossible: {str(e)}")
+                return
+
+        # Snapshot analytique : relu depuis le cache disque ou reconstruit en arrière-plan
+        db_manager = getattr(self.main_window, 'db_manager', None)
+        if db_manager is not None and db_manager.get_data_version() is not None:
+            from src.analytics.snapshot_service import AnalyticalSnapshotService
+            AnalyticalSnapshotService.for_db(db_manager).prime()
+            self.schedule_cube_check()
+
+    def schedule_cube_check(self, interval_ms=CUBE_CHECK_INTERVAL_MS):
+        """Programme la vérification périodique du cube statistique"""
+        if self._cube_check_timer is not None:
+            return
+        self._cube_check_timer = QTimer(self)
+        self._cube_check_timer.timeout.connect(self.check_cube)
+        self._cube_check_timer.start(interval_ms)
+
+    def check_cube(self):
+        """Compare le cube maintenu par écarts à un recalcul complet, hors du thread de l'interface"""
+        db_manager = getattr(self.main_window, 'db_manager', None)
+        if db_manager is None or db_manager.get_data_version() is None:
+            return
+        if self._cube_check_thread is not None and self._cube_check_thread.is_alive():
+            return
+        self._cube_check_thread = threading.Thread(target=self._check_cube, args=(db_manager,),
+                                                   name="cube-check", daemon=True)
+        self._cube_check_thread.start()
+
+    def _check_cube(self, db_manager):
+        try:
+            from src.analytics.cube_maintenance import CubeConsistencyChecker
+            differences = CubeConsistencyChecker(db_manager).check()
+            if differences:
+                self.logger.warning(f"Cube statistique incohérent : {len(differences)} cellule(s) en écart, "
+                                    f"cube marqué périmé (reconstruit à la prochaine consultation)")
+        except Exception as e:
+            self.logger.warning(f"Vérification du cube statistique impossible: {str(e)}")
+
     def _setup_stats_window(self):
         """Configure la fenêtre des statistiques."""
         print("=== Configuration de la fenêtre ===")
@@ -185,6 +254,10 @@ class StatsHandler(QObject):
 
     def cleanup(self):
         """Nettoyage amélioré des ressources"""
+        if self._warmup_timer is not None:
+            self._warmup_timer.stop()
+        if self._cube_check_timer is not None:
+            self._cube_check_timer.stop()
         self._cache.clear()
         if self.stats_window:
             self.stats_window.close()
@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLabel, QFileDialog,
                              QProgressBar, QMessageBox)
 from src.database.db_manager import DatabaseManager
+from src.database.models import GendarmeRepository
 from src.utils.date_utils import adapt_date, calculate_age, parse_annee_service
 import pandas as pd
 
@@ -95,7 +96,7 @@ class ImportWindow(QMainWindow):
 
                     self.status_label.setText("Import des données gendarmes...")
 
-                    gendarmes_df = df[[
+                    gendarme_columns = [
                         'MLE',
                         'NOM ET PRENOMS',
                         'GRADE',
@@ -110,7 +111,13 @@ class ImportWindow(QMainWindow):
                         'ANNEE DE SERVICE',
                         'SITUATION MATRIMONIALE',
                         'NB ENF'
-                    ]].drop_duplicates()
+                    ]
+                    # Chaque variante d'une fiche prend effet à la date des faits de la première
+                    # affaire où elle apparaît ; les variantes sont importées dans l'ordre des faits
+                    gendarmes_df = df[gendarme_columns].assign(
+                        DATE_EFFET=df['DATE DES FAITS'].map(adapt_date)
+                    ).sort_values('DATE_EFFET', na_position='last', kind='stable').drop_duplicates(
+                        subset=gendarme_columns)
 
                     # Import des sanctions
                     for _, row in sanctions_df.iterrows():
@@ -153,39 +160,23 @@ class ImportWindow(QMainWindow):
                     for _, row in gendarmes_df.iterrows():
                         try:
                             print("On importe les données des gendarmes")
-                            cursor.execute('''
-                                INSERT INTO gendarmes (
-                                    mle,
-                                    nom_prenoms,
-                                    grade,
-                                    sexe,
-                                    date_naissance,
-                                    age,
-                                    unite,
-                                    legions,
-                                    subdiv,
-                                    regions,
-                                    date_entree_gie,
-                                    annee_service,
-                                    situation_matrimoniale,
-                                    nb_enfants
-                                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                ''', (
-                                str(row['MLE']) if pd.notna(row['MLE']) else None,
-                                str(row['NOM ET PRENOMS']) if pd.notna(row['NOM ET PRENOMS']) else None,
-                                str(row['GRADE']) if pd.notna(row['GRADE']) else None,
-                                str(row['SEXE']) if pd.notna(row['SEXE']) else None,
-                                adapt_date(row['DATE DE NAISSANCE']) if pd.notna(row['DATE DE NAISSANCE']) else pd.to_datetime(row['DATE DE NAISSANCE']).strftime('%d-%m-%Y'),
-                                int(row['AGE']) if pd.notna(row['AGE']) else None,
-                                str(row['UNITE']) if pd.notna(row['UNITE']) else None,
-                                str(row['LEGIONS']) if pd.notna(row['LEGIONS']) else None,
-                                str(row['SUBDIV']) if pd.notna(row['SUBDIV']) else None,
-                                str(row['REGIONS']) if pd.notna(row['REGIONS']) else None,
-                                adapt_date(row['DATE D\'ENTREE GIE']) if pd.notna(row['DATE D\'ENTREE GIE']) else None,
-                                int(row['ANNEE DE SERVICE']) if pd.notna(row['ANNEE DE SERVICE']) else None,
-                                str(row['SITUATION MATRIMONIALE']) if pd.notna(row['SITUATION MATRIMONIALE']) else None,
-                                int(row['NB ENF']) if pd.notna(row['NB ENF']) else None,
-                            ))
+                            # Un matricule présent sur plusieurs lignes met à jour sa fiche unique
+                            GendarmeRepository.upsert(cursor, {
+                                'mle': str(row['MLE']) if pd.notna(row['MLE']) else None,
+                                'nom_prenoms': str(row['NOM ET PRENOMS']) if pd.notna(row['NOM ET PRENOMS']) else None,
+                                'grade': str(row['GRADE']) if pd.notna(row['GRADE']) else None,
+                                'sexe': str(row['SEXE']) if pd.notna(row['SEXE']) else None,
+                                'date_naissance': adapt_date(row['DATE DE NAISSANCE']) if pd.notna(row['DATE DE NAISSANCE']) else pd.to_datetime(row['DATE DE NAISSANCE']).strftime('%d-%m-%Y'),
+                                'age': int(row['AGE']) if pd.notna(row['AGE']) else None,
+                                'unite': str(row['UNITE']) if pd.notna(row['UNITE']) else None,
+                                'legions': str(row['LEGIONS']) if pd.notna(row['LEGIONS']) else None,
+                                'subdiv': str(row['SUBDIV']) if pd.notna(row['SUBDIV']) else None,
+                                'regions': str(row['REGIONS']) if pd.notna(row['REGIONS']) else None,
+                                'date_entree_gie': adapt_date(row['DATE D\'ENTREE GIE']) if pd.notna(row['DATE D\'ENTREE GIE']) else None,
+                                'annee_service': int(row['ANNEE DE SERVICE']) if pd.notna(row['ANNEE DE SERVICE']) else None,
+                                'situation_matrimoniale': str(row['SITUATION MATRIMONIALE']) if pd.notna(row['SITUATION MATRIMONIALE']) else None,
+                                'nb_enfants': int(row['NB ENF']) if pd.notna(row['NB ENF']) else None,
+                            }, valide_du=row['DATE_EFFET'] if pd.notna(row['DATE_EFFET']) else None)
 
                             print(f'{success_count} tache terminée')
                             success_count += 1
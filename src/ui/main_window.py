@@ -1,23 +1,25 @@
 import sqlite3
 
-import pandas as pd
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLineEdit, QPushButton, QLabel,
                              QTableWidget, QTableWidgetItem, QTabWidget,
                              QComboBox, QGroupBox, QGridLayout, QMessageBox,
                              QHeaderView, QDialog, QToolBar, QFileDialog, QDockWidget, QSizePolicy, QFrame)
 
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QTimer
 from PyQt6.QtGui import QFont, QIcon, QPixmap, QAction
 from src.database.db_manager import DatabaseManager
 from src.ui.styles.styles import Styles
 from src.database.models import GendarmeRepository, SanctionRepository
-from src.ui.windows.import_etat_window import ImportEtatCompletWindow
+from src.analytics.recidivism_engine import RecidivismEngine
 from src.ui.forms.edit_gendarme_form import SearchMatriculeDialog, EditCaseForm
 from .forms.delete_case_dialog import DeleteCaseDialog
 from .handlers.stats_handler import StatsHandler
 from src.ui.widgets.user_info_widget import UserInfoWidget
 
+# Colonnes calculées de la vue gendarmes_actuels -> champ d'information affiché
+DERIVED_FIELDS = {'age_actuel': 'age', 'annee_service_actuel': 'annee_service'}
+
 
 class MainGendarmeApp(QMainWindow):
     def __init__(self, username=None):
@@ -35,11 +37,14 @@ class MainGendarmeApp(QMainWindow):
         self.is_dark_mode = False
         self.info_group = None
         self.sanctions_group = None
+        self.profile_label = None
+        self._first_show_done = False
 
         # Initialisation des gestionnaires de données
         self.db_manager = DatabaseManager()
         self.gendarme_repository = GendarmeRepository(self.db_manager)
         self.sanction_repository = SanctionRepository(self.db_manager)
+        self.recidivism_engine = RecidivismEngine(self.db_manager)
 
         # Initialisation du gestionnaire de statistiques
         self.stats_handler = StatsHandler(self)
@@ -253,6 +258,12 @@ class MainGendarmeApp(QMainWindow):
         sanctions_layout = QVBoxLayout()
         self.sanctions_group.setFont(QFont('Helvetica', 18, QFont.Weight.Bold))
 
+        # Résumé disciplinaire (table gendarmes_resume)
+        self.profile_label = QLabel()
+        self.profile_label.setFont(QFont('Helvetica', 12))
+        self.profile_label.setWordWrap(True)
+        sanctions_layout.addWidget(self.profile_label)
+
         self.sanctions_table = QTableWidget()
         self.sanctions_table.setColumnCount(9)
         headers = ["N° ORDRE", "N° Dossier", "Faute commise", "Date des faits", "Catégorie faute",
@@ -306,7 +317,8 @@ class MainGendarmeApp(QMainWindow):
                     where_clause = "WHERE nom_prenoms LIKE ?"
                     search_text = f"%{search_text}%"
 
-                cursor.execute(f"SELECT * FROM gendarmes {where_clause}", (search_text,))
+                # Âge et années de service calculés à ce jour (vue gendarmes_actuels)
+                cursor.execute(f"SELECT * FROM gendarmes_actuels {where_clause}", (search_text,))
                 gendarmes = cursor.fetchall()
                 #print(gendarmes)
                 if gendarmes:
@@ -318,9 +330,12 @@ class MainGendarmeApp(QMainWindow):
                     for gendarme in gendarmes:
                         field_names = [description[0] for description in cursor.description]
                         for field_name, value in zip(field_names, gendarme):
+                            # Les valeurs calculées (après les colonnes de la table) remplacent les saisies
+                            field_name = DERIVED_FIELDS.get(field_name, field_name)
                             if field_name in self.info_labels:
                                 if field_name in ['date_naissance', 'date_entree_gie'] and value:
                                     try:
+                                        import pandas as pd
                                         date_obj = pd.to_datetime(value)
                                         formatted_value = date_obj.strftime('%d/%m/%Y')
                                         self.info_labels[field_name].setText(formatted_value)
@@ -330,6 +345,9 @@ class MainGendarmeApp(QMainWindow):
                                 else:
                                     self.info_labels[field_name].setText(str(value if value is not None else ""))
 
+                    field_names = [description[0] for description in cursor.description]
+                    self.update_profile_summary(dict(zip(field_names, gendarmes[-1]))['mle'])
+
                     # Requête pour les sanctions
                     cursor.execute("""
                         SELECT id, numero_dossier, faute_commise, date_faits, categorie, statut, reference_statut, taux_jar, comite, 
@@ -359,6 +377,27 @@ class MainGendarmeApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Erreur", str(e))
 
+    def update_profile_summary(self, matricule):
+        """Affiche le résumé disciplinaire du gendarme (lecture par clé de gendarmes_resume)"""
+        try:
+            profile = self.recidivism_engine.profile(matricule)
+        except sqlite3.Error as e:
+            print(f"Résumé disciplinaire indisponible : {str(e)}")
+            profile = None
+
+        if profile is None:
+            self.profile_label.setText("Aucune sanction enregistrée")
+            return
+
+        categories = ", ".join(f"cat. {categorie} : {nombre}" for categorie, nombre in profile.categories.items())
+        self.profile_label.setText(
+            f"{profile.nb_sanctions} sanction(s) dans {profile.nb_dossiers} dossier(s), "
+            f"du {profile.premiere_date_faits or '?'} au {profile.derniere_date_faits or '?'} | "
+            f"Statut le plus grave : {profile.pire_statut or 'NON SPÉCIFIÉ'} | "
+            f"JAR cumulés : {profile.jours_jar:g} jour(s)"
+            + (f" | {categories}" if categories else "")
+        )
+
     def apply_theme(self):
         """Applique le thème actuel à tous les widgets"""
         styles = Styles.get_styles(self.is_dark_mode)
@@ -504,6 +543,7 @@ class MainGendarmeApp(QMainWindow):
             "Excel files (*.xlsx *.xls)"
         )
         if file_name:
+            from src.ui.windows.import_etat_window import ImportEtatCompletWindow
             self.import_window = ImportEtatCompletWindow(self.db_manager)
             self.import_window.import_file(file_name)
 
@@ -576,6 +616,14 @@ class MainGendarmeApp(QMainWindow):
         else:
             print("Erreur: stats_handler non initialisé")  # Pour le débogage
 
+    def showEvent(self, event):
+        """Précharge les statistiques en tâche de fond après le premier affichage."""
+        super().showEvent(event)
+        if not self._first_show_done:
+            self._first_show_done = True
+            # singleShot(0) laisse la boucle d'événements peindre la fenêtre d'abord
+            QTimer.singleShot(0, self.stats_handler.schedule_warmup)
+
     def closeEvent(self, event):
         """Surcharge de la méthode de fermeture pour nettoyer les ressources."""
         # Nettoyage du gestionnaire de statistiques
@@ -11,23 +11,25 @@ from PyQt6.QtGui import QIcon, QColor
 import pandas as pd
 
 from datetime import datetime
+from itertools import islice
 
-from seaborn.external.docscrape import header
+# reportlab, python-pptx et openpyxl sont importés à la demande dans les exports
 
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
+from src.data.gendarmerie.structure import SUBDIVISIONS, SERVICE_RANGES
+from src.database.catalog_service import DimensionCatalogService
+from src.database.models import StatisticsRepository
 
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+# Colonnes du tableau et des exports : libellés de référence, fiche gendarme actuelle
+LIST_HEADERS = ["ID", "Date d'enr", "Matricule", "Nom et Prénoms", "Grade", "Subdivision",
+                "Date des faits", "Faute commise", "Catégorie", "Statut",
+                "N° Dossier", "Années de service", "Situation Matrimoniale"]
+LIST_COLUMNS = ('s.id', 's.date_enr', 's.matricule', 'g.nom_prenoms', 'COALESCE(gr.libelle, g.grade)',
+                'COALESCE(sd.libelle, g.subdiv)', 's.date_faits', 'COALESCE(f.libelle, s.faute_commise)',
+                's.categorie', 'COALESCE(st.libelle, s.statut)', 's.numero_dossier',
+                'g.annee_service_actuel', 'g.situation_matrimoniale')
 
-from src.data.gendarmerie.structure import SUBDIVISIONS, SERVICE_RANGES
+# Lignes ajoutées au tableau à chaque page (pagination par clé de StatisticsRepository)
+PAGE_SIZE = 500
 
 
 class FullListWindow(QMainWindow):
@@ -40,6 +42,10 @@ class FullListWindow(QMainWindow):
         self.table = None
         self.result_label = None
         self.db_manager = db_manager
+        self.repository = StatisticsRepository(db_manager)
+        self._list_filters = {}
+        self._next_token = None
+        self._total = 0
         self.setWindowTitle("Liste exhaustive des sanctionnés")
         self.setMinimumSize(1200, 800)
 
@@ -194,6 +200,12 @@ class FullListWindow(QMainWindow):
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         main_layout.addWidget(self.table)
 
+        # Page suivante de la liste
+        self.more_btn = QPushButton("Afficher la suite")
+        self.more_btn.clicked.connect(self.load_more)
+        self.more_btn.setEnabled(False)
+        main_layout.addWidget(self.more_btn)
+
         # Boutons d'export
         export_layout = QHBoxLayout()
 
@@ -261,9 +273,9 @@ class FullListWindow(QMainWindow):
                 nom_prenoms,
                 grade,
                 subdiv,
-                annee_service,
+                annee_service_actuel,
                 situation_matrimoniale
-            FROM gendarmes 
+            FROM gendarmes_actuels
             WHERE mle = ?
             """
             gendarme_params = [matricule]
@@ -282,19 +294,10 @@ class FullListWindow(QMainWindow):
                 gendarme_params.append(self.filters["situation"].currentText())
 
             if self.filters["service"].currentText() != "Tous(tes)":
-                service_text = self.filters["service"].currentText()
-                # Extraire juste le nombre du texte (par exemple "15" de "15 ANS")
-                try:
-                    if "ANS" in service_text:
-                        service_years = int(service_text.split()[0])
-                        gendarme_query += " AND annee_service = ?"
-                        gendarme_params.append(service_years)
-                    elif "-" in service_text:  # Pour les tranches comme "0-5"
-                        start, end = map(int, service_text.split("-"))
-                        gendarme_query += " AND annee_service BETWEEN ? AND ?"
-                        gendarme_params.extend([start, end])
-                except ValueError as e:
-                    print(f"Erreur de conversion de la tranche d'années: {e}")
+                # Tranche des années de service à ce jour (table tranches), ex. "0-5 ans" -> "0-5"
+                gendarme_query += """ AND annee_service_tranche_actuelle_id =
+                    (SELECT id FROM tranches WHERE dimension = 'service' AND code = ?)"""
+                gendarme_params.append(self._service_code())
 
             with self.db_manager.get_connection() as conn:
                 cursor = conn.cursor()
@@ -309,102 +312,8 @@ class FullListWindow(QMainWindow):
     def dynamic_search(self, text):
         """Effectue la recherche dynamique."""
         try:
-            search_type = "matricule" if self.matricule_radio.isChecked() else "nom"
-
-            # Si le champ est vide, afficher toutes les données
-            if not text:
-                self.load_data()
-                return
-
-            # Construction de la requête selon le type de recherche
-            if search_type == "matricule":
-                sanctions_query = """
-                SELECT 
-                    s.id,
-                    s.date_enr,
-                    s.matricule,
-                    s.date_faits,
-                    s.faute_commise,
-                    s.categorie,
-                    s.statut,
-                    s.numero_dossier
-                FROM sanctions s
-                WHERE s.matricule LIKE ?
-                ORDER BY s.id DESC
-                """
-                params = [f"%{text}%"]
-            else:
-                sanctions_query = """
-                SELECT 
-                    s.id,
-                    s.date_enr,
-                    s.matricule,
-                    s.date_faits,
-                    s.faute_commise,
-                    s.categorie,
-                    s.statut,
-                    s.numero_dossier
-                FROM sanctions s
-                WHERE s.matricule IN (
-                    SELECT mle FROM gendarmes 
-                    WHERE nom_prenoms LIKE ?
-                )
-                ORDER BY s.id DESC
-                """
-                params = [f"%{text}%"]
-
-            # Exécution de la requête
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(sanctions_query, params)
-                sanctions_results = cursor.fetchall()
-
-                # Mise à jour du tableau avec les résultats
-                self.table.setRowCount(len(sanctions_results))
-
-                filtered_count = 0
-                for i, sanction in enumerate(sanctions_results):
-                    # Récupérer les infos du gendarme
-                    gendarme_info = self.get_gendarme_info(sanction[2])  # matricule est à l'index 2
-
-                    # Création de la ligne complète
-                    row_data = [
-                        sanction[0],  # ID
-                        self.format_date(sanction[1]),  # Date d'enr
-                        sanction[2],  # Matricule
-                        gendarme_info[0],  # Nom et Prénoms
-                        gendarme_info[1],  # Grade
-                        gendarme_info[2],  # Subdivision
-                        self.format_date(sanction[3]),  # Date des faits
-                        sanction[4],  # Faute commise
-                        sanction[5],  # Catégorie
-                        sanction[6],  # Statut
-                        sanction[7],  # N° Dossier
-                        gendarme_info[3],  # Années de service
-                        gendarme_info[4]  # Situation Matrimoniale
-                    ]
-
-                    # Remplissage de la ligne
-                    for j, value in enumerate(row_data):
-                        item = QTableWidgetItem(str(value) if value is not None else "")
-
-                        # Alignement à gauche pour nom/prénoms, faute et n° dossier
-                        if j in [3, 7, 10]:
-                            item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                        else:
-                            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                        # Coloration si le statut est "RADIE"
-                        if sanction[6] == "RADIE":
-                            item.setBackground(QColor(255, 200, 200))
-
-                        self.table.setItem(filtered_count, j, item)
-
-                    filtered_count += 1
-
-                # Ajustement du nombre de lignes et mise à jour du label
-                self.table.setRowCount(filtered_count)
-                self.result_label.setText(f"Nombre de résultats : {filtered_count}")
+            # Recherche partielle (matricule ou nom) avec les filtres sélectionnés
+            self.load_data()
 
         except Exception as e:
             print(f"Erreur dans la recherche dynamique : {str(e)}")  # Debug
@@ -450,165 +359,139 @@ class FullListWindow(QMainWindow):
                 self.table.setItem(i, j, item)
 
     def load_filters(self):
-        """Charge les valeurs des filtres."""
+        """Charge les valeurs des filtres (catalogue des dimensions, sans parcours des tables)."""
         try:
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                print("\nDébug chargement des filtres:")
-                # Grades
-                cursor.execute("SELECT DISTINCT grade FROM gendarmes ORDER BY grade")
-                grades = cursor.fetchall()
-                self.filters["grade"].addItems([g[0] for g in grades if g[0]])
-                print(f"Grades chargés: {[g[0] for g in grades if g[0]]}")
-
-                # Subdivisions
-                self.filters["subdiv"].addItems(SUBDIVISIONS)
-
-                # Fautes commises
-                cursor.execute("SELECT DISTINCT faute_commise FROM sanctions ORDER BY faute_commise")
-                fautes = cursor.fetchall()
-                self.filters["faute"].addItems([f[0] for f in fautes if f[0]])
-
-                # Situation matrimoniale
-                cursor.execute("SELECT DISTINCT situation_matrimoniale FROM gendarmes ORDER BY situation_matrimoniale")
-                situations = cursor.fetchall()
-                self.filters["situation"].addItems([s[0] for s in situations if s[0]])
-
-                # Années
-                cursor.execute("SELECT DISTINCT annee_punition FROM sanctions ORDER BY annee_punition DESC")
-                annees = cursor.fetchall()
-                self.filters["annee"].addItems([str(a[0]) for a in annees if a[0]])
-
-                # Statuts
-                cursor.execute("SELECT DISTINCT statut FROM sanctions ORDER BY statut")
-                statuts = cursor.fetchall()
-                self.filters["statut"].addItems([s[0] for s in statuts if s[0]])
-
-                # Catégories
-                cursor.execute("SELECT DISTINCT categorie FROM sanctions ORDER BY categorie")
-                categories = cursor.fetchall()
-                self.filters["categorie"].addItems([str(c[0]) for c in categories if c[0]])
-
-                # Tranches d'années de service avec formatage
-                formatted_ranges = [f"{range_text} ans" for range_text in SERVICE_RANGES]
-                self.filters["service"].addItems(formatted_ranges)
-
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur",
-                                 f"Erreur lors du chargement des filtres: {str(e)}")
-
-    def load_data(self):
-        """Charge les données filtrées dans le tableau."""
-        try:
-            # 1. Requête pour les sanctions (données principales)
-            sanctions_query = """
-            SELECT 
-                s.id,
-                s.date_enr,
-                s.matricule,
-                s.date_faits,
-                s.faute_commise,
-                s.categorie,
-                s.statut,
-                s.numero_dossier
-            FROM sanctions s
-            WHERE 1=1
-            """
-            params = []
-
-            # Application des filtres pour sanctions
-            if self.filters["faute"].currentText() != "Tous(tes)":
-                sanctions_query += " AND s.faute_commise = ?"
-                params.append(self.filters["faute"].currentText())
+            catalog = DimensionCatalogService.for_db(self.db_manager)
+            print("\nDébug chargement des filtres:")
+            # Grades
+            grades = catalog.values("grade")
+            self.filters["grade"].addItems(grades)
+            print(f"Grades chargés: {grades}")
 
-            if self.filters["annee"].currentText() != "Tous(tes)":
-                sanctions_query += " AND s.annee_punition = ?"
-                params.append(int(self.filters["annee"].currentText()))
+            # Subdivisions
+            self.filters["subdiv"].addItems(SUBDIVISIONS)
 
-            if self.filters["statut"].currentText() != "Tous(tes)":
-                sanctions_query += " AND s.statut = ?"
-                params.append(self.filters["statut"].currentText())
+            # Fautes commises
+            self.filters["faute"].addItems(catalog.values("faute_commise"))
 
-            if self.filters["categorie"].currentText() != "Tous(tes)":
-                sanctions_query += " AND s.categorie = ?"
-                params.append(self.filters["categorie"].currentText())
+            # Situation matrimoniale
+            self.filters["situation"].addItems(catalog.values("situation_matrimoniale"))
 
-            # Exécution de la requête principale
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(sanctions_query + " ORDER BY id DESC", params)
-                sanctions_results = cursor.fetchall()
+            # Années
+            annees = catalog.values("annee_punition", descending=True)
+            self.filters["annee"].addItems([str(a) for a in annees if a])
 
-            # Configuration du tableau
-            headers = ["ID", "Date d'enr", "Matricule", "Nom et Prénoms", "Grade", "Subdivision",
-                       "Date des faits", "Faute commise", "Catégorie", "Statut",
-                       "N° Dossier", "Années de service", "Situation Matrimoniale"]
-
-            self.table.setRowCount(len(sanctions_results))
-            self.table.setColumnCount(len(headers))
-            self.table.setHorizontalHeaderLabels(headers)
+            # Statuts
+            self.filters["statut"].addItems(catalog.values("statut"))
 
-            # Remplissage des données
-            filtered_count = 0
-            for i, sanction in enumerate(sanctions_results):
-                # Récupérer les infos du gendarme avec filtres
-                gendarme_info = self.get_gendarme_info(sanction[2])  # Utilisation de la méthode de classe
+            # Catégories
+            categories = catalog.values("categorie")
+            self.filters["categorie"].addItems([str(c) for c in categories if c])
 
-                # Si les infos du gendarme sont vides à cause des filtres, continuer
-                if not any(gendarme_info):
-                    continue
+            # Tranches d'années de service avec formatage
+            formatted_ranges = [f"{range_text} ans" for range_text in SERVICE_RANGES]
+            self.filters["service"].addItems(formatted_ranges)
 
-                # Création de la ligne complète
-                row_data = [
-                    sanction[0],  # ID
-                    self.format_date(sanction[1]),  # Date d'enr
-                    sanction[2],  # Matricule
-                    gendarme_info[0],  # Nom et Prénoms
-                    gendarme_info[1],  # Grade
-                    gendarme_info[2],  # Subdivision
-                    self.format_date(sanction[3]),  # Date des faits
-                    sanction[4],  # Faute commise
-                    sanction[5],  # Catégorie
-                    sanction[6],  # Statut
-                    sanction[7],  # N° Dossier
-                    gendarme_info[3],  # Années de service
-                    gendarme_info[4]  # Situation Matrimoniale
-                ]
-
-                # Remplissage de la ligne avec alignements et coloration
-                for j, value in enumerate(row_data):
-                    item = QTableWidgetItem(str(value) if value is not None else "")
-
-                    # Alignement à gauche pour nom/prénoms, faute et n° dossier
-                    if j in [3, 7, 10]:
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                    else:
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                    # Coloration si le statut est "RADIE"
-                    if sanction[6] == "RADIE":
-                        item.setBackground(QColor(255, 200, 200))
-
-                    self.table.setItem(filtered_count, j, item)
-
-                filtered_count += 1
-
-            # Ajuster le nombre de lignes au nombre réel après filtrage
-            self.table.setRowCount(filtered_count)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur",
+                                 f"Erreur lors du chargement des filtres: {str(e)}")
 
-            # Ajustement des colonnes
-            self.table.horizontalHeader().setSectionResizeMode(
-                QHeaderView.ResizeMode.ResizeToContents
-            )
+    def load_data(self):
+        """Charge la première page des données filtrées dans le tableau."""
+        try:
+            self._list_filters = self._selected_filters()
+            self._total = self.repository.count_sanctions_full_list(self._list_filters)
+            self._next_token = None
 
-            # Mise à jour du label de résultats
-            self.result_label.setText(f"Nombre de résultats : {filtered_count}")
+            self.table.setRowCount(0)
+            self.table.setColumnCount(len(LIST_HEADERS))
+            self.table.setHorizontalHeaderLabels(LIST_HEADERS)
+            self.load_more()
 
         except Exception as e:
             print(f"Erreur dans load_data: {str(e)}")  # Pour le debug
             QMessageBox.critical(self, "Erreur",
                                  f"Erreur lors du chargement des données: {str(e)}")
 
+    def load_more(self):
+        """Ajoute au tableau la page suivante de la liste (après la dernière ligne affichée)."""
+        page = self.repository.get_sanctions_page(self._list_filters, PAGE_SIZE, self._next_token,
+                                                  columns=LIST_COLUMNS)
+        self._next_token = page.next_token
+        self._append_rows(page.rows)
+        self.more_btn.setEnabled(self._next_token is not None)
+
+        # Mise à jour du label de résultats
+        shown = self.table.rowCount()
+        if shown < self._total:
+            self.result_label.setText(f"Nombre de résultats : {self._total} ({shown} affichés)")
+        else:
+            self.result_label.setText(f"Nombre de résultats : {self._total}")
+
+    def _selected_filters(self):
+        """Filtres de la liste (StatisticsRepository) à partir des filtres et de la recherche saisis."""
+        # Seules les sanctions rattachées à un gendarme sont listées
+        filters = {'avec_fiche': True}
+        for name, key in [("grade", "grade"), ("subdiv", "subdiv"), ("faute", "faute"),
+                          ("situation", "situation"), ("annee", "year"), ("statut", "statut"),
+                          ("categorie", "categorie")]:
+            value = self.filters[name].currentText()
+            if value != "Tous(tes)":
+                filters[key] = value
+
+        # Tranche d'années de service, ex. "0-5 ans"
+        if self.filters["service"].currentText() != "Tous(tes)":
+            filters['service'] = self._service_code()
+
+        text = self.search_edit.text().strip()
+        if text:
+            filters['matricule' if self.matricule_radio.isChecked() else 'nom'] = text
+        return filters
+
+    def _service_code(self):
+        """Code de la tranche d'années de service sélectionnée ("0-5 ans" -> "0-5")"""
+        return self.filters["service"].currentText().lower().replace("ans", "").strip()
+
+    def _row_texts(self, row):
+        """Textes affichés d'une ligne de la liste (dates au format JJ/MM/AAAA)."""
+        row = ["" if value is None else value for value in row]
+        row[1] = self.format_date(row[1])  # Date d'enr
+        row[6] = self.format_date(row[6])  # Date des faits
+        return [str(value) for value in row]
+
+    def _export_rows(self):
+        """Toutes les lignes de la liste filtrée, lues par lots (pas seulement les pages affichées)."""
+        for row in self.repository.iter_sanctions_full_list(self._list_filters, columns=LIST_COLUMNS):
+            yield self._row_texts(row)
+
+    def _append_rows(self, rows):
+        """Ajoute des lignes de la liste à la fin du tableau."""
+        start = self.table.rowCount()
+        self.table.setRowCount(start + len(rows))
+
+        for i, row in enumerate(rows, start):
+            radie = row[9] == "RADIE"
+
+            for j, value in enumerate(self._row_texts(row)):
+                item = QTableWidgetItem(value)
+
+                # Alignement à gauche pour nom/prénoms, faute et n° dossier
+                if j in [3, 7, 10]:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+                else:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+
+                # Coloration si le statut est "RADIE"
+                if radie:
+                    item.setBackground(QColor(255, 200, 200))
+
+                self.table.setItem(i, j, item)
+
+        # Ajustement des colonnes
+        self.table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents
+        )
+
     def format_date(self, date_str):
         """Formate une date en JJ/MM/AAAA."""
         if date_str:
@@ -726,6 +609,10 @@ class FullListWindow(QMainWindow):
     def export_excel(self):
         """Exporte les données vers Excel avec mise en forme."""
         try:
+            import openpyxl
+            import openpyxl.utils
+            import openpyxl.styles
+
             # Demander à l'utilisateur où sauvegarder le fichier
             default_name = f"liste_sanctions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             file_path, _ = QFileDialog.getSaveFileName(
@@ -740,21 +627,9 @@ class FullListWindow(QMainWindow):
 
             # Création d'un writer Excel
             with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                # Récupération des données du tableau
-                data = []
-                headers = []
-
-                # Récupération des en-têtes
-                for j in range(self.table.columnCount()):
-                    headers.append(self.table.horizontalHeaderItem(j).text())
-
-                # Récupération des données
-                for i in range(self.table.rowCount()):
-                    row = []
-                    for j in range(self.table.columnCount()):
-                        item = self.table.item(i, j)
-                        row.append(item.text() if item else "")
-                    data.append(row)
+                # Toute la liste filtrée, y compris les pages non affichées
+                headers = LIST_HEADERS
+                data = list(self._export_rows())
 
                 # Création du DataFrame
                 df = pd.DataFrame(data, columns=headers)
@@ -805,6 +680,11 @@ class FullListWindow(QMainWindow):
     def export_pdf(self):
         """Exporte les données vers PDF avec mise en forme."""
         try:
+            from reportlab.lib import colors
+            from reportlab.lib.pagesizes import letter, landscape
+            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
             # Demander à l'utilisateur où sauvegarder le fichier
             default_name = f"liste_sanctions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             file_path, _ = QFileDialog.getSaveFileName(
@@ -866,22 +746,9 @@ class FullListWindow(QMainWindow):
                 elements.append(Paragraph(filter_text, styles['Normal']))
                 elements.append(Spacer(1, 20))
 
-            # Création des données du tableau
-            table_data = []
-            headers = []
-
-            # En-têtes
-            for j in range(self.table.columnCount()):
-                headers.append(self.table.horizontalHeaderItem(j).text())
-            table_data.append(headers)
-
-            # Données
-            for i in range(self.table.rowCount()):
-                row = []
-                for j in range(self.table.columnCount()):
-                    item = self.table.item(i, j)
-                    row.append(item.text() if item else "")
-                table_data.append(row)
+            # Création des données du tableau (toute la liste filtrée, lue par lots)
+            table_data = [LIST_HEADERS]
+            table_data.extend(self._export_rows())
 
             # Style du tableau
             table_style = TableStyle([
@@ -932,6 +799,11 @@ class FullListWindow(QMainWindow):
     def export_pptx(self):
         """Exporte les données vers PowerPoint avec mise en forme."""
         try:
+            from pptx import Presentation
+            from pptx.util import Inches, Pt
+            from pptx.enum.text import PP_ALIGN
+            from pptx.dml.color import RGBColor
+
             # Demander à l'utilisateur où sauvegarder le fichier
             default_name = f"liste_sanctions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx"
             file_path, _ = QFileDialog.getSaveFileName(
@@ -1005,26 +877,27 @@ class FullListWindow(QMainWindow):
 
             # Slides de données
             rows_per_slide = 10
-            total_rows = self.table.rowCount()
+            total_rows = self.repository.count_sanctions_full_list(self._list_filters)
             num_slides = (total_rows + rows_per_slide - 1) // rows_per_slide
 
-            headers = [self.table.horizontalHeaderItem(j).text()
-                       for j in range(self.table.columnCount())]
+            headers = LIST_HEADERS
+            # Toute la liste filtrée, lue par lots au fil des slides
+            export_rows = self._export_rows()
 
             for slide_num in range(num_slides):
+                slide_rows = list(islice(export_rows, rows_per_slide))
+                if not slide_rows:
+                    break
+
                 slide = prs.slides.add_slide(prs.slide_layouts[5])
                 shapes = slide.shapes
 
                 title = shapes.title
                 title.text = f"Liste des Sanctions ({slide_num + 1}/{num_slides})"
 
-                # Indices de début et fin pour ce slide
-                start_idx = slide_num * rows_per_slide
-                end_idx = min((slide_num + 1) * rows_per_slide, total_rows)
-
                 # Création du tableau
-                rows = end_idx - start_idx + 1
-                cols = self.table.columnCount()
+                rows = len(slide_rows) + 1
+                cols = len(headers)
 
                 left = Inches(0.5)
                 top = Inches(1.5)
@@ -1046,15 +919,15 @@ class FullListWindow(QMainWindow):
                     paragraph.font.color.rgb = RGBColor(255, 255, 255)
 
                 # Données
-                for i in range(start_idx, end_idx):
-                    for j in range(cols):
-                        cell = table.cell(i - start_idx + 1, j)
-                        item = self.table.item(i, j)
-                        cell.text = item.text() if item else ""
+                for i, row in enumerate(slide_rows, 1):
+                    for j, value in enumerate(row):
+                        cell = table.cell(i, j)
+                        cell.text = value
 
                         paragraph = cell.text_frame.paragraphs[0]
                         paragraph.font.size = Pt(9)
                         paragraph.alignment = PP_ALIGN.CENTER
+            export_rows.close()
 
             # Sauvegarde de la présentation
             prs.save(file_path)
@@ -0,0 +1,113 @@
+# multi_year_trends_window.py
+from datetime import datetime
+
+from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QSpinBox, QComboBox, QPushButton, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QMessageBox)
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+
+from src.analytics.dimensions import TREND_DIMENSIONS
+from src.analytics.trend_engine import TrendEngine
+
+
+class MultiYearTrendsWindow(QMainWindow):
+    """Comparaison pluriannuelle : dossiers par année avec écarts et taux de croissance."""
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.trend_engine = TrendEngine(db_manager)
+        self.setWindowTitle("Comparaison pluriannuelle")
+        self.setMinimumSize(1000, 600)
+
+        self.setup_ui()
+        self.load_data()
+
+    def setup_ui(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+
+        # Titre
+        title = QLabel("Évolution des dossiers d'une année sur l'autre")
+        title.setStyleSheet("font-size: 24px; font-weight: bold; padding: 20px;")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(title)
+
+        # Paramètres : plage d'années et dimension
+        current_year = datetime.now().year
+        controls = QHBoxLayout()
+
+        controls.addWidget(QLabel("De"))
+        self.start_spin = QSpinBox()
+        self.start_spin.setRange(2000, 2100)
+        self.start_spin.setValue(current_year - 3)
+        controls.addWidget(self.start_spin)
+
+        controls.addWidget(QLabel("à"))
+        self.end_spin = QSpinBox()
+        self.end_spin.setRange(2000, 2100)
+        self.end_spin.setValue(current_year)
+        controls.addWidget(self.end_spin)
+
+        controls.addWidget(QLabel("Par"))
+        self.dimension_combo = QComboBox()
+        self.dimension_combo.addItems(TREND_DIMENSIONS.keys())
+        controls.addWidget(self.dimension_combo)
+
+        refresh_button = QPushButton("Afficher")
+        refresh_button.clicked.connect(self.load_data)
+        controls.addWidget(refresh_button)
+        controls.addStretch()
+        main_layout.addLayout(controls)
+
+        # Tableau : une ligne par valeur, une colonne par année
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        main_layout.addWidget(self.table)
+
+        legend = QLabel("Chaque cellule : nombre de dossiers (écart, taux de croissance par rapport à l'année précédente)")
+        legend.setStyleSheet("font-size: 12px; color: #666666;")
+        main_layout.addWidget(legend)
+
+    def load_data(self):
+        try:
+            start_year = self.start_spin.value()
+            end_year = self.end_spin.value()
+            dimension = self.dimension_combo.currentText()
+
+            points = self.trend_engine.get_trends(start_year, end_year, dimension)
+            series = self.trend_engine.by_value(points)
+            years = list(range(min(start_year, end_year), max(start_year, end_year) + 1))
+
+            self.table.clear()
+            self.table.setRowCount(len(series))
+            self.table.setColumnCount(len(years))
+            self.table.setHorizontalHeaderLabels([str(year) for year in years])
+            self.table.setVerticalHeaderLabels(list(series.keys()))
+
+            for row, serie in enumerate(series.values()):
+                for col, point in enumerate(serie):
+                    self.table.setItem(row, col, self._create_item(point))
+
+            self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            self.table.resizeRowsToContents()
+
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur de chargement: {str(e)}")
+
+    @staticmethod
+    def _create_item(point):
+        """Cellule : nombre, puis écart et croissance (rouge en hausse, vert en baisse)"""
+        text = str(point.nombre)
+        if point.delta is not None:
+            croissance = f", {point.croissance:+.1f}%" if point.croissance is not None else ""
+            text += f"\n({point.delta:+d}{croissance})"
+
+        item = QTableWidgetItem(text)
+        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        if point.delta:
+            item.setForeground(QColor("#C0392B") if point.delta > 0 else QColor("#1E8449"))
+        return item
@@ -0,0 +1,105 @@
+# recidivism_window.py
+from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QSpinBox, QPushButton, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QMessageBox, QTabWidget)
+from PyQt6.QtCore import Qt
+
+from src.analytics.recidivism_engine import RecidivismEngine
+
+HEADERS = ["Matricule", "Nom et Prénoms", "Grade", "Sanctions (total)", "Du", "Au", "Statut le plus grave"]
+
+
+class RecidivismWindow(QMainWindow):
+    """Récidivistes (n sanctions en moins de N mois) et gendarmes les plus sanctionnés."""
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.recidivism_engine = RecidivismEngine(db_manager)
+        self.setWindowTitle("Récidives")
+        self.setMinimumSize(1000, 600)
+
+        self.setup_ui()
+        self.load_data()
+
+    def setup_ui(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+
+        # Titre
+        title = QLabel("Récidives disciplinaires")
+        title.setStyleSheet("font-size: 24px; font-weight: bold; padding: 20px;")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(title)
+
+        # Paramètres : nombre de sanctions et fenêtre en mois
+        controls = QHBoxLayout()
+
+        controls.addWidget(QLabel("Au moins"))
+        self.count_spin = QSpinBox()
+        self.count_spin.setRange(2, 20)
+        self.count_spin.setValue(3)
+        controls.addWidget(self.count_spin)
+
+        controls.addWidget(QLabel("sanctions en moins de"))
+        self.months_spin = QSpinBox()
+        self.months_spin.setRange(1, 240)
+        self.months_spin.setValue(24)
+        controls.addWidget(self.months_spin)
+        controls.addWidget(QLabel("mois"))
+
+        refresh_button = QPushButton("Afficher")
+        refresh_button.clicked.connect(self.load_data)
+        controls.addWidget(refresh_button)
+        controls.addStretch()
+        main_layout.addLayout(controls)
+
+        # Onglets : récidivistes et classement des plus sanctionnés
+        self.tabs = QTabWidget()
+        self.repeat_table = self._create_table()
+        self.top_table = self._create_table()
+        self.tabs.addTab(self.repeat_table, "Récidivistes")
+        self.tabs.addTab(self.top_table, "Les plus sanctionnés")
+        main_layout.addWidget(self.tabs)
+
+        self.legend = QLabel()
+        self.legend.setStyleSheet("font-size: 12px; color: #666666;")
+        main_layout.addWidget(self.legend)
+
+    @staticmethod
+    def _create_table():
+        table = QTableWidget()
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setAlternatingRowColors(True)
+        table.setColumnCount(len(HEADERS))
+        table.setHorizontalHeaderLabels(HEADERS)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        return table
+
+    def load_data(self):
+        try:
+            count = self.count_spin.value()
+            months = self.months_spin.value()
+
+            offenders = self.recidivism_engine.repeat_offenders(count, months)
+            self._fill(self.repeat_table, offenders)
+            self._fill(self.top_table, self.recidivism_engine.top_offenders())
+
+            self.legend.setText(f"{len(offenders)} gendarme(s) avec au moins {count} sanctions "
+                                f"en moins de {months} mois (dates des faits ; série la plus récente)")
+
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur de chargement: {str(e)}")
+
+    @staticmethod
+    def _fill(table, offenders):
+        table.setRowCount(len(offenders))
+        for row, offender in enumerate(offenders):
+            values = (offender.matricule, offender.nom_prenoms, offender.grade, offender.nb_sanctions,
+                      offender.debut, offender.fin, offender.pire_statut)
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(str(value if value is not None else ""))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                table.setItem(row, col, item)
+        table.resizeRowsToContents()
@@ -4,8 +4,6 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QDialog, QVBoxLayout, QPushBu
 from PyQt6.QtCore import pyqtSignal, Qt, QSize
 from PyQt6.QtGui import QIcon
 
-import pandas as pd
-
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
@@ -19,6 +17,11 @@ from .chart_selection_dialog import ChartSelectionDialog
 from datetime import datetime
 
 from .yearly_trends_window import YearlyTrendsWindow
+from .multi_year_trends_window import MultiYearTrendsWindow
+from .recidivism_window import RecidivismWindow
+
+from src.analytics.dashboard_engine import DashboardEngine
+from src.analytics.snapshot_service import AnalyticalSnapshotService
 
 
 class StatistiquesWindow(QMainWindow):
@@ -66,6 +69,10 @@ class StatistiquesWindow(QMainWindow):
         self.chart_dialog = None
         self.config_dialog = None
 
+        # Moteur du tableau de bord (une seule lecture par rafraîchissement)
+        self.dashboard_engine = DashboardEngine(self.db_manager)
+        self._dashboard_snapshot = None
+
         self.setup_ui()
 
     def _create_trend_card(self, initial_value, description, style, large=False):
@@ -197,6 +204,16 @@ class StatistiquesWindow(QMainWindow):
                 "text": "Tendances par année",
                 "icon": "../resources/icons/trend.png",
                 "callback": self.show_yearly_trends
+            },
+            {
+                "text": "Comparaison pluriannuelle",
+                "icon": "../resources/icons/calendar.png",
+                "callback": self.show_multi_year_trends
+            },
+            {
+                "text": "Récidives",
+                "icon": "../resources/icons/user.png",
+                "callback": self.show_recidivism
             }
         ]
 
@@ -241,147 +258,61 @@ class StatistiquesWindow(QMainWindow):
     def update_trends(self):
         """Met à jour toutes les tendances avec les données actuelles."""
         try:
-            with self.db_manager.get_connection() as conn:
-                current_year = datetime.now().year
-
-                # 1. Total des dossiers de l'année
-                total_query = """
-                    SELECT COUNT(DISTINCT numero_dossier) 
-                    FROM sanctions 
-                    WHERE strftime('%Y', date_enr) = ?
-                """
-                cursor = conn.cursor()
-                cursor.execute(total_query, (str(current_year),))
-                total = cursor.fetchone()[0]
-                self.total_card.value_label.setText(str(total))
-
-                # 2. Grade le plus sanctionné
-                grade_query = """
-                    SELECT g.grade, COUNT(DISTINCT s.numero_dossier) as count
-                    FROM sanctions s
-                    JOIN gendarmes g ON s.matricule = g.mle
-                    WHERE strftime('%Y', s.date_enr) = ?
-                    GROUP BY g.grade
-                    ORDER BY count DESC
-                    LIMIT 1
-                """
-                cursor.execute(grade_query, (str(current_year),))
-                grade_result = cursor.fetchone()
-                if grade_result:
-                    self.grade_card.value_label.setText(grade_result[0])
-
-                # 3. Tranche d'années de service la plus fréquente
-                service_query = """
-                    WITH service_ranges AS (
-                        SELECT 
-                            CASE 
-                                WHEN g.annee_service BETWEEN 0 AND 5 THEN '0-5ans'
-                                WHEN g.annee_service BETWEEN 6 AND 10 THEN '6-10ans'
-                                WHEN g.annee_service BETWEEN 11 AND 15 THEN '11-15ans'
-                                WHEN g.annee_service BETWEEN 16 AND 20 THEN '16-20ans'
-                                WHEN g.annee_service BETWEEN 21 AND 25 THEN '21-25ans'
-                                WHEN g.annee_service > 25 THEN '25+ans'
-                            END as range,
-                            COUNT(DISTINCT s.numero_dossier) as count
-                        FROM sanctions s
-                        JOIN gendarmes g ON s.matricule = g.mle
-                        WHERE strftime('%Y', s.date_enr) = ?
-                        GROUP BY range
-                    )
-                    SELECT range, count
-                    FROM service_ranges
-                    WHERE range IS NOT NULL
-                    ORDER BY count DESC
-                    LIMIT 1
-                """
-                cursor.execute(service_query, (str(current_year),))
-                service_result = cursor.fetchone()
-                if service_result:
-                    self.service_card.value_label.setText(service_result[0])
-
-                # 4. Subdivision la plus sanctionnée
-                subdiv_query = """
-                    SELECT g.subdiv, COUNT(DISTINCT s.numero_dossier) as count
-                    FROM sanctions s
-                    JOIN gendarmes g ON s.matricule = g.mle
-                    WHERE strftime('%Y', s.date_enr) = ?
-                    GROUP BY g.subdiv
-                    ORDER BY count DESC
-                    LIMIT 1
-                """
-                cursor.execute(subdiv_query, (str(current_year),))
-                subdiv_result = cursor.fetchone()
-                if subdiv_result:
-                    self.subdiv_card.value_label.setText(subdiv_result[0])
-
-                # 5. Nombre de dossiers d'absence irrégulière prolongée
-                absence_query = """
-                    SELECT COUNT(DISTINCT numero_dossier)
-                    FROM sanctions 
-                    WHERE strftime('%Y', date_enr) = ?
-                    AND faute_commise = 'ABSENCE IRREGULIERE PROLONGEE'
-                """
-                cursor.execute(absence_query, (str(current_year),))
-                absence_count = cursor.fetchone()[0]
-                print(f"Absence irrégulière prolongée count: {absence_count}")  # Pour debug
-                self.absence_card.value_label.setText(str(absence_count))
-
-                # 6. Graphique d'évolution
-                evolution_query = """
-                    SELECT 
-                        strftime('%m', date_enr) as mois,
-                        CASE strftime('%m', date_enr)
-                            WHEN '01' THEN 'Janvier'
-                            WHEN '02' THEN 'Février'
-                            WHEN '03' THEN 'Mars'
-                            WHEN '04' THEN 'Avril'
-                            WHEN '05' THEN 'Mai'
-                            WHEN '06' THEN 'Juin'
-                            WHEN '07' THEN 'Juillet'
-                            WHEN '08' THEN 'Août'
-                            WHEN '09' THEN 'Septembre'
-                            WHEN '10' THEN 'Octobre'
-                            WHEN '11' THEN 'Novembre'
-                            WHEN '12' THEN 'Décembre'
-                        END as mois_nom,
-                        COUNT(DISTINCT numero_dossier) as count
-                    FROM sanctions
-                    WHERE strftime('%Y', date_enr) = ?
-                    GROUP BY mois
-                    ORDER BY mois
-                """
-                evolution_df = pd.read_sql_query(evolution_query, conn, params=(str(current_year),))
-
-                # Mise à jour du graphique
-                self.graph_card.figure.clear()
-                ax = self.graph_card.figure.add_subplot(111)
-
-                # Configuration du style du graphique
-                ax.set_facecolor('#1C1C1E')
-                ax.spines['bottom'].set_color('#666666')
-                ax.spines['top'].set_visible(False)
-                ax.spines['right'].set_visible(False)
-                ax.spines['left'].set_color('#666666')
-                ax.tick_params(colors='#666666')
-
-                # Tracer la ligne avec zone d'ombre
-                line = ax.plot(evolution_df['mois_nom'], evolution_df['count'],
-                               color='#6C63FF', linewidth=2, marker='o')
-
-                # Ajouter l'ombre sous la courbe
-                ax.fill_between(evolution_df['mois_nom'], evolution_df['count'],
-                                color='#6C63FF', alpha=0.2)
-
-                # Limiter aux mois jusqu'au mois actuel
-                current_month = datetime.now().month
-                ax.set_xlim(-0.5, current_month - 0.5)
-
-                # Rotation des labels de mois pour meilleure lisibilité
-                plt.xticks(rotation=45, ha='right')
-
-                # Personnalisation finale
-                ax.grid(True, linestyle='--', alpha=0.1)
-                self.graph_card.canvas.draw()
+            current_year = datetime.now().year
+            snapshot = self.dashboard_engine.get_snapshot(current_year)
+
+            # Rien n'a changé depuis le dernier affichage : pas de redessin
+            if snapshot == self._dashboard_snapshot:
+                return
+            self._dashboard_snapshot = snapshot
+
+            # 1. Total des dossiers de l'année
+            self.total_card.value_label.setText(str(snapshot.total))
+
+            # 2. Grade le plus sanctionné
+            self.grade_card.value_label.setText(snapshot.top_grade or "-")
+
+            # 3. Tranche d'années de service la plus fréquente
+            self.service_card.value_label.setText(snapshot.top_service_range or "-")
+
+            # 4. Subdivision la plus sanctionnée
+            self.subdiv_card.value_label.setText(snapshot.top_subdiv or "-")
+
+            # 5. Nombre de dossiers d'absence irrégulière prolongée
+            self.absence_card.value_label.setText(str(snapshot.absences))
+
+            # 6. Graphique d'évolution
+            mois_noms = [mois for mois, _ in snapshot.monthly]
+            counts = [count for _, count in snapshot.monthly]
+
+            # Mise à jour du graphique
+            self.graph_card.figure.clear()
+            ax = self.graph_card.figure.add_subplot(111)
+
+            # Configuration du style du graphique
+            ax.set_facecolor('#1C1C1E')
+            ax.spines['bottom'].set_color('#666666')
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            ax.spines['left'].set_color('#666666')
+            ax.tick_params(colors='#666666')
+
+            # Tracer la ligne avec zone d'ombre
+            ax.plot(mois_noms, counts, color='#6C63FF', linewidth=2, marker='o')
+
+            # Ajouter l'ombre sous la courbe
+            ax.fill_between(mois_noms, counts, color='#6C63FF', alpha=0.2)
+
+            # Limiter aux mois jusqu'au mois actuel
+            current_month = datetime.now().month
+            ax.set_xlim(-0.5, current_month - 0.5)
+
+            # Rotation des labels de mois pour meilleure lisibilité
+            plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+
+            # Personnalisation finale
+            ax.grid(True, linestyle='--', alpha=0.1)
+            self.graph_card.canvas.draw()
 
         except Exception as e:
             print(f"Erreur dans update_trends: {str(e)}")
@@ -540,7 +471,7 @@ class StatistiquesWindow(QMainWindow):
             # Utiliser la nouvelle méthode pour récupérer les données
             df = self.get_statistics_data()
             if df is not None:
-                stats = self.calculate_statistics()
+                stats = self.calculate_statistics(df)
 
                 if stats:
                     # Requête modifiée pour éviter les doublons en utilisant les données calculées
@@ -554,20 +485,10 @@ class StatistiquesWindow(QMainWindow):
                 with self.db_manager.get_connection() as conn:
                     cursor = conn.cursor()
 
-                    # Requête modifiée pour éviter les doublons
+                    # Une ligne par dossier dans la table d'en-tête
                     cursor.execute("""
-                        WITH unique_sanctions AS (
-                            SELECT DISTINCT 
-                                numero_dossier,
-                                MIN(matricule) as matricule,
-                                MIN(date_enr) as date_enr,
-                                MIN(unite) as unite,
-                                MIN(subdivision) as subdivision
-                            FROM sanctions
-                            GROUP BY numero_dossier
-                        )
                         SELECT COUNT(*) as total_sanctions
-                        FROM unique_sanctions
+                        FROM dossiers
                     """)
                     total_sanctions = cursor.fetchone()[0]
 
@@ -601,67 +522,20 @@ class StatistiquesWindow(QMainWindow):
             )
 
     def get_statistics_data(self):
-        """Récupère et organise les données pour les statistiques"""
+        """Récupère et organise les données pour les statistiques (snapshot partagé)"""
         try:
-            # Utiliser la même requête que la liste exhaustive
-            sanctions_query = """
-            SELECT 
-                s.id,
-                s.date_enr,
-                s.matricule,
-                s.date_faits,
-                s.faute_commise,
-                s.categorie,
-                s.statut,
-                s.numero_dossier,
-                s.annee_punition
-            FROM sanctions s
-            WHERE 1=1
-            """
-
-            with self.db_manager.get_connection() as conn:
-                # Récupérer les données des sanctions
-                sanctions_df = pd.read_sql_query(sanctions_query, conn)
-
-                # Récupérer les données des gendarmes pour chaque matricule unique
-                gendarmes_data = []
-                unique_matricules = sanctions_df['matricule'].unique()
-
-                for matricule in unique_matricules:
-                    gendarme_query = """
-                    SELECT 
-                        mle,
-                        nom_prenoms,
-                        grade,
-                        subdiv,
-                        annee_service,
-                        situation_matrimoniale
-                    FROM gendarmes 
-                    WHERE mle = ?
-                    """
-                    gendarme_df = pd.read_sql_query(gendarme_query, conn, params=[matricule])
-                    if not gendarme_df.empty:
-                        gendarmes_data.append(gendarme_df.iloc[0])
-
-                gendarmes_df = pd.DataFrame(gendarmes_data)
-
-                # Fusionner les données
-                stats_df = sanctions_df.merge(
-                    gendarmes_df,
-                    left_on='matricule',
-                    right_on='mle',
-                    how='left'
-                )
-
-                return stats_df
+            # Jointure sanctions × gendarmes construite une fois par version des données,
+            # partagée avec la visualisation et la liste exhaustive
+            return AnalyticalSnapshotService.for_db(self.db_manager).get_frame()
 
         except Exception as e:
             print(f"Erreur dans get_statistics_data: {str(e)}")
             return None
 
-    def calculate_statistics(self):
+    def calculate_statistics(self, df=None):
         """Calcule les différentes statistiques"""
-        df = self.get_statistics_data()
+        if df is None:
+            df = self.get_statistics_data()
         if df is not None:
             stats = {
                 'total_sanctions': len(df),
@@ -704,4 +578,40 @@ class StatistiquesWindow(QMainWindow):
                 self,
                 "Erreur",
                 f"Erreur lors de l'ouverture des tendances: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    def show_multi_year_trends(self):
+        """Ouvre la comparaison des tendances sur plusieurs années"""
+        try:
+            self.multi_trends_window = MultiYearTrendsWindow(self.db_manager, self)
+            if self.isVisible():
+                geometry = self.geometry()
+                self.multi_trends_window.move(
+                    geometry.x() + 50,
+                    geometry.y() + 50
+                )
+            self.multi_trends_window.show()
+        except Exception as e:
+            QMessageBox.critical(
+                self,
+                "Erreur",
+                f"Erreur lors de l'ouverture de la comparaison pluriannuelle: {str(e)}"
+            )
+
+    def show_recidivism(self):
+        """Ouvre le rapport des récidives et des gendarmes les plus sanctionnés"""
+        try:
+            self.recidivism_window = RecidivismWindow(self.db_manager, self)
+            if self.isVisible():
+                geometry = self.geometry()
+                self.recidivism_window.move(
+                    geometry.x() + 50,
+                    geometry.y() + 50
+                )
+            self.recidivism_window.show()
+        except Exception as e:
+            QMessageBox.critical(
+                self,
+                "Erreur",
+                f"Erreur lors de l'ouverture des récidives: {str(e)}"
+            )
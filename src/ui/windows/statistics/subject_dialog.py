@@ -10,6 +10,7 @@ from PyQt6.QtCore import Qt
 import pandas as pd
 
 from src.data.gendarmerie.structure import SUBDIVISIONS, SERVICE_RANGES, ANALYSIS_THEMES
+from src.database.catalog_service import DimensionCatalogService
 from src.ui.windows.statistics.visualization_window import VisualizationWindow
 
 
@@ -208,28 +209,21 @@ class SubjectDialog(QDialog):
             self.value_combo.addItem(f"Tous les {current_theme.lower()}")
 
             try:
-                with self.db_manager.get_connection() as conn:
-                    cursor = conn.cursor()
-
-                    if current_theme == "Subdivision":
-                        # Utiliser les subdivisions prédéfinies
-                        for subdiv in SUBDIVISIONS:
-                            self.value_combo.addItem(subdiv)
-
-                    elif current_theme == "Tranches années service":
-                        # Utiliser les tranches d'années prédéfinies
-                        for service_range in SERVICE_RANGES:
-                            self.value_combo.addItem(service_range)
-
-                    else:
-                        # Récupérer les valeurs de la base de données
-                        table = "gendarmes" if field in ["situation_matrimoniale", "annee_service"] else "sanctions"
-                        query = f"SELECT DISTINCT {field} FROM {table} WHERE {field} IS NOT NULL ORDER BY {field}"
-                        cursor.execute(query)
-                        values = cursor.fetchall()
-                        for value in values:
-                            if value[0]:  # Ignorer les valeurs NULL
-                                self.value_combo.addItem(str(value[0]))
+                if current_theme == "Subdivision":
+                    # Utiliser les subdivisions prédéfinies
+                    for subdiv in SUBDIVISIONS:
+                        self.value_combo.addItem(subdiv)
+
+                elif current_theme == "Tranches années service":
+                    # Utiliser les tranches d'années prédéfinies
+                    for service_range in SERVICE_RANGES:
+                        self.value_combo.addItem(service_range)
+
+                else:
+                    # Valeurs du catalogue des dimensions (en mémoire)
+                    catalog = DimensionCatalogService.for_db(self.db_manager)
+                    for value in catalog.values(field):
+                        self.value_combo.addItem(str(value))
 
             except Exception as e:
                 print(f"Erreur lors de la récupération des valeurs : {str(e)}")
@@ -7,11 +7,14 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from src.data.gendarmerie.structure import SUBDIVISIONS, SERVICE_RANGES, ANALYSIS_THEMES
+from src.database.catalog_service import DimensionCatalogService
 from src.ui.windows.statistics.chart_selection_dialog import ChartSelectionDialog
+from src.analytics.measures import MEASURES, DEFAULT_MEASURE
 
 
 class TableConfigDialog(QDialog):
     THEMES = ANALYSIS_THEMES
+    NO_SUB_LEVEL = "(aucun)"
 
     def __init__(self, db_manager, parent=None):
         super().__init__(parent)
@@ -51,6 +54,14 @@ class TableConfigDialog(QDialog):
         x_theme_layout.addWidget(self.x_value_combo)
 
         x_layout.addLayout(x_theme_layout)
+
+        # Sous-niveau de colonnes (tableau hiérarchique avec sous-totaux)
+        x_sub_layout = QHBoxLayout()
+        self.x_sub_combo = QComboBox()
+        x_sub_layout.addWidget(QLabel("Sous-niveau:"))
+        x_sub_layout.addWidget(self.x_sub_combo)
+        x_sub_layout.addStretch()
+        x_layout.addLayout(x_sub_layout)
         axes_layout.addLayout(x_layout)
 
         # Axe Y
@@ -67,11 +78,29 @@ class TableConfigDialog(QDialog):
         y_theme_layout.addWidget(self.y_value_combo)
 
         y_layout.addLayout(y_theme_layout)
+
+        # Sous-niveau de lignes
+        y_sub_layout = QHBoxLayout()
+        self.y_sub_combo = QComboBox()
+        y_sub_layout.addWidget(QLabel("Sous-niveau:"))
+        y_sub_layout.addWidget(self.y_sub_combo)
+        y_sub_layout.addStretch()
+        y_layout.addLayout(y_sub_layout)
         axes_layout.addLayout(y_layout)
 
         axes_group.setLayout(axes_layout)
         layout.addWidget(axes_group)
 
+        # Mesure affichée dans chaque cellule
+        measure_layout = QHBoxLayout()
+        self.measure_combo = QComboBox()
+        for key, label in MEASURES.items():
+            self.measure_combo.addItem(label, key)
+        measure_layout.addWidget(QLabel("Mesure:"))
+        measure_layout.addWidget(self.measure_combo)
+        measure_layout.addStretch()
+        layout.addLayout(measure_layout)
+
         # Boutons standard
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok |
@@ -99,6 +128,8 @@ class TableConfigDialog(QDialog):
 
         self.x_theme_combo.addItems(themes)
         self.y_theme_combo.addItems(themes)
+        self.x_sub_combo.addItems([self.NO_SUB_LEVEL] + themes)
+        self.y_sub_combo.addItems([self.NO_SUB_LEVEL] + themes)
 
     def get_configuration(self):
         """Retourne la configuration complète."""
@@ -115,8 +146,19 @@ class TableConfigDialog(QDialog):
                 "value": self.y_value_combo.currentText()
             }
         }
+
+        # Dimensions du tableau hiérarchique : axe principal puis sous-niveau éventuel
+        config["columns"] = [config["x_axis"]["field"]] + self._sub_level_fields(self.x_sub_combo)
+        config["rows"] = [config["y_axis"]["field"]] + self._sub_level_fields(self.y_sub_combo)
+        config["measure"] = self.measure_combo.currentData() or DEFAULT_MEASURE
         return config
 
+    def _sub_level_fields(self, combo):
+        theme = combo.currentText()
+        if theme == self.NO_SUB_LEVEL or theme not in self.THEMES:
+            return []
+        return [self.THEMES[theme]["field"]]
+
     def update_value_combo(self, theme_combo, value_combo):
         """Met à jour le combo des valeurs en fonction du thème sélectionné."""
         theme = theme_combo.currentText()
@@ -135,27 +177,11 @@ class TableConfigDialog(QDialog):
                 # Utiliser les subdivisions prédéfinies
                 for subdiv in SUBDIVISIONS:
                     value_combo.addItem(subdiv)
-            elif field == "grade":
-                # Récupérer tous les grades disponibles
-                with self.db_manager.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT DISTINCT grade FROM gendarmes ORDER BY grade")
-                    grades = cursor.fetchall()
-                    for grade in grades:
-                        if grade[0]:  # Ignorer les valeurs NULL
-                            value_combo.addItem(str(grade[0]))
             else:
-                # Récupérer les valeurs de la base de données
-                with self.db_manager.get_connection() as conn:
-                    cursor = conn.cursor()
-                    table = "gendarmes" if field in ["situation_matrimoniale", "annee_service",
-                                                     "grade"] else "sanctions"
-                    query = f"SELECT DISTINCT {field} FROM {table} WHERE {field} IS NOT NULL ORDER BY {field}"
-                    cursor.execute(query)
-                    values = cursor.fetchall()
-                    for value in values:
-                        if value[0]:  # Ignorer les valeurs NULL
-                            value_combo.addItem(str(value[0]))
+                # Valeurs du catalogue des dimensions (en mémoire)
+                catalog = DimensionCatalogService.for_db(self.db_manager)
+                for value in catalog.values(field):
+                    value_combo.addItem(str(value))
 
     def accept(self):
         """Appelé quand l'utilisateur valide la configuration."""
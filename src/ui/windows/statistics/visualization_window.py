@@ -14,26 +14,18 @@ import seaborn as sns
 
 #pour excel
 import pandas as pd
-#pour les pdf
-from reportlab.lib import colors, utils
-from reportlab.lib.units import inch
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-#pour powerpoint
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
-from pptx.oxml import parse_xml
+# reportlab (pdf), python-pptx (powerpoint) et openpyxl (excel) sont importés
+# dans les méthodes d'export pour ne pas ralentir l'ouverture de la fenêtre
 
 from src.data.gendarmerie.structure import SUBDIVISIONS, SERVICE_RANGES, ANALYSIS_THEMES
 from src.ui.windows.statistics.chart_selection_dialog import ChartSelectionDialog
+from src.analytics.snapshot_service import AnalyticalSnapshotService, filter_subject
+from src.analytics.cube_engine import CubeEngine
+from src.analytics.crosstab_engine import crosstab
+from src.analytics.measures import measure_pivot, measure_long, MEASURES, DEFAULT_MEASURE
+from src.analytics.pivot_engine import PivotEngine, PivotSpec, is_total_label, header_label
 from datetime import datetime
 
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, PatternFill
-
 
 class VisualizationWindow(QMainWindow):
     """Fenêtre de visualisation des données statistiques."""
@@ -46,7 +38,9 @@ class VisualizationWindow(QMainWindow):
         self.db_manager = db_manager
         self.config = config
         self.pivot_df = None
+        self.report_df = None  # Tableau hiérarchique (plus de deux dimensions)
         self.current_chart_config = None
+        self.cube_engine = CubeEngine(db_manager)
         self.setWindowTitle("Visualisation des statistiques")
         self.setMinimumSize(1000, 800)
 
@@ -179,220 +173,64 @@ class VisualizationWindow(QMainWindow):
     def load_data(self):
         """Charge et affiche les données selon la configuration."""
         try:
-            with self.db_manager.get_connection() as conn:
-                # Récupérer la configuration complète
-                subject_selection = self.config.get('subject_selection')
-                if not subject_selection:
-                    raise Exception("Aucun sujet d'analyse sélectionné")
-
-                print("\nConfiguration:", self.config)  # Debug
-
-                # Définir les champs de chaque table
-                sanctions_fields = ['faute_commise', 'categorie', 'statut', 'annee_punition', 'annee_faits']
-                gendarmes_fields = ['grade', 'subdiv', 'situation_matrimoniale', 'annee_service']
-
-                # Initialiser les variables pour les requêtes
-                gendarmes_where = ""
-                gendarmes_params = []
-                sanctions_where = ""
-                sanctions_params = []
-
-                if not subject_selection['value'].startswith('Tous'):
-                    field = subject_selection['field']
-                    value = subject_selection['value']
-
-                    if field in gendarmes_fields:
-                        gendarmes_where = f" WHERE g.{field} = ?"
-                        gendarmes_params = [value]
-                        # Requête pour obtenir les gendarmes (filtrée ou non)
-                    gendarmes_query = f"""
-                    SELECT 
-                        mle,
-                        grade,
-                        subdiv,
-                        annee_service,
-                        situation_matrimoniale
-                    FROM gendarmes g
-                    {gendarmes_where}
-                    """
-                    gendarmes_df = pd.read_sql_query(gendarmes_query, conn, params=gendarmes_params)
-                    print(f"Nombre de gendarmes: {len(gendarmes_df)}")
-
-                    # Construction de la requête pour les sanctions uniques
-                    sanctions_query = """
-                    WITH unique_sanctions AS (
-                        SELECT 
-                            MIN(s.id) as first_id,
-                            COALESCE(s.numero_dossier, 'SANS_NUMERO_' || MIN(s.id)) as unique_dossier,
-                            s.matricule,
-                            s.date_enr,
-                            s.date_faits,
-                            s.faute_commise,
-                            s.categorie,
-                            s.statut,
-                            s.annee_punition,
-                            s.annee_faits,
-                            COUNT(*) as sanctions_count
-                        FROM sanctions s
-                        """
-
-                    # Si le sujet vient des sanctions, ajouter le WHERE
-                    if field in sanctions_fields:
-                        sanctions_where = f" WHERE s.{field} = ?"
-                        sanctions_params = [value]
-                        sanctions_query += sanctions_where
-
-                    # Continuer la requête des sanctions
-                    sanctions_query += """
-                    GROUP BY COALESCE(s.numero_dossier, 'SANS_NUMERO_' || s.id),
-                             s.matricule,
-                             s.date_enr,
-                             s.date_faits,
-                             s.faute_commise,
-                             s.categorie,
-                             s.statut,
-                             s.annee_punition,
-                             s.annee_faits
-                    )
-                    SELECT * FROM unique_sanctions
-                    """
-                    print("\nRequête sanctions:", sanctions_query)  # Debug
-                    print("Paramètres sanctions:", sanctions_params)  # Debug
-                    print("Requête gendarmes:", gendarmes_query)  # Debug
-                    print("Paramètres gendarmes:", gendarmes_params)  # Debug
-
-                    # Exécuter la requête des sanctions
-                    sanctions_df = pd.read_sql_query(sanctions_query, conn, params=sanctions_params)
-                    print(f"\nNombre de sanctions uniques: {len(sanctions_df)}")
-
-                    # Convertir les colonnes pour la fusion
-                    sanctions_df['matricule'] = sanctions_df['matricule'].astype(str)
-                    gendarmes_df['mle'] = gendarmes_df['mle'].astype(str)
-
-                    print("\nDébug avant fusion:")
-                    print(f"Nombre de sanctions uniques: {len(sanctions_df)}")
-                    print(f"Colonnes sanctions: {sanctions_df.columns}")
-                    print(f"Colonnes gendarmes: {gendarmes_df.columns}")
-
-                    # Fusion des données
-                    if field in gendarmes_fields:
-                        # Si le sujet vient des gendarmes, on fait d'abord la fusion
-                        df = sanctions_df.merge(
-                            gendarmes_df,
-                            left_on='matricule',
-                            right_on='mle',
-                            how='inner'  # On ne garde que les sanctions des gendarmes filtrés
-                        )
-                    else:
-                        # Sinon, fusion normale
-                        df = sanctions_df.merge(
-                            gendarmes_df,
-                            left_on='matricule',
-                            right_on='mle',
-                            how='left'
-                        )
-
-                    # S'assurer de l'unicité des enregistrements après la fusion
-                    df = df.drop_duplicates(subset=['first_id', 'unique_dossier'])
-                    print("\nDébug après fusion et déduplication:")
-                    print(f"Nombre total d'enregistrements: {len(df)}")
-
-                    # Vérification des doublons éventuels
-                    doublons = df[df.duplicated(['first_id', 'unique_dossier'], keep=False)]
-                    if not doublons.empty:
-                        print("\nDoublons trouvés:")
-                        print(doublons[['first_id', 'unique_dossier', 'matricule', 'mle']])
-
-                    if df is None or df.empty:
-                        raise Exception("Aucune donnée disponible")
-
-                    # Modifier le traitement des années de service
-                    if any(config["field"] == "annee_service" for config in
-                           [self.config["x_axis"], self.config["y_axis"]]):
-                        # Définir les catégories à l'avance avec "Non spécifié"
-                        service_categories = ['0-5 ANS', '6-10 ANS', '11-15 ANS', '16-20 ANS',
-                                              '21-25 ANS', '26-30 ANS', '31-35 ANS', '36-40 ANS', 'Non spécifié']
-
-                        # Conversion en catégories
-                        df['annee_service'] = pd.to_numeric(df['annee_service'], errors='coerce')
-
-                        # Création des tranches avec gestion des valeurs nulles
-                        df['service_range'] = pd.cut(
-                            df['annee_service'],
-                            bins=[0, 5, 10, 15, 20, 25, 30, 35, 40],
-                            labels=service_categories[:-1],  # Exclure "Non spécifié"
-                            include_lowest=True
-                        )
-
-                        # Remplacer les NaN par "Non spécifié"
-                        df['service_range'] = df['service_range'].cat.add_categories(['Non spécifié'])
-                        df.loc[df['service_range'].isna(), 'service_range'] = 'Non spécifié'
-
-                    # Traitement spécial pour les années de service si nécessaire
-                    # if any(config["field"] == "annee_service"
-                    #        for config in [self.config["x_axis"], self.config["y_axis"]]):
-                    #     # S'assurer que annee_service est numérique
-                    #     df['annee_service'] = pd.to_numeric(df['annee_service'], errors='coerce')
-                    #
-                    #     # Créer d'abord un masque pour les valeurs nulles/invalides
-                    #     null_mask = df['annee_service'].isna()
-                    #
-                    #     # Si aucune valeur nulle, pas besoin de catégorie "Non spécifié"
-                    #     if not null_mask.any():
-                    #         df['service_range'] = pd.cut(
-                    #             df['annee_service'],
-                    #             bins=[0, 5, 10, 15, 20, 25, 30, 35, 40],
-                    #             labels=['0-5 ANS', '6-10 ANS', '11-15 ANS', '16-20 ANS',
-                    #                     '21-25 ANS', '26-30 ANS', '31-35 ANS', '36-40 ANS'],
-                    #             include_lowest=True
-                    #         )
-                    #     else:
-                    #         # Créer les tranches pour les valeurs valides
-                    #         df.loc[~null_mask, 'service_range'] = pd.cut(
-                    #             df.loc[~null_mask, 'annee_service'],
-                    #             bins=[0, 5, 10, 15, 20, 25, 30, 35, 40],
-                    #             labels=['0-5 ANS', '6-10 ANS', '11-15 ANS', '16-20 ANS',
-                    #                     '21-25 ANS', '26-30 ANS', '31-35 ANS', '36-40 ANS'],
-                    #             include_lowest=True
-                    #         )
-                    #         # Attribuer "Non spécifié" aux valeurs nulles/invalides
-                    #         df.loc[null_mask, 'service_range'] = 'Non spécifié'
-
-                    # Préparation des données pour les axes
-                    x_config = self.config["x_axis"]
-                    y_config = self.config["y_axis"]
-
-                    # Déterminer les valeurs des axes
-                    if x_config["field"] == "annee_service":
-                        x_values = df['service_range']
-                    else:
-                        x_values = df[x_config["field"]]
+            # Récupérer la configuration complète
+            subject_selection = self.config.get('subject_selection')
+            if not subject_selection:
+                raise Exception("Aucun sujet d'analyse sélectionné")
 
-                    if y_config["field"] == "annee_service":
-                        y_values = df['service_range']
-                    else:
-                        y_values = df[y_config["field"]]
-
-                    # Création du tableau croisé
-                    pivot_df = pd.crosstab(
-                        index=y_values,
-                        columns=x_values,
-                        dropna=True,
-                        margins=True,
-                        margins_name='TOTAL'
-                    )
+            print("\nConfiguration:", self.config)  # Debug
+
+            # Plus de deux dimensions : tableau hiérarchique avec sous-totaux
+            if len(self.config.get("rows", [])) + len(self.config.get("columns", [])) > 2:
+                self._load_pivot(subject_selection)
+                return
+
+            # Les mesures autres que le nombre de sanctions sont calculées sur le snapshot
+            measure = self.config.get("measure", DEFAULT_MEASURE)
+
+            # Axes et filtre couverts par le cube statistique : coupe directe sans relire les sanctions
+            if measure == DEFAULT_MEASURE and self._load_from_cube(subject_selection):
+                return
+
+            # Snapshot partagé sanctions × gendarmes (construit une fois par version des données)
+            df = AnalyticalSnapshotService.for_db(self.db_manager).get_frame()
+
+            # Une ligne par sanction unique (les lignes identiques d'un même dossier sont ignorées)
+            df = df[~df['est_doublon']]
+
+            # Filtre du sujet d'analyse
+            if not subject_selection['value'].startswith('Tous'):
+                df = filter_subject(df, subject_selection['field'], subject_selection['value'])
+
+            print(f"Nombre total d'enregistrements: {len(df)}")  # Debug
+
+            if df.empty:
+                raise Exception("Aucune donnée disponible")
 
-                    # Préparation des données pour les graphiques
-                    graph_df = pd.DataFrame({
-                        'x_value': x_values,
-                        'y_value': y_values
-                    })
-                    graph_df = graph_df.groupby(['x_value', 'y_value'], observed=True).size().reset_index(
-                        name='count')
+            # Préparation des données pour les axes
+            x_config = self.config["x_axis"]
+            y_config = self.config["y_axis"]
 
-                    self.df = graph_df
-                    self.pivot_df = pivot_df
-                    self.update_table(pivot_df)
+            # Les années de service sont présentées par tranches
+            x_field = 'service_range' if x_config["field"] == "annee_service" else x_config["field"]
+            y_field = 'service_range' if y_config["field"] == "annee_service" else y_config["field"]
+
+            x_values = df[x_field]
+            y_values = df[y_field]
+
+            if measure != DEFAULT_MEASURE:
+                # Mesure numérique par cellule (jours d'arrêt, sanctions par dossier)
+                pivot_df = measure_pivot(df, x_field, y_field, measure)
+                graph_df = measure_long(pivot_df)
+            else:
+                # Tableau croisé et données des graphiques issus d'un même comptage
+                result = crosstab(x_values, y_values)
+                pivot_df = result.to_pivot()
+                graph_df = result.to_long()
+
+            self.df = graph_df
+            self.pivot_df = pivot_df
+            self.update_table(pivot_df)
 
         except Exception as e:
             print(f"Error in load_data: {str(e)}")
@@ -404,6 +242,45 @@ class VisualizationWindow(QMainWindow):
                 f"Erreur lors du chargement des données: {str(e)}"
             )
 
+    def _load_from_cube(self, subject_selection):
+        """Remplit le tableau et les données du graphique depuis le cube, False s'il ne couvre pas la demande"""
+        x_field = self.config["x_axis"]["field"]
+        y_field = self.config["y_axis"]["field"]
+        filters = {}
+        if not subject_selection['value'].startswith('Tous'):
+            filters[subject_selection['field']] = subject_selection['value']
+
+        cells = self.cube_engine.slice(x_field, y_field, filters)
+        if cells is None:
+            return False
+
+        if cells.empty:
+            raise Exception("Aucune donnée disponible")
+
+        result = CubeEngine.crosstab(cells, x_field, y_field)
+        self.df = result.to_long()
+        self.pivot_df = result.to_pivot()
+        self.update_table(self.pivot_df)
+        return True
+
+    def _load_pivot(self, subject_selection):
+        """Tableau multi-niveaux ; les graphiques utilisent le croisement des niveaux principaux"""
+        filters = {}
+        if not subject_selection['value'].startswith('Tous'):
+            filters[subject_selection['field']] = subject_selection['value']
+        spec = PivotSpec(rows=tuple(self.config["rows"]), columns=tuple(self.config["columns"]),
+                         filters=filters)
+
+        result = PivotEngine(self.db_manager).compute(spec)
+        if result is None:
+            raise Exception("Aucune donnée disponible")
+
+        main = result.crosstab()
+        self.df = main.to_long()
+        self.pivot_df = main.to_pivot()
+        self.report_df = result.table
+        self.update_table(self.report_df)
+
     def cleanup(self):
         plt.close('all')
         if hasattr(self, 'canvas'):
@@ -420,12 +297,7 @@ class VisualizationWindow(QMainWindow):
                 value = config.get("value", "")
                 if value and not value.startswith("Tous"):
                     if config["field"] == "annee_service":
-                        service_range = value
-                        start, end = map(int, service_range.split("-")[0:2])
-                        filtered_df = filtered_df[
-                            (filtered_df['annee_service'] >= start) &
-                            (filtered_df['annee_service'] <= end)
-                            ]
+                        filtered_df = filter_subject(filtered_df, "annee_service", value)
                     else:
                         field = config["field"]
                         filtered_df = filtered_df[filtered_df[field] == value]
@@ -450,9 +322,9 @@ class VisualizationWindow(QMainWindow):
             self.table.setRowCount(len(pivot_df.index))
             self.table.setColumnCount(len(pivot_df.columns))
 
-            # En-têtes
-            self.table.setHorizontalHeaderLabels(pivot_df.columns.astype(str))
-            self.table.setVerticalHeaderLabels(pivot_df.index.astype(str))
+            # En-têtes (niveaux hiérarchiques séparés par " / ")
+            self.table.setHorizontalHeaderLabels([header_label(label) for label in pivot_df.columns])
+            self.table.setVerticalHeaderLabels([header_label(label) for label in pivot_df.index])
 
             # Remplissage des données
             for i in range(len(pivot_df.index)):
@@ -461,20 +333,27 @@ class VisualizationWindow(QMainWindow):
                         value = pivot_df.iloc[i, j]
                         # S'assurer que la valeur est numérique
                         if pd.isna(value):
-                            str_value = "0"
-                        else:
+                            # Mesure sans valeur (aucun jour d'arrêt renseigné dans la cellule)
+                            str_value = "-"
+                        elif float(value).is_integer():
                             str_value = str(int(value))
+                        else:
+                            str_value = f"{value:.1f}"
                     except:
                         str_value = "0"
 
                     item = QTableWidgetItem(str_value)
                     item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
 
-                    # Style pour les totaux
-                    if (pivot_df.index[i] == 'TOTAL' or
-                            pivot_df.columns[j] == 'TOTAL'):
-                        item.setBackground(QColor(128, 128, 128))
-                        item.setForeground(QColor(255, 255, 255))
+                    # Style pour les totaux et sous-totaux
+                    row_label, column_label = pivot_df.index[i], pivot_df.columns[j]
+                    if is_total_label(row_label) or is_total_label(column_label):
+                        if (is_total_label(row_label, include_subtotals=False) or
+                                is_total_label(column_label, include_subtotals=False)):
+                            item.setBackground(QColor(128, 128, 128))
+                            item.setForeground(QColor(255, 255, 255))
+                        else:
+                            item.setBackground(QColor(190, 190, 190))
                         font = item.font()
                         font.setBold(True)
                         item.setFont(font)
@@ -769,13 +648,15 @@ class VisualizationWindow(QMainWindow):
             plot_df = self.pivot_df.drop('TOTAL', axis=0).drop('TOTAL', axis=1)
 
             # Création de la heatmap
+            # Les mesures numériques (jours d'arrêt...) sont des décimaux
+            measure = self.config.get("measure", DEFAULT_MEASURE)
             sns.heatmap(
                 plot_df,
                 annot=True,
-                fmt='d',
+                fmt='d' if pd.api.types.is_integer_dtype(plot_df.to_numpy().dtype) else '.1f',
                 cmap='YlOrRd',
                 ax=ax,
-                cbar_kws={'label': 'Nombre de sanctions'}
+                cbar_kws={'label': MEASURES.get(measure, MEASURES[DEFAULT_MEASURE])}
             )
 
             # Style et étiquettes
@@ -1302,6 +1183,9 @@ class VisualizationWindow(QMainWindow):
     def export_excel(self):
         """Exporte les données vers Excel."""
         try:
+            from openpyxl.utils import get_column_letter
+            from openpyxl.styles import Font, PatternFill
+
             # Nom du fichier par défaut
             default_name = f"statistiques_excel_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             file_path, _ = QFileDialog.getSaveFileName(
@@ -1316,42 +1200,47 @@ class VisualizationWindow(QMainWindow):
 
             # Création du writer Excel
             with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                # Récupération des données du tableau
-                data = []
-                headers = []
-
-                # En-têtes
-                for j in range(self.table.columnCount()):
-                    headers.append(self.table.horizontalHeaderItem(j).text())
+                if self.report_df is not None:
+                    # Tableau hiérarchique : niveaux de lignes et de colonnes conservés (cellules fusionnées)
+                    self.report_df.to_excel(writer, sheet_name='Données')
+                    worksheet = writer.sheets['Données']
+                else:
+                    # Récupération des données du tableau
+                    data = []
+                    headers = []
 
-                # Données
-                for i in range(self.table.rowCount()):
-                    row = []
+                    # En-têtes
                     for j in range(self.table.columnCount()):
-                        item = self.table.item(i, j)
-                        row.append(item.text() if item else "")
-                    data.append(row)
-
-                # Création du DataFrame
-                df = pd.DataFrame(data, columns=headers)
-
-                # Export vers Excel avec mise en forme
-                df.to_excel(writer, sheet_name='Données', index=False)
-                worksheet = writer.sheets['Données']
-
-                # Ajustement des colonnes
-                for idx, col in enumerate(df.columns):
-                    max_length = max(
-                        df[col].astype(str).apply(len).max(),
-                        len(str(col))
-                    ) + 2
-                    # Convertir en largeur Excel
-                    worksheet.column_dimensions[get_column_letter(idx + 1)].width = max_length
+                        headers.append(self.table.horizontalHeaderItem(j).text())
+
+                    # Données
+                    for i in range(self.table.rowCount()):
+                        row = []
+                        for j in range(self.table.columnCount()):
+                            item = self.table.item(i, j)
+                            row.append(item.text() if item else "")
+                        data.append(row)
+
+                    # Création du DataFrame
+                    df = pd.DataFrame(data, columns=headers)
+
+                    # Export vers Excel avec mise en forme
+                    df.to_excel(writer, sheet_name='Données', index=False)
+                    worksheet = writer.sheets['Données']
+
+                    # Ajustement des colonnes
+                    for idx, col in enumerate(df.columns):
+                        max_length = max(
+                            df[col].astype(str).apply(len).max(),
+                            len(str(col))
+                        ) + 2
+                        # Convertir en largeur Excel
+                        worksheet.column_dimensions[get_column_letter(idx + 1)].width = max_length
 
                 # Style pour les totaux
                 for row in worksheet.iter_rows():
                     for cell in row:
-                        if 'TOTAL' in str(cell.value):
+                        if 'TOTAL' in str(cell.value) or 'Sous-total' in str(cell.value):
                             cell.font = Font(bold=True)
                             cell.fill = PatternFill(start_color="808080",
                                                     end_color="808080",
@@ -1373,6 +1262,11 @@ class VisualizationWindow(QMainWindow):
     def export_pdf(self):
         """Exporte les données vers PDF avec mise en forme."""
         try:
+            from reportlab.lib import colors
+            from reportlab.lib.pagesizes import letter, landscape
+            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
             # Demander à l'utilisateur où sauvegarder le fichier
             default_name = f"statistiques_pdf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             file_path, _ = QFileDialog.getSaveFileName(
@@ -1521,6 +1415,11 @@ class VisualizationWindow(QMainWindow):
     def export_pptx(self):
         """Exporte les données vers PowerPoint avec mise en forme."""
         try:
+            from pptx import Presentation
+            from pptx.util import Inches, Pt
+            from pptx.enum.text import PP_ALIGN
+            from pptx.dml.color import RGBColor
+
             # Demander à l'utilisateur où sauvegarder le fichier
             default_name = f"statistiques_pptx_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx"
             file_path, _ = QFileDialog.getSaveFileName(
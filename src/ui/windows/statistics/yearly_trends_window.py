@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QGridLayout,
                              QLabel, QFrame, QMessageBox)
 from PyQt6.QtCore import Qt
 
+from src.analytics.year_summary_engine import YearSummaryEngine
 
 
 class YearlyTrendsWindow(QMainWindow):
@@ -10,6 +11,7 @@ class YearlyTrendsWindow(QMainWindow):
         super().__init__(parent)
         self.db_manager = db_manager
         self.year = year
+        self.summary_engine = YearSummaryEngine(db_manager)
         self.setWindowTitle(f"Tendances {year}")
         self.setMinimumSize(1000, 600)
 
@@ -146,194 +148,100 @@ class YearlyTrendsWindow(QMainWindow):
 
     def load_data(self):
         try:
-            with self.db_manager.get_connection() as conn:
-                # Charger et mettre à jour chaque carte
-                self._update_sanctions_card(conn)
-                self._update_grade_card(conn)
-                self._update_subdiv_card(conn)
-                self._update_age_card(conn)
-                self._update_faute_card(conn)
-                self._update_mois_card(conn)
-                self._update_region_card(conn)
+            # Un seul résumé pour toutes les cartes (simple lecture pour une année close)
+            summary = self.summary_engine.get_summary(self.year)
+
+            # Charger et mettre à jour chaque carte
+            self._update_sanctions_card(summary)
+            self._update_grade_card(summary)
+            self._update_subdiv_card(summary)
+            self._update_age_card(summary)
+            self._update_faute_card(summary)
+            self._update_mois_card(summary)
+            self._update_region_card(summary)
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur de chargement: {str(e)}")
 
-    def _update_sanctions_card(self, conn):
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT COUNT(DISTINCT numero_dossier)
-            FROM sanctions
-            WHERE strftime('%Y', date_enr) = ?
-        """, (str(self.year),))
-        total = cursor.fetchone()[0]
-
+    @staticmethod
+    def _percentage(count, total):
+        return round(count * 100.0 / total, 2) if total else 0
+
+    def _top_or_empty(self, summary, dimension, lowest=False):
+        """Retourne (valeur, nombre, pourcentage) pour la carte, ou (None, 0, 0) si l'année est vide"""
+        top = summary.top(dimension, lowest=lowest)
+        if top is None:
+            return None, 0, 0
+        valeur, count = top
+        if dimension in ('service', 'region'):
+            total = sum(summary.distribution(dimension).values())
+        else:
+            total = summary.total
+        return valeur, count, self._percentage(count, total)
+
+    def _update_sanctions_card(self, summary):
         self.sanctions_card.title_label.setText("Total des sanctions")
-        self.sanctions_card.value_label.setText(str(total))
+        self.sanctions_card.value_label.setText(str(summary.total))
         self.sanctions_card.title_label.setStyleSheet("font-size: 18px; font-weight: bold;")
         self.sanctions_card.value_label.setStyleSheet("font-size: 40px; font-weight: bold;")
 
-    # Implémenter les autres méthodes _update_*_card()...
-    def _update_grade_card(self, conn):
-        query = """
-        SELECT g.grade, COUNT(DISTINCT s.numero_dossier) as count,
-               ROUND(COUNT(DISTINCT s.numero_dossier) * 100.0 / 
-               (SELECT COUNT(DISTINCT numero_dossier) FROM sanctions 
-                WHERE strftime('%Y', date_enr) = ?), 2) as percentage
-        FROM sanctions s
-        JOIN gendarmes g ON s.matricule = g.mle
-        WHERE strftime('%Y', s.date_enr) = ?
-        GROUP BY g.grade
-        ORDER BY count DESC
-        LIMIT 1
-        """
-
-        cursor = conn.cursor()
-        cursor.execute(query, (str(self.year), str(self.year)))
-        grade, count, percentage = cursor.fetchone()
+    def _update_grade_card(self, summary):
+        grade, count, percentage = self._top_or_empty(summary, 'grade')
 
         self.grade_card.title_label.setText("Grade le plus sanctionné")
-        self.grade_card.value_label.setText(grade)
+        self.grade_card.value_label.setText(grade or "-")
         self.grade_card.detail_label.setText(f"{count} sanctions ({percentage}%)")
         self.grade_card.title_label.setStyleSheet("font-size: 18px; font-weight: bold;")
         self.grade_card.value_label.setStyleSheet("font-size: 32px; font-weight: bold;")
         self.grade_card.detail_label.setStyleSheet("font-size: 14px;")
 
-    def _update_subdiv_card(self, conn):
-        query = """
-       SELECT g.subdiv, COUNT(DISTINCT s.numero_dossier) as count,
-              ROUND(COUNT(DISTINCT s.numero_dossier) * 100.0 / 
-              (SELECT COUNT(DISTINCT numero_dossier) FROM sanctions 
-               WHERE strftime('%Y', date_enr) = ?), 2) as percentage
-       FROM sanctions s
-       JOIN gendarmes g ON s.matricule = g.mle 
-       WHERE strftime('%Y', s.date_enr) = ?
-       GROUP BY g.subdiv
-       ORDER BY count DESC
-       LIMIT 1
-       """
-
-        cursor = conn.cursor()
-        cursor.execute(query, (str(self.year), str(self.year)))
-        subdiv, count, percentage = cursor.fetchone()
+    def _update_subdiv_card(self, summary):
+        subdiv, count, percentage = self._top_or_empty(summary, 'subdiv')
 
         self.subdiv_card.title_label.setText("Subdivision la plus touchée")
-        self.subdiv_card.value_label.setText(subdiv)
+        self.subdiv_card.value_label.setText(subdiv or "-")
         self.subdiv_card.detail_label.setText(f"{count} sanctions ({percentage}%)")
         self.subdiv_card.title_label.setStyleSheet("font-size: 18px; font-weight: bold;")
         self.subdiv_card.value_label.setStyleSheet("font-size: 32px; font-weight: bold;")
         self.subdiv_card.detail_label.setStyleSheet("font-size: 14px;")
 
-    def _update_age_card(self, conn):
-        query = """
-       WITH service_ranges AS (
-           SELECT 
-               CASE 
-                   WHEN g.annee_service BETWEEN 0 AND 5 THEN '0-5 ans'
-                   WHEN g.annee_service BETWEEN 6 AND 10 THEN '6-10 ans'
-                   WHEN g.annee_service BETWEEN 11 AND 15 THEN '11-15 ans'
-                   WHEN g.annee_service BETWEEN 16 AND 20 THEN '16-20 ans'
-                   WHEN g.annee_service BETWEEN 21 AND 25 THEN '21-25 ans'
-                   ELSE '25+ ans'
-               END as tranche,
-               COUNT(DISTINCT s.numero_dossier) as count
-           FROM sanctions s
-           JOIN gendarmes g ON s.matricule = g.mle
-           WHERE strftime('%Y', s.date_enr) = ?
-           GROUP BY tranche
-       )
-       SELECT tranche, count, 
-              ROUND(count * 100.0 / SUM(count) OVER(), 2) as percentage
-       FROM service_ranges
-       ORDER BY count DESC
-       LIMIT 1
-       """
-
-        cursor = conn.cursor()
-        cursor.execute(query, (str(self.year),))
-        tranche, count, percentage = cursor.fetchone()
+    def _update_age_card(self, summary):
+        tranche, count, percentage = self._top_or_empty(summary, 'service')
 
         self.age_card.title_label.setText("Tranche d'ancienneté critique")
-        self.age_card.value_label.setText(tranche)
+        self.age_card.value_label.setText(f"{tranche} ans" if tranche else "-")
         self.age_card.detail_label.setText(f"{count} sanctions ({percentage}%)")
         self.age_card.title_label.setStyleSheet("font-size: 18px; font-weight: bold;")
         self.age_card.value_label.setStyleSheet("font-size: 32px; font-weight: bold;")
         self.age_card.detail_label.setStyleSheet("font-size: 14px;")
 
-    def _update_faute_card(self, conn):
-        query = """
-       SELECT faute_commise, COUNT(DISTINCT numero_dossier) as count,
-              ROUND(COUNT(DISTINCT numero_dossier) * 100.0 / 
-              (SELECT COUNT(DISTINCT numero_dossier) FROM sanctions 
-               WHERE strftime('%Y', date_enr) = ?), 2) as percentage
-       FROM sanctions
-       WHERE strftime('%Y', date_enr) = ?
-       GROUP BY faute_commise
-       ORDER BY count DESC
-       LIMIT 1
-       """
-
-        cursor = conn.cursor()
-        cursor.execute(query, (str(self.year), str(self.year)))
-        faute, count, percentage = cursor.fetchone()
+    def _update_faute_card(self, summary):
+        faute, count, percentage = self._top_or_empty(summary, 'faute')
 
         self.faute_card.title_label.setText("Faute la plus commise")
-        self.faute_card.value_label.setText(faute)
+        self.faute_card.value_label.setText(faute or "-")
         self.faute_card.detail_label.setText(f"{count} cas ({percentage}%)")
         self.faute_card.title_label.setStyleSheet("font-size: 18px; font-weight: bold;")
         self.faute_card.value_label.setStyleSheet("font-size: 24px; font-weight: bold;")
         self.faute_card.detail_label.setStyleSheet("font-size: 14px;")
 
-    def _update_mois_card(self, conn):
-        query = """
-       SELECT strftime('%m', date_enr) as mois, 
-              COUNT(DISTINCT numero_dossier) as count,
-              ROUND(COUNT(DISTINCT numero_dossier) * 100.0 / 
-              (SELECT COUNT(DISTINCT numero_dossier) FROM sanctions 
-               WHERE strftime('%Y', date_enr) = ?), 2) as percentage
-       FROM sanctions
-       WHERE strftime('%Y', date_enr) = ?
-       GROUP BY mois
-       ORDER BY count DESC
-       LIMIT 1
-       """
-
+    def _update_mois_card(self, summary):
         mois_dict = {
             '01': 'Janvier', '02': 'Février', '03': 'Mars', '04': 'Avril',
             '05': 'Mai', '06': 'Juin', '07': 'Juillet', '08': 'Août',
             '09': 'Septembre', '10': 'Octobre', '11': 'Novembre', '12': 'Décembre'
         }
 
-        cursor = conn.cursor()
-        cursor.execute(query, (str(self.year), str(self.year)))
-        mois, count, percentage = cursor.fetchone()
+        mois, count, percentage = self._top_or_empty(summary, 'mois')
 
         self.mois_card.title_label.setText("Mois avec le plus fort taux d'enregistrement")
-        self.mois_card.value_label.setText(mois_dict[mois])
+        self.mois_card.value_label.setText(mois_dict.get(mois, "-"))
         self.mois_card.detail_label.setText(f"{count} sanctions ({percentage}%)")
         self.mois_card.title_label.setStyleSheet("font-size: 18px; font-weight: bold;")
         self.mois_card.value_label.setStyleSheet("font-size: 32px; font-weight: bold;")
         self.mois_card.detail_label.setStyleSheet("font-size: 14px;")
 
-    def _update_region_card(self, conn):
-        query = """
-       WITH region_counts AS (
-           SELECT g.regions, COUNT(DISTINCT s.numero_dossier) as count
-           FROM gendarmes g
-           LEFT JOIN sanctions s ON CAST(s.matricule AS TEXT) = g.mle 
-               AND strftime('%Y', s.date_enr) = ?
-           WHERE g.regions IS NOT NULL
-           GROUP BY g.regions
-       )
-       SELECT regions, count,
-              ROUND(count * 100.0 / (SELECT SUM(count) FROM region_counts), 2) as percentage
-       FROM region_counts
-       ORDER BY count ASC
-       LIMIT 1
-       """
-
-        cursor = conn.cursor()
-        cursor.execute(query, (str(self.year),))
-        region, count, percentage = cursor.fetchone()
+    def _update_region_card(self, summary):
+        region, count, percentage = self._top_or_empty(summary, 'region', lowest=True)
 
         self.region_card.title_label.setText("Région la moins exposée")
         self.region_card.value_label.setText(region if region else "Non spécifié")
@@ -341,10 +249,3 @@ class YearlyTrendsWindow(QMainWindow):
         self.region_card.title_label.setStyleSheet("font-size: 18px; font-weight: bold;")
         self.region_card.value_label.setStyleSheet("font-size: 32px; font-weight: bold;")
         self.region_card.detail_label.setStyleSheet("font-size: 14px;")
-
-
-
-
-
-
-
@@ -0,0 +1,19 @@
+import pytest
+
+from src.database.db_manager import DatabaseManager
+
+from .sample_data import populate
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Base vide au schéma courant (create_tables puis migrations)"""
+    manager = DatabaseManager(str(tmp_path / "test.db"))
+    manager.create_tables()
+    return manager
+
+
+@pytest.fixture
+def populated_db(db_manager):
+    populate(db_manager)
+    return db_manager
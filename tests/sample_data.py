@@ -0,0 +1,89 @@
+"""Jeux de données des tests (insertion directe, les triggers font le reste)"""
+import random
+
+GRADES = ['ESO', 'MDL', 'MDC', 'ADJ', 'ADC', 'ACM']
+FAUTES = ['ABSENCE IRREGULIERE PROLONGEE', 'ABANDON DE POSTE', 'IVRESSE', 'RETARD', 'INSUBORDINATION']
+STATUTS = ['EN COURS', 'PUNI', 'RADIE', 'AVERTI']
+SUBDIVS = ['ABIDJAN', 'BOUAKE', 'KORHOGO', 'DALOA']
+REGIONS = ['ABIDJAN', 'CENTRE', 'NORD', 'OUEST']
+SITUATIONS = ['CELIBATAIRE', 'MARIE(E)', 'DIVORCE(E)']
+
+
+def insert_gendarme(cursor, mle, **values):
+    """Insère une fiche gendarme (valeurs par défaut complétées par values)"""
+    row = {
+        'mle': str(mle), 'nom_prenoms': f"NOM {mle}", 'grade': 'MDL', 'sexe': 'M',
+        'date_naissance': '1985-03-10', 'age': 40, 'unite': 'U1', 'legions': 'L1', 'subdiv': 'ABIDJAN',
+        'regions': 'ABIDJAN', 'date_entree_gie': '2008-01-01', 'annee_service': 16,
+        'situation_matrimoniale': 'CELIBATAIRE', 'nb_enfants': 0,
+    }
+    row.update(values)
+    cursor.execute(f"INSERT INTO gendarmes ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                   list(row.values()))
+
+
+def insert_sanction(cursor, numero_dossier, matricule, date_faits, **values):
+    """Insère une ligne de sanction (valeurs par défaut complétées par values)"""
+    row = {
+        'numero_dossier': numero_dossier, 'annee_punition': int(date_faits[:4]), 'numero_ordre': 1,
+        'date_enr': date_faits, 'matricule': matricule, 'faute_commise': 'RETARD',
+        'date_faits': date_faits, 'categorie': 1, 'statut': 'PUNI', 'reference_statut': 'REF',
+        'taux_jar': '10', 'comite': 0, 'annee_faits': int(date_faits[:4]),
+    }
+    row.update(values)
+    cursor.execute(f"INSERT INTO sanctions ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                   list(row.values()))
+    return cursor.lastrowid
+
+
+def populate(db_manager, n_gendarmes=40, n_sanctions=300, seed=1):
+    """Jeu de données aléatoire reproductible (dossiers de plusieurs lignes, matricules sans fiche)"""
+    rnd = random.Random(seed)
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        for i in range(n_gendarmes):
+            insert_gendarme(cursor, 10000 + i,
+                            grade=rnd.choice(GRADES), subdiv=rnd.choice(SUBDIVS), regions=rnd.choice(REGIONS),
+                            date_naissance=f"19{rnd.randint(70, 99)}-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}",
+                            date_entree_gie=f"20{rnd.randint(0, 20):02d}-0{rnd.randint(1, 9)}-01",
+                            annee_service=rnd.randint(0, 38), age=rnd.randint(22, 55),
+                            situation_matrimoniale=rnd.choice(SITUATIONS))
+        dossier = 0
+        for _ in range(n_sanctions):
+            if dossier == 0 or rnd.random() < .8:
+                dossier += 1
+            year = rnd.choice([2021, 2022, 2023, 2024, 2025])
+            insert_sanction(cursor, f"{dossier}/{year}", 10000 + rnd.randint(0, n_gendarmes + 5),
+                            f"{year}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                            faute_commise=rnd.choice(FAUTES), categorie=rnd.randint(1, 6),
+                            statut=rnd.choice(STATUTS), taux_jar=rnd.choice(['10', '20', '30 JOURS', '', None]))
+        conn.commit()
+
+
+def random_writes(cursor, n_writes=150, seed=2, n_gendarmes=40):
+    """Insertions, modifications (dossier, matricule, date, statut...) et suppressions aléatoires"""
+    rnd = random.Random(seed)
+    for _ in range(n_writes):
+        cursor.execute("SELECT id FROM sanctions ORDER BY id")
+        sanction_id = rnd.choice(cursor.fetchall())[0]
+        action = rnd.random()
+        if action < .3:
+            year = rnd.choice([2021, 2022, 2023, 2024, 2025])
+            insert_sanction(cursor, f"{rnd.randint(1, 60)}/{year}", 10000 + rnd.randint(0, n_gendarmes + 5),
+                            f"{year}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                            faute_commise=rnd.choice(FAUTES), statut=rnd.choice(STATUTS),
+                            categorie=rnd.randint(1, 6), taux_jar=rnd.choice(['10', '45', None]))
+        elif action < .45:
+            cursor.execute("DELETE FROM sanctions WHERE id = ?", (sanction_id,))
+        else:
+            column, value = rnd.choice([
+                ('numero_dossier', f"{rnd.randint(1, 60)}/{rnd.choice([2022, 2024])}"),
+                ('matricule', 10000 + rnd.randint(0, n_gendarmes + 5)),
+                ('date_faits', f"202{rnd.randint(1, 5)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"),
+                ('date_enr', f"202{rnd.randint(1, 5)}-0{rnd.randint(1, 9)}-15"),
+                ('statut', rnd.choice(STATUTS)),
+                ('categorie', rnd.randint(1, 6)),
+                ('faute_commise', rnd.choice(FAUTES)),
+                ('taux_jar', rnd.choice(['5', '60 JOURS', None])),
+            ])
+            cursor.execute(f"UPDATE sanctions SET {column} = ? WHERE id = ?", (value, sanction_id))
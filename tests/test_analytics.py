@@ -0,0 +1,156 @@
+from collections import Counter
+
+import pandas as pd
+
+from src.analytics.columnar_cache import ColumnarCache
+from src.analytics.cube_engine import CubeEngine
+from src.analytics.dashboard_engine import FAUTE_ABSENCE, DashboardEngine
+from src.analytics.dimensions import GENDARME_JOIN, service_tranche_joins
+from src.analytics.snapshot_service import AnalyticalSnapshotService
+from src.analytics.trend_engine import NON_RENSEIGNE, TrendEngine
+from src.analytics.year_summary_engine import YearSummaryEngine
+
+from .sample_data import insert_sanction
+
+
+def _top(counts):
+    return min(counts, key=lambda k: (-counts[k], k)) if counts else None
+
+
+def _canonical(cursor, name):
+    """Orthographe -> libellé de référence (table ref_<name>)"""
+    cursor.execute(f"SELECT v.libelle, c.libelle FROM ref_{name} v JOIN ref_{name} c ON c.id = v.canonique_id")
+    return dict(cursor.fetchall())
+
+
+def _per_row(cursor, year):
+    """Dossiers de l'année (faute, mois, mle, grade, subdiv, tranche, region), libellés rapprochés ligne à ligne"""
+    labels = {name: _canonical(cursor, name) for name in ('faute', 'grade', 'subdiv', 'region')}
+    cursor.execute(f"""
+        SELECT s.faute_commise, strftime('%m', s.date_enr), g.mle, g.grade, g.subdiv, sv.code, g.regions
+        FROM dossiers s
+        {GENDARME_JOIN}
+        {service_tranche_joins('s', 'g')}
+        WHERE s.annee_enr = ?
+    """, (str(year),))
+    return [(labels['faute'].get(faute, faute), mois, mle, labels['grade'].get(grade, grade),
+             labels['subdiv'].get(subdiv, subdiv), tranche, labels['region'].get(region, region))
+            for faute, mois, mle, grade, subdiv, tranche, region in cursor.fetchall()]
+
+
+def test_dashboard_matches_per_row_labels(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        for year in (2021, 2023, 2025):
+            rows = _per_row(cursor, year)
+            joined = [row for row in rows if row[2] is not None]
+
+            snapshot = DashboardEngine.compute(conn, year)
+            assert snapshot.total == len(rows)
+            assert snapshot.absences == sum(1 for row in rows if row[0] == FAUTE_ABSENCE)
+            assert snapshot.top_grade == _top(Counter(row[3] for row in joined if row[3]))
+            assert snapshot.top_subdiv == _top(Counter(row[4] for row in joined if row[4]))
+            assert snapshot.top_service_range == _top(Counter(f"{row[5]}ans" for row in joined if row[5]))
+
+
+def test_year_summary_matches_per_row_labels(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        # Une orthographe rattachée à une autre valeur de référence
+        cursor.execute("""UPDATE ref_grade SET canonique_id = (SELECT id FROM ref_grade WHERE libelle = 'MDL')
+            WHERE libelle = 'MDC'""")
+        for year in (2021, 2022, 2024):
+            rows = _per_row(cursor, year)
+            joined = [row for row in rows if row[2] is not None]
+
+            summary = YearSummaryEngine.compute(conn, year)
+            assert summary.total == len(rows)
+            assert summary.distribution('faute') == Counter(row[0] for row in rows if row[0] is not None)
+            assert summary.distribution('mois') == Counter(row[1] for row in rows if row[1])
+            assert summary.distribution('grade') == Counter(row[3] for row in joined if row[3] is not None)
+            assert 'MDC' not in summary.distribution('grade')
+            assert summary.distribution('subdiv') == Counter(row[4] for row in joined if row[4] is not None)
+            assert summary.distribution('service') == Counter(row[5] for row in joined if row[5])
+            assert {k: v for k, v in summary.distribution('region').items() if v} == Counter(
+                row[6] for row in joined if row[6] is not None)
+
+
+def test_trends_match_per_year_counts(populated_db):
+    engine = TrendEngine(populated_db)
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT CAST(annee_enr AS INTEGER), COUNT(*) FROM dossiers GROUP BY annee_enr")
+        totals = dict(cursor.fetchall())
+        grades = {year: Counter(row[3] if row[3] is not None else NON_RENSEIGNE for row in _per_row(cursor, year))
+                  for year in range(2020, 2026)}
+
+    points = engine.get_trends(2020, 2025)
+    assert [(p.annee, p.nombre) for p in points] == [(year, totals.get(year, 0)) for year in range(2020, 2026)]
+    assert points[0].delta is None
+    assert points[2].delta == totals[2022] - totals[2021]
+    assert points[2].croissance == round((totals[2022] - totals[2021]) * 100.0 / totals[2021], 2)
+
+    series = TrendEngine.by_value(engine.get_trends(2020, 2025, "Grades"))
+    values = {value for counts in grades.values() for value in counts}
+    assert set(series) == values
+    for value, value_points in series.items():
+        assert [p.nombre for p in value_points] == [grades[year][value] for year in range(2020, 2026)]
+
+    # Cache : seul le dernier résultat est gardé
+    assert engine.get_trends(2020, 2025, "Grades") is engine.get_trends(2020, 2025, "Grades")
+    assert engine.get_trends(2020, 2025) is not points
+
+
+def test_reference_remap_invalidates_closed_year_summaries(populated_db):
+    engine = YearSummaryEngine(populated_db)
+    summary = engine.get_summary(2022)
+    assert 'IVRESSE' in summary.distribution('faute')
+
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM year_summaries WHERE annee = '2022'")
+        assert cursor.fetchone()[0] > 0
+
+        # Rattachement de IVRESSE à RETARD : le résumé persisté de 2022 ne vaut plus
+        cursor.execute("""UPDATE ref_faute SET canonique_id = (SELECT id FROM ref_faute WHERE libelle = 'RETARD')
+            WHERE libelle = 'IVRESSE'""")
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM year_summaries")
+        assert cursor.fetchone()[0] == 0
+
+    remapped = engine.get_summary(2022)
+    assert 'IVRESSE' not in remapped.distribution('faute')
+    assert remapped.distribution('faute')['RETARD'] == (summary.distribution('faute')['RETARD']
+                                                       + summary.distribution('faute')['IVRESSE'])
+
+
+def test_snapshot_kept_across_derived_writes(populated_db):
+    service = AnalyticalSnapshotService(populated_db)
+    frame = service.get_frame()
+
+    # Résumé annuel persisté et construction du cube : le snapshot reste valide
+    YearSummaryEngine(populated_db).get_summary(2022)
+    CubeEngine(populated_db).slice('grade', 'statut')
+    assert service.get_frame() is frame
+
+    with populated_db.get_connection() as conn:
+        insert_sanction(conn.cursor(), "S1/2024", 10001, '2024-02-02')
+        conn.commit()
+    assert len(service.get_frame()) == len(frame) + 1
+
+
+def test_columnar_cache_round_trip(populated_db):
+    frame = AnalyticalSnapshotService(populated_db).build()
+    cache = ColumnarCache(populated_db)
+    version = populated_db.get_source_version()
+    assert cache.load(version) is None
+
+    cache.save(frame, version)
+    assert cache.cached_version() == version
+    pd.testing.assert_frame_equal(cache.load(version), frame)
+    assert cache.load(version + 1) is None
+
+    # Nouvelle version des données : les fichiers de l'ancienne sont supprimés
+    cache.save(frame.head(10), version + 1)
+    assert cache.load(version) is None
+    pd.testing.assert_frame_equal(cache.load(version + 1), frame.head(10))
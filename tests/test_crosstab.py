@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.crosstab_engine import crosstab
+from src.analytics.cube_engine import CubeEngine
+from src.analytics.snapshot_service import AnalyticalSnapshotService
+
+
+@pytest.fixture
+def frame(populated_db):
+    df = AnalyticalSnapshotService.for_db(populated_db).get_frame()
+    return df[~df['est_doublon']]
+
+
+def _plain(table: pd.DataFrame) -> pd.DataFrame:
+    """Libellés en listes (index catégoriels de pd.crosstab) et effectifs entiers"""
+    return pd.DataFrame(table.to_numpy(dtype=np.int64), index=list(table.index), columns=list(table.columns))
+
+
+@pytest.mark.parametrize('x_name, y_name', [
+    ('faute_commise', 'grade'),
+    ('statut', 'annee_punition'),
+    ('categorie', 'subdiv'),
+    ('service_range', 'situation_matrimoniale'),
+])
+def test_crosstab_matches_pandas(frame, x_name, y_name):
+    result = crosstab(frame[x_name], frame[y_name])
+    reference = pd.crosstab(frame[y_name], frame[x_name], margins=True, margins_name='TOTAL')
+
+    pd.testing.assert_frame_equal(_plain(result.to_pivot()), _plain(reference))
+    assert result.total == len(frame.dropna(subset=[x_name, y_name]))
+
+
+def test_weighted_crosstab_matches_pandas(frame):
+    cells = frame.groupby(['grade', 'statut'], observed=True).size().reset_index(name='count')
+    result = crosstab(cells['statut'], cells['grade'], weights=cells['count'])
+    reference = pd.crosstab(frame['grade'], frame['statut'], margins=True, margins_name='TOTAL')
+
+    pd.testing.assert_frame_equal(_plain(result.to_pivot()), _plain(reference))
+
+
+@pytest.mark.parametrize('x_field, y_field, filters', [
+    ('faute_commise', 'grade', {}),
+    ('statut', 'annee_punition', {'categorie': '2'}),
+    ('annee_service', 'situation_matrimoniale', {'annee_punition': '2023'}),
+])
+def test_cube_slice_matches_snapshot_crosstab(populated_db, frame, x_field, y_field, filters):
+    cells = CubeEngine(populated_db).slice(x_field, y_field, filters)
+    result = CubeEngine.crosstab(cells, x_field, y_field)
+
+    for name, value in filters.items():
+        frame = frame[frame[name].astype(str) == value]
+    # Les années de service sont rangées par tranches dans le cube
+    x_name = 'service_range' if x_field == 'annee_service' else x_field
+    reference = crosstab(frame[x_name], frame[y_field])
+
+    assert result.total > 0
+    pd.testing.assert_frame_equal(_plain(result.to_pivot()), _plain(reference.to_pivot()))
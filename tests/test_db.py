@@ -0,0 +1,367 @@
+from src.analytics.cube_engine import CubeEngine
+from src.analytics.cube_maintenance import (CubeConsistencyChecker, CubeDeltaTracker, cube_cells, cube_is_fresh,
+                                            stored_cells)
+from src.analytics.year_summary_engine import YearSummaryEngine
+from src.database.catalog_service import DimensionCatalogService
+from src.database.columnar_fetch import CODE, FLOAT, INT, fetch_columns
+from src.database.migrations import CATALOG_DIMENSIONS, dossier_header_sql
+from src.database.models import Gendarme, GendarmeRepository, Sanction, StatisticsRepository, cursor_columns
+
+from .sample_data import insert_gendarme, insert_sanction, random_writes
+
+
+def test_source_version_counts_source_writes_only(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        before = populated_db.get_source_version()
+
+        # Les triggers en cascade d'une insertion (clés, jours d'arrêt, version de fiche) ne comptent pas
+        for i in range(3):
+            insert_sanction(cursor, f"V{i}/2024", 10001, '2024-05-05')
+        cursor.execute("UPDATE gendarmes SET grade = 'ADJ' WHERE mle = '10001'")
+        conn.commit()
+        assert populated_db.get_source_version() == before + 4
+        assert not cube_is_fresh(cursor)
+
+    # Écritures des tables dérivées (cube, résumé annuel) : le fichier change, pas la version
+    data_version = populated_db.get_data_version()
+    CubeEngine(populated_db).slice('grade', 'statut')
+    YearSummaryEngine(populated_db).get_summary(2022)
+    assert populated_db.get_data_version() != data_version
+    assert populated_db.get_source_version() == before + 4
+
+
+def test_tracked_write_keeps_cube_fresh(populated_db):
+    with populated_db.get_connection() as conn:
+        CubeEngine(populated_db).ensure_fresh(conn)
+        with CubeDeltaTracker(conn, [10001]):
+            insert_sanction(conn.cursor(), "T1/2024", 10001, '2024-05-05', statut='RADIE')
+        conn.commit()
+
+        cursor = conn.cursor()
+        assert cube_is_fresh(cursor)
+        assert stored_cells(cursor) == cube_cells(cursor)
+
+
+def test_tracked_update_and_delete_match_full_recompute(populated_db):
+    with populated_db.get_connection() as conn:
+        CubeEngine(populated_db).ensure_fresh(conn)
+        cursor = conn.cursor()
+
+        # Changement de statut d'une sanction, puis d'un attribut de la fiche, puis suppression
+        with CubeDeltaTracker(conn, [10002]):
+            cursor.execute("UPDATE sanctions SET statut = 'RADIE' WHERE matricule = 10002")
+            assert cursor.rowcount > 0
+        with CubeDeltaTracker(conn, [10003]):
+            cursor.execute("UPDATE gendarmes SET grade = 'ACM', subdiv = 'DALOA' WHERE mle = '10003'")
+        with CubeDeltaTracker(conn, [10004]):
+            cursor.execute("DELETE FROM sanctions WHERE matricule = 10004")
+            assert cursor.rowcount > 0
+        conn.commit()
+
+        assert cube_is_fresh(cursor)
+        assert stored_cells(cursor) == cube_cells(cursor)
+
+
+def test_upsert_existing_matricule_with_new_grade_and_region(db_manager):
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        GendarmeRepository.upsert(cursor, {'mle': '20001', 'nom_prenoms': 'KOFFI JEAN',
+                                           'grade': 'MDL', 'regions': 'NORD'})
+        conn.commit()
+
+        # Grade de référence déjà connu et région jamais vue : les triggers des clés de
+        # référence ne doivent pas faire échouer le ON CONFLICT DO UPDATE
+        GendarmeRepository.upsert(cursor, {'mle': '20001', 'grade': 'ADJ', 'regions': 'SUD EST'})
+        conn.commit()
+
+        cursor.execute("""SELECT g.nom_prenoms, gr.libelle, rg.libelle FROM gendarmes g
+            JOIN ref_grade gr ON gr.id = g.grade_id JOIN ref_region rg ON rg.id = g.region_id
+            WHERE g.mle = '20001'""")
+        assert cursor.fetchall() == [('KOFFI JEAN', 'ADJ', 'SUD EST')]
+        cursor.execute("SELECT COUNT(*) FROM gendarmes WHERE mle = '20001'")
+        assert cursor.fetchone()[0] == 1
+        cursor.execute("""SELECT dimension, valeur, nombre FROM dimension_catalog
+            WHERE dimension IN ('grade', 'regions') ORDER BY dimension""")
+        assert cursor.fetchall() == [('grade', 'ADJ', 1), ('regions', 'SUD EST', 1)]
+
+
+def test_upsert_inserts_then_updates_without_erasing(db_manager):
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        GendarmeRepository.upsert(cursor, {'mle': '20002', 'nom_prenoms': 'YAO PAUL', 'grade': 'ESO',
+                                           'unite': 'U7', 'nb_enfants': 2})
+        # Valeur NULL : l'existant est conservé
+        GendarmeRepository.upsert(cursor, {'mle': '20002', 'grade': 'MDL', 'unite': None})
+        conn.commit()
+
+        cursor.execute("SELECT nom_prenoms, grade, unite, nb_enfants FROM gendarmes WHERE mle = '20002'")
+        assert cursor.fetchall() == [('YAO PAUL', 'MDL', 'U7', 2)]
+
+
+def test_duplicate_gendarmes_merged_and_archived(db_manager):
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        # Base antérieure à l'unicité du matricule : plusieurs fiches par mle
+        cursor.execute("DROP INDEX idx_gendarmes_mle")
+        insert_gendarme(cursor, 30001, grade='ESO', unite='U1', nb_enfants=1)
+        insert_gendarme(cursor, 30001, grade='MDL', unite='', nb_enfants=3)
+        insert_gendarme(cursor, 30002, grade='ADJ')
+        cursor.execute("PRAGMA user_version = 5")
+        conn.commit()
+
+    db_manager.ensure_schema()
+
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        # Fiche la plus ancienne conservée, valeurs renseignées les plus récentes
+        cursor.execute("SELECT id, grade, unite, nb_enfants FROM gendarmes WHERE mle = '30001'")
+        rows = cursor.fetchall()
+        assert [row[1:] for row in rows] == [('MDL', 'U1', 3)]
+        kept_id = rows[0][0]
+
+        # Les deux fiches d'origine sont archivées, la fiche unique 30002 ne l'est pas
+        cursor.execute("""SELECT id, grade, unite, nb_enfants, fiche_conservee_id
+            FROM gendarmes_doublons_archive ORDER BY id""")
+        archived = cursor.fetchall()
+        assert [row[1:4] for row in archived] == [('ESO', 'U1', 1), ('MDL', '', 3)]
+        assert {row[4] for row in archived} == {kept_id}
+        assert archived[0][0] == kept_id
+
+        cursor.execute("SELECT COUNT(*) FROM gendarmes WHERE mle = '30002'")
+        assert cursor.fetchone()[0] == 1
+        cursor.execute("PRAGMA index_list(gendarmes)")
+        assert 'idx_gendarmes_mle' in [row[1] for row in cursor.fetchall()]
+
+
+def _grades_by_case(cursor, matricule):
+    cursor.execute("""SELECT s.date_faits, h.grade FROM sanctions s
+        JOIN gendarmes_historique h ON h.id = s.gendarme_version_id
+        WHERE s.matricule = ? ORDER BY s.date_faits""", (matricule,))
+    return cursor.fetchall()
+
+
+def test_history_version_dated_from_case_date_faits(db_manager):
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        GendarmeRepository.upsert(cursor, {'mle': '40001', 'grade': 'ESO'})
+        insert_sanction(cursor, "H1/2023", 40001, '2023-01-10')
+        insert_sanction(cursor, "H2/2024", 40001, '2024-06-01')
+
+        # Affaire saisie aujourd'hui pour des faits de 2024 : le nouveau grade vaut depuis les faits
+        GendarmeRepository.upsert(cursor, {'mle': '40001', 'grade': 'MDL'}, valide_du='2024-01-01')
+        conn.commit()
+
+        cursor.execute("""SELECT valide_du, valide_au, grade FROM gendarmes_historique
+            WHERE mle = '40001' ORDER BY valide_du""")
+        assert cursor.fetchall() == [('0000-01-01', '2024-01-01', 'ESO'), ('2024-01-01', None, 'MDL')]
+        assert _grades_by_case(cursor, 40001) == [('2023-01-10', 'ESO'), ('2024-06-01', 'MDL')]
+
+        # Limite : une date d'effet antérieure au début de la version en cours la corrige sur place
+        GendarmeRepository.upsert(cursor, {'mle': '40001', 'grade': 'ADJ'}, valide_du='2023-06-01')
+        conn.commit()
+        cursor.execute("""SELECT valide_du, valide_au, grade FROM gendarmes_historique
+            WHERE mle = '40001' ORDER BY valide_du""")
+        assert cursor.fetchall() == [('0000-01-01', '2024-01-01', 'ESO'), ('2024-01-01', None, 'ADJ')]
+
+        cursor.execute("SELECT COUNT(*) FROM gendarmes_historique_effet")
+        assert cursor.fetchone()[0] == 0
+
+
+def test_history_version_without_case_dated_today(db_manager):
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        GendarmeRepository.upsert(cursor, {'mle': '40002', 'grade': 'ESO'})
+        # Modification de fiche sans affaire, puis date des faits future : version datée du jour
+        GendarmeRepository.upsert(cursor, {'mle': '40002', 'unite': 'U2'})
+        GendarmeRepository.upsert(cursor, {'mle': '40002', 'grade': 'MDL'}, valide_du='2999-01-01')
+        conn.commit()
+
+        cursor.execute("SELECT date('now')")
+        today = cursor.fetchone()[0]
+        cursor.execute("""SELECT valide_du, valide_au, grade, unite FROM gendarmes_historique
+            WHERE mle = '40002' ORDER BY valide_du""")
+        assert cursor.fetchall() == [('0000-01-01', today, 'ESO', None), (today, None, 'MDL', 'U2')]
+
+
+def test_sanctions_full_list_order_and_filters(populated_db):
+    repository = StatisticsRepository(populated_db)
+    rows = repository.get_sanctions_full_list()
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM sanctions")
+        assert len(rows) == cursor.fetchone()[0]
+    dates = [row[4] or '' for row in rows]
+    assert dates == sorted(dates, reverse=True)
+
+    filtered = repository.get_sanctions_full_list({'grade': 'MDL', 'year': 2023})
+    assert filtered and all(row[2] == 'MDL' for row in filtered)
+
+    # Une orthographe rattachée à MDL : le filtre par l'une ou l'autre passe par l'identifiant canonique
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        insert_gendarme(cursor, 20001, grade=' mdl')
+        insert_sanction(cursor, "A1/2023", 20001, '2023-06-01')
+        conn.commit()
+    by_alias = repository.get_sanctions_full_list({'grade': ' mdl', 'year': 2023})
+    assert 20001 in [row[0] for row in by_alias]
+    assert sorted(by_alias) == sorted(repository.get_sanctions_full_list({'grade': 'MDL', 'year': 2023}))
+
+
+def test_sanctions_pages_and_stream_match_full_list(populated_db):
+    repository = StatisticsRepository(populated_db)
+    filters = {'statut': 'PUNI', 'avec_fiche': True}
+    rows = repository.get_sanctions_full_list(filters)
+    assert list(repository.iter_sanctions_full_list(filters, batch_size=7)) == rows
+    assert repository.count_sanctions_full_list(filters) == len(rows)
+
+    pages, token = [], None
+    while True:
+        page = repository.get_sanctions_page(filters, page_size=11, token=token)
+        pages.extend(page.rows)
+        token = page.next_token
+        if token is None:
+            break
+    assert pages == rows
+
+    gendarmes = GendarmeRepository(populated_db)
+    assert list(gendarmes.iter_all(batch_size=3)) == gendarmes.get_all()
+    assert list(populated_db.iter_all_gendarmes(batch_size=3)) == populated_db.get_all_gendarmes()
+
+
+def test_no_duplicates_archive_without_duplicates(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'gendarmes_doublons_archive'")
+        assert cursor.fetchone()[0] == 0
+
+
+def _sorted(cursor, query):
+    cursor.execute(query)
+    return sorted(cursor.fetchall(), key=repr)
+
+
+def test_dossiers_match_full_recompute_after_writes(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        random_writes(cursor)
+        conn.commit()
+
+        assert _sorted(cursor, "SELECT * FROM dossiers") == _sorted(cursor, dossier_header_sql("1"))
+
+
+def test_consistency_check_marks_drifted_cube_stale(populated_db):
+    with populated_db.get_connection() as conn:
+        CubeEngine(populated_db).ensure_fresh(conn)
+        assert CubeConsistencyChecker(populated_db).check() == {}
+
+        cursor = conn.cursor()
+        cursor.execute("UPDATE stats_cube SET nombre = nombre + 1 WHERE rowid = 1")
+        conn.commit()
+
+    assert len(CubeConsistencyChecker(populated_db).check()) == 1
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        assert not cube_is_fresh(cursor)
+        # Reconstruit à la consultation suivante
+        CubeEngine(populated_db).ensure_fresh(conn)
+        assert stored_cells(cursor) == cube_cells(cursor)
+
+
+def _expected_record(model, record):
+    """Valeurs attendues des champs de model pour une ligne {colonne: valeur} (texte NULL -> '')"""
+    return {name: ("" if record[name] is None and model.__dataclass_fields__[name].type is str else record[name])
+            for name in model.DICT_FIELDS}
+
+
+def test_row_mapper_on_select_star(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        sanction_id = insert_sanction(cursor, "M1/2024", 10002, '2024-04-04', taux_jar='30 JOURS',
+                                      reference_statut=None)
+        conn.commit()
+
+        # Colonnes sans champ (clés de référence, version de fiche) ignorées
+        for table, model in (('sanctions', Sanction), ('gendarmes', Gendarme)):
+            cursor.execute(f"SELECT * FROM {table} ORDER BY id")
+            columns = cursor_columns(cursor)
+            rows = cursor.fetchall()
+            records = model.from_rows(rows, columns)
+            assert [record.to_dict() for record in records] == [
+                _expected_record(model, dict(zip(columns, row))) for row in rows]
+
+        cursor.execute("SELECT * FROM sanctions WHERE id = ?", (sanction_id,))
+        sanction = Sanction.from_db_row(cursor.fetchone(), cursor_columns(cursor))
+    assert (sanction.id, sanction.matricule, sanction.taux_jar_jours) == (sanction_id, 10002, 30.0)
+    assert sanction.reference_statut == "" and sanction.numero_decision == ""
+
+    # Champs sans colonne : valeurs par défaut
+    gendarme = Gendarme.from_db_row(('10002', 7), ('mle', 'id'))
+    assert (gendarme.id, gendarme.mle, gendarme.grade, gendarme.age, gendarme.sanctions) == (7, '10002', "", None, ())
+
+
+def test_fetch_columns_masks_and_codes(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE valeurs (entier, reel, texte)")
+        values = [(1, 1.5, 'A'), (None, None, None), ('12', '2.5', 'B'), ('abc', 'abc', 'A'),
+                  (2.5, 3, 'C'), (7.0, None, 'B'), (-4, -1.25, None)]
+        cursor.executemany("INSERT INTO valeurs VALUES (?, ?, ?)", values)
+
+        # Lots de 3 lignes : agrandissement des tableaux et dictionnaire partagé entre les lots
+        columns = fetch_columns(cursor, "SELECT entier, reel, texte FROM valeurs ORDER BY rowid",
+                                kinds={'entier': INT, 'reel': FLOAT}, batch_size=3)
+
+    entier, reel, texte = columns['entier'], columns['reel'], columns['texte']
+    assert (entier.kind, reel.kind, texte.kind) == (INT, FLOAT, CODE)
+    assert entier.mask.tolist() == [False, True, False, True, True, False, False]
+    assert entier.values[~entier.mask].tolist() == [1, 12, 7, -4]
+    assert reel.mask.tolist() == [False, True, False, True, False, True, False]
+    assert reel.values[~reel.mask].tolist() == [1.5, 2.5, 3.0, -1.25]
+
+    assert texte.dictionary == ['A', 'B', 'C']
+    assert texte.values.tolist() == [0, -1, 1, 0, 2, 1, -1]
+    assert texte.mask.tolist() == [value is None for _, _, value in values]
+
+    # Snapshot : même contenu qu'une lecture ligne à ligne
+    repository = StatisticsRepository(populated_db)
+    query = "SELECT id, matricule, faute_commise, taux_jar_jours FROM sanctions ORDER BY id"
+    columns = repository.fetch_columns(query, kinds={'id': INT, 'matricule': INT, 'taux_jar_jours': FLOAT})
+    with populated_db.get_connection() as conn:
+        rows = conn.execute(query).fetchall()
+    fautes = columns['faute_commise']
+    assert [fautes.dictionary[code] if code >= 0 else None for code in fautes.values] == [row[2] for row in rows]
+    assert columns['id'].values.tolist() == [row[0] for row in rows]
+    assert columns['taux_jar_jours'].mask.tolist() == [row[3] is None for row in rows]
+
+
+def _catalog_reference(cursor):
+    """Effectifs des dimensions du catalogue recomptés sur les tables"""
+    counts = {}
+    for dimension in CATALOG_DIMENSIONS:
+        value = "r.libelle" if dimension.reference else f"t.{dimension.column}"
+        join = f"JOIN ref_{dimension.reference} r ON r.id = t.{dimension.column}" if dimension.reference else ""
+        cursor.execute(f"""SELECT {value}, COUNT(*) FROM {dimension.table} t {join}
+            WHERE t.{dimension.column} IS NOT NULL GROUP BY 1""")
+        counts[dimension.name] = dict(cursor.fetchall())
+    return counts
+
+
+def test_catalog_service_follows_writes(populated_db):
+    catalog = DimensionCatalogService(populated_db)
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        reference = _catalog_reference(cursor)
+        assert {name: catalog.counts(name) for name in reference} == reference
+        assert 'GEN' not in catalog.values('grade')
+
+        random_writes(cursor)
+        insert_gendarme(cursor, 20002, grade='GEN', situation_matrimoniale='VEUF(VE)')
+        insert_sanction(cursor, "C1/2026", 20002, '2026-01-15', statut='PUNI')
+        conn.commit()
+        reference = _catalog_reference(cursor)
+
+    # Nouvelle version des sources : le catalogue en mémoire est relu
+    assert {name: catalog.counts(name) for name in reference} == reference
+    assert 'GEN' in catalog.values('grade') and 'VEUF(VE)' in catalog.values('situation_matrimoniale')
+    assert catalog.values('annee_punition', descending=True)[0] == 2026
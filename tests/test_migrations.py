@@ -0,0 +1,188 @@
+import sqlite3
+from datetime import date, timedelta
+
+from src.database.db_manager import DatabaseManager
+from src.data.gendarmerie.structure import AGE_RANGES, SERVICE_RANGES
+from src.database.migrations import (MAX_YEARS, SCHEMA_VERSION, apply_migrations, dossier_header_sql,
+                                     gendarme_categories_sql, gendarme_summary_sql)
+
+from .sample_data import insert_gendarme, insert_sanction, populate
+
+# Schéma d'origine (create_tables avant les migrations) : ni index unique, ni tables dérivées
+BASELINE_SCHEMA = """
+    CREATE TABLE sanctions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero_dossier TEXT,
+        annee_punition INTEGER,
+        numero_ordre INTEGER,
+        date_enr DATE,
+        matricule INTEGER,
+        faute_commise TEXT,
+        date_faits DATE,
+        categorie INTEGER,
+        statut TEXT,
+        reference_statut TEXT,
+        taux_jar TEXT,
+        comite INTEGER,
+        annee_faits INTEGER,
+        numero_decision
+    );
+    CREATE TABLE gendarmes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mle TEXT,
+        nom_prenoms TEXT,
+        grade TEXT,
+        sexe TEXT,
+        date_naissance TEXT,
+        age INTEGER,
+        unite TEXT,
+        legions TEXT,
+        subdiv TEXT,
+        regions TEXT,
+        date_entree_gie TEXT,
+        annee_service INTEGER,
+        situation_matrimoniale TEXT,
+        nb_enfants INTEGER
+    );
+"""
+
+# Tables dérivées comparées entre deux passages des migrations
+DERIVED_TABLES = ('dossiers', 'gendarmes_resume', 'gendarmes_resume_categories', 'gendarmes_historique',
+                  'ref_faute', 'ref_grade', 'ref_statut', 'dimension_catalog', 'tranches')
+
+
+def _rows(cursor, query):
+    cursor.execute(query)
+    return sorted(cursor.fetchall(), key=repr)
+
+
+def _state(cursor):
+    """Schéma (objets et leur SQL) et contenu des tables dérivées"""
+    state = {'schema': _rows(cursor, "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")}
+    for table in DERIVED_TABLES:
+        state[table] = _rows(cursor, f"SELECT * FROM {table}")
+    state['sanctions'] = _rows(cursor, "SELECT * FROM sanctions")
+    return state
+
+
+def test_baseline_database_upgraded_on_open(tmp_path):
+    path = str(tmp_path / "ancienne.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    cursor = conn.cursor()
+    insert_gendarme(cursor, 50001, grade='ESO')
+    insert_gendarme(cursor, 50001, grade='MDL')
+    insert_gendarme(cursor, 50002, grade='ADJ')
+    insert_sanction(cursor, "1/2022", 50001, '2022-03-01', statut='PUNI', categorie=2)
+    insert_sanction(cursor, "1/2022", 50001, '2022-03-01', statut='RADIE', categorie=2)
+    insert_sanction(cursor, "2/2023", 50002, '2023-07-15', taux_jar='30 JOURS')
+    conn.commit()
+    conn.close()
+
+    # Migrations appliquées à l'ouverture
+    manager = DatabaseManager(path)
+    with manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA user_version")
+        assert cursor.fetchone()[0] == SCHEMA_VERSION
+
+        assert _rows(cursor, "SELECT * FROM dossiers") == _rows(cursor, dossier_header_sql("1"))
+        assert _rows(cursor, "SELECT * FROM gendarmes_resume") == _rows(cursor, gendarme_summary_sql("1"))
+        assert (_rows(cursor, "SELECT * FROM gendarmes_resume_categories")
+                == _rows(cursor, gendarme_categories_sql("1")))
+        assert _rows(cursor, "SELECT mle, grade FROM gendarmes") == [('50001', 'MDL'), ('50002', 'ADJ')]
+
+        cursor.execute("""SELECT COUNT(*) FROM sanctions
+            WHERE faute_id IS NULL OR statut_id IS NULL OR gendarme_version_id IS NULL""")
+        assert cursor.fetchone()[0] == 0
+
+        assert apply_migrations(conn) == SCHEMA_VERSION
+
+
+def test_migrations_rerun_leave_schema_and_data_unchanged(db_manager):
+    populate(db_manager)
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        before = _state(cursor)
+
+        assert apply_migrations(conn) == SCHEMA_VERSION
+        assert _state(cursor) == before
+
+        # Toutes les migrations rejouées (comme après create_tables)
+        assert apply_migrations(conn, rerun=True) == SCHEMA_VERSION
+        assert _state(cursor) == before
+
+
+def test_create_tables_twice_same_schema(db_manager):
+    with db_manager.get_connection() as conn:
+        schema = _rows(conn.cursor(), "SELECT type, name, sql FROM sqlite_master")
+
+    db_manager.create_tables()
+
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        assert _rows(cursor, "SELECT type, name, sql FROM sqlite_master") == schema
+        cursor.execute("PRAGMA user_version")
+        assert cursor.fetchone()[0] == SCHEMA_VERSION
+
+
+def test_tranches_durees_boundaries(db_manager):
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""SELECT d.dimension, d.duree, t.code FROM tranches_durees d
+            LEFT JOIN tranches t ON t.id = d.tranche_id""")
+        table = {(dimension, duree): code for dimension, duree, code in cursor.fetchall()}
+
+    for dimension, ranges in (('service', SERVICE_RANGES), ('age', AGE_RANGES)):
+        expected = {}
+        for code in ranges:
+            debut, fin = map(int, code.split('-'))
+            expected.update({duree: code for duree in range(debut, fin + 1)})
+        # Bornes incluses, durées hors tranches sans tranche, de 0 à MAX_YEARS
+        assert {duree: table[(dimension, duree)] for duree in range(MAX_YEARS + 1)} == {
+            duree: expected.get(duree) for duree in range(MAX_YEARS + 1)}
+    assert len(table) == 2 * (MAX_YEARS + 1)
+    assert table[('service', 5)] == '0-5' and table[('service', 6)] == '6-10'
+    assert table[('age', 17)] is None and table[('age', 18)] == '18-25' and table[('age', 61)] is None
+
+
+def _years_before(day, years):
+    """Même jour years ans plus tôt (28 février pour un 29 février)"""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def _age(born, today):
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def test_gendarmes_actuels_ages_around_birthday(db_manager):
+    today = date.today()
+    # Anniversaire hier, aujourd'hui, demain ; formats AAAA-MM-JJ et JJ/MM/AAAA
+    births = {30001 + i: _years_before(today + timedelta(days=offset), 30)
+              for i, offset in enumerate((-1, 0, 1))}
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        for mle, born in births.items():
+            birth_text = born.isoformat() if mle != 30002 else born.strftime('%d/%m/%Y')
+            insert_gendarme(cursor, mle, date_naissance=birth_text, age=99,
+                            date_entree_gie=_years_before(born, -20).isoformat(), annee_service=99)
+        # Date inconnue (01/01/1900) ou postérieure à aujourd'hui : valeur enregistrée
+        insert_gendarme(cursor, 30010, date_naissance='01/01/1900', age=44, date_entree_gie=None, annee_service=12)
+        insert_gendarme(cursor, 30011, date_naissance=(today + timedelta(days=2)).isoformat(), age=33)
+        conn.commit()
+
+        cursor.execute("""SELECT g.mle, g.age_actuel, a.code, g.annee_service_actuel
+            FROM gendarmes_actuels g
+            LEFT JOIN tranches a ON a.id = g.age_tranche_actuelle_id
+            WHERE g.mle >= '30001' ORDER BY g.mle""")
+        rows = {int(mle): (age, code, service) for mle, age, code, service in cursor.fetchall()}
+
+    for mle, born in births.items():
+        entry = _years_before(born, -20)
+        assert rows[mle] == (_age(born, today), '26-30' if _age(born, today) <= 30 else '31-35',
+                             _age(entry, today))
+    assert rows[30010] == (44, '41-45', 12)
+    assert rows[30011][:2] == (33, '31-35')
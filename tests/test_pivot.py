@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.measures import group_measures, measure_pivot
+from src.analytics.pivot_engine import SUBTOTAL, PivotEngine, PivotSpec, is_total_label
+from src.analytics.snapshot_service import AnalyticalSnapshotService
+
+
+def _key(label):
+    parts = label if isinstance(label, tuple) else (label,)
+    return tuple(str(part) for part in parts)
+
+
+def _leaf_cells(table: pd.DataFrame) -> dict:
+    """Effectifs non nuls hors totaux et sous-totaux : {(ligne..., colonne...): effectif}"""
+    rows = [label for label in table.index if not is_total_label(label)]
+    columns = [label for label in table.columns if not is_total_label(label)]
+    if not columns:
+        # Sans dimension en colonnes : seule la colonne TOTAL
+        return {_key(row): int(table.loc[row].iloc[0]) for row in rows if table.loc[row].iloc[0]}
+    leaves = table.loc[rows, columns]
+    return {_key(row) + _key(column): int(leaves.loc[row, column])
+            for row in rows for column in columns if leaves.loc[row, column]}
+
+
+def _reference_cells(db_manager, spec: PivotSpec) -> dict:
+    """Mêmes effectifs calculés par pandas sur le snapshot analytique"""
+    df = AnalyticalSnapshotService.for_db(db_manager).get_frame()
+    df = df[~df['est_doublon']]
+    for name, value in spec.filters.items():
+        df = df[df[name].astype(str) == str(value)]
+    # Les années de service sont présentées par tranches
+    columns = ['service_range' if name == 'annee_service' else name for name in spec.rows + spec.columns]
+    counts = df.groupby(columns, observed=True).size()
+    return {_key(key): int(count) for key, count in counts.items() if count}
+
+
+@pytest.mark.parametrize('spec', [
+    PivotSpec(rows=('annee_punition', 'grade'), columns=('statut',)),
+    PivotSpec(rows=('annee_service',), columns=('faute_commise', 'categorie')),
+    PivotSpec(rows=('subdiv', 'situation_matrimoniale'), filters={'annee_punition': '2023'}),
+    # nom_prenoms n'est pas une dimension du cube : effectifs lus dans le snapshot
+    PivotSpec(rows=('grade', 'nom_prenoms'), columns=('annee_punition',)),
+])
+def test_pivot_matches_pandas_groupby(populated_db, spec):
+    result = PivotEngine(populated_db).compute(spec)
+    table = result.table
+    expected = _reference_cells(populated_db, spec)
+
+    assert _leaf_cells(table) == expected
+    total_row = [label for label in table.index if is_total_label(label, include_subtotals=False)]
+    assert table.loc[total_row].iloc[0, -1] == sum(expected.values())
+
+    # Chaque sous-total de ligne est la somme des lignes de son groupe
+    if table.index.nlevels > 1:
+        for label in table.index:
+            if label[1] == SUBTOTAL:
+                group = [row for row in table.index if row[0] == label[0] and not is_total_label(row)]
+                assert (table.loc[label] == table.loc[group].sum()).all()
+
+
+# Mesures de jours d'arrêt recalculées par pandas sur chaque groupe de lignes
+JAR_REFERENCES = {
+    'jar_somme': lambda jar: jar.sum(min_count=1),
+    'jar_moyenne': lambda jar: jar.mean(),
+    'jar_mediane': lambda jar: jar.median(),
+    'jar_p90': lambda jar: jar.quantile(0.9),
+}
+
+
+def test_group_measures_match_pandas(populated_db):
+    df = AnalyticalSnapshotService.for_db(populated_db).get_frame()
+    result = group_measures(df, ['grade', 'statut'])
+
+    for key, rows in df.groupby(['grade', 'statut'], observed=True):
+        assert result.loc[key, 'nombre'] == len(rows)
+        assert result.loc[key, 'sanctions_par_dossier'] == len(rows) / rows['dossier_key'].nunique()
+        for measure, reference in JAR_REFERENCES.items():
+            np.testing.assert_allclose(result.loc[key, measure], reference(rows['taux_jar_jours']))
+
+    total = group_measures(df, []).iloc[0]
+    assert total['nombre'] == len(df)
+    np.testing.assert_allclose(total['jar_p90'], df['taux_jar_jours'].quantile(0.9))
+
+
+@pytest.mark.parametrize('measure', ['jar_mediane', 'jar_p90'])
+def test_measure_pivot_quantiles_match_pandas(populated_db, measure):
+    df = AnalyticalSnapshotService.for_db(populated_db).get_frame()
+    df = df[df['subdiv'].notna() & df['statut'].notna()]
+    table = measure_pivot(df, 'statut', 'subdiv', measure)
+    reference = JAR_REFERENCES[measure]
+
+    # Cellules et marges calculées sur les lignes sous-jacentes
+    for subdiv in table.index:
+        for statut in table.columns:
+            rows = df
+            if subdiv != 'TOTAL':
+                rows = rows[rows['subdiv'] == subdiv]
+            if statut != 'TOTAL':
+                rows = rows[rows['statut'] == statut]
+            expected = reference(rows['taux_jar_jours']) if len(rows) else np.nan
+            np.testing.assert_allclose(table.loc[subdiv, statut], expected)
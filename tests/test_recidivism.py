@@ -0,0 +1,58 @@
+from collections import defaultdict
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+from src.analytics.recidivism_engine import RecidivismEngine
+from src.database.migrations import gendarme_categories_sql, gendarme_summary_sql
+
+from .sample_data import random_writes
+
+
+def _sorted(cursor, query):
+    cursor.execute(query)
+    return sorted(cursor.fetchall(), key=repr)
+
+
+def _brute_force_series(cursor, min_sanctions, months):
+    """Série la plus récente de min_sanctions sanctions en moins de months mois, par matricule"""
+    cursor.execute("SELECT matricule, date_faits FROM sanctions WHERE date_faits IS NOT NULL")
+    dates = defaultdict(list)
+    for matricule, date_faits in cursor.fetchall():
+        dates[matricule].append(date_faits)
+
+    series = {}
+    for matricule, values in dates.items():
+        values.sort()
+        for end in range(min_sanctions - 1, len(values)):
+            debut, fin = values[end - min_sanctions + 1], values[end]
+            # Jours des faits 1-28 dans le jeu de test : pas de débordement de fin de mois
+            if date.fromisoformat(debut) >= date.fromisoformat(fin) - relativedelta(months=months):
+                series[matricule] = max(series.get(matricule, (debut, fin)), (debut, fin),
+                                        key=lambda serie: (serie[1], serie[0]))
+    return series
+
+
+def test_gendarmes_resume_matches_full_recompute_after_writes(populated_db):
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        random_writes(cursor)
+        conn.commit()
+
+        assert _sorted(cursor, "SELECT * FROM gendarmes_resume") == _sorted(cursor, gendarme_summary_sql("1"))
+        assert (_sorted(cursor, "SELECT * FROM gendarmes_resume_categories")
+                == _sorted(cursor, gendarme_categories_sql("1")))
+
+
+def test_repeat_offenders_match_brute_force_windows(populated_db):
+    engine = RecidivismEngine(populated_db)
+    with populated_db.get_connection() as conn:
+        cursor = conn.cursor()
+        for min_sanctions, months in ((2, 1), (3, 6), (3, 12), (4, 24), (6, 60)):
+            offenders = engine.repeat_offenders(min_sanctions, months)
+            expected = _brute_force_series(cursor, min_sanctions, months)
+            assert {o.matricule: (o.debut, o.fin) for o in offenders} == expected
+            assert len(offenders) == len(expected)
+
+            counts = [o.nb_sanctions for o in offenders]
+            assert counts == sorted(counts, reverse=True)